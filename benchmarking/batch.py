@@ -0,0 +1,52 @@
+import random
+import sys
+from time import perf_counter
+
+from benchmarking.corpus import synthetic_docs
+from indexer.index import Index
+from preprocessing.tokenize.stand import StandardTokenizer
+from search.model.batch import BatchSearch
+from search.model.boolean import BooleanSearch, PhraseSearch
+from search.query.cache import QueryCache
+from search.query.query import BoolQuery, PhraseQuery
+
+
+def query_batch(n_queries: int, vocab: list, rnd: random.Random) -> list:
+
+    # Mixed AND / OR / NOT / phrase queries, terms (and whole queries) drawn with a 1/rank popularity
+
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    distinct = list()
+    for _ in range(n_queries // 4):
+        a, b, c = rnd.choices(vocab, weights, k=3)
+        distinct.append(rnd.choice([BoolQuery([a, b]), BoolQuery([a, b, c]), BoolQuery(should=[a, b]),
+                                    BoolQuery(must=[a], must_not=[b]), PhraseQuery([a, b], slop=3)]))
+    return rnd.choices(distinct, [1.0 / (rank + 1) for rank in range(len(distinct))], k=n_queries)
+
+
+def run(n_docs: int = 5000, batch_sizes=(10, 100, 1000)):
+
+    # Throughput of BatchSearch.search_batch vs. a loop of single BooleanSearch / PhraseSearch queries
+
+    index = Index(tokenizer=StandardTokenizer()).build_docs(enumerate(synthetic_docs(n_docs), 1), compact=True)
+    vocab, rnd = ["w{}".format(i) for i in range(500)], random.Random(8)
+
+    print("{:>6} {:>12} {:>12} {:>12} {:>9}".format("batch", "loop qps", "loop+c qps", "batch qps", "speedup"))
+    for size in batch_sizes:
+        queries = query_batch(size, vocab, rnd)
+        qps = list()
+        for cache_size in [0, QueryCache.SIZE]:
+            boolean, phrase = BooleanSearch(index, cache_size), PhraseSearch(index, cache_size)
+            start = perf_counter()
+            expected = [(phrase if isinstance(sq, PhraseQuery) else boolean).search(sq) for sq in queries]
+            qps.append(size / (perf_counter() - start))
+        start = perf_counter()
+        assert BatchSearch(index).search_batch(queries) == expected
+        qps.append(size / (perf_counter() - start))
+        print("{:>6} {:>12.0f} {:>12.0f} {:>12.0f} {:>9.1f}".format(size, *qps, qps[2] / qps[0]))
+    print("loop+c == single queries with the QueryCache, every run starts from new (empty cache) models")
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.batch [n_docs]
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,345 @@
+import argparse
+import json
+import platform
+import random
+import runpy
+import subprocess
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+from os import cpu_count, path
+from time import perf_counter
+
+import numpy as np
+
+from benchmarking.corpus import zipf_docs, read_trec
+from benchmarking.memory import measure
+from indexer.compression import CompressedIndex
+from indexer.index import Index
+from indexer.terms import TermDictionary
+from preprocessing.analyzer import Analyzer
+from preprocessing.stem.porterstemmer import PorterStemmer
+from preprocessing.tokenize.stand import StandardTokenizer
+from search.model.batch import BatchSearch
+from search.model.boolean import BooleanSearch, BitmapSearch, PhraseSearch
+from search.model.ranked import RankedSearch, WANDSearch
+from search.query.query import BoolQuery, PhraseQuery, RankedQuery
+
+
+# Benchmark suite: runs the scenarios below over one corpus (deterministic Zipfian synthetic documents, or a
+# TREC collection) and reports flat metrics per scenario, written as JSON so runs can be compared:
+#
+#   python -m benchmarking.benchmarker suite [--docs 2000] [--trec file] [--output run.json]
+#   python -m benchmarking.benchmarker compare baseline.json run.json [--threshold 0.1]
+#   python -m benchmarking.benchmarker module wand [args..]  (any benchmarking/<module>.py, as python -m)
+#
+# Metric names tell their direction: *_per_sec / *_qps higher is better, *_ms / *_bytes* lower is better,
+# anything else is informational (sizes, counts) and never compared
+
+
+SCENARIOS = dict()
+
+
+def scenario(fn):
+    SCENARIOS[fn.__name__] = fn
+    return fn
+
+
+class Context:
+
+    # Corpus of a run and what scenarios share (built lazily, once)
+
+    def __init__(self, docs: list, repeat: int, n_queries: int, seed: int):
+        self.docs = docs
+        self.repeat = repeat
+        self.n_queries = n_queries
+        self.seed = seed
+        self._indexer, self._index = None, None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._indexer = Index(tokenizer=StandardTokenizer())
+            self._index = self._indexer.build_docs(self.docs, compact=True)
+        return self._index
+
+    @property
+    def stats(self):
+        # collection statistics of the index build (for ranking)
+        self.index
+        return self._indexer.stats
+
+    def rnd(self) -> random.Random:
+        return random.Random(self.seed)
+
+    def best_of(self, fn) -> float:
+        # Best wall time (seconds) of fn over repeat runs
+        best = float('inf')
+        for _ in range(self.repeat):
+            start = perf_counter()
+            fn()
+            best = min(best, perf_counter() - start)
+        return best
+
+    def latencies(self, search, queries: list, prefix: str) -> dict:
+
+        # {prefix_qps, prefix_p50_ms, prefix_p99_ms} of running every query repeat times
+
+        samples = list()
+        for _ in range(self.repeat):
+            for sq in queries:
+                start = perf_counter()
+                search(sq)
+                samples.append(perf_counter() - start)
+        samples.sort()
+        return {prefix + "_qps": len(samples) / sum(samples),
+                prefix + "_p50_ms": 1000 * samples[len(samples) // 2],
+                prefix + "_p99_ms": 1000 * samples[min(len(samples) - 1, int(0.99 * len(samples)))]}
+
+
+@scenario
+def tokenize(ctx: Context) -> dict:
+
+    # Tokenization throughput of the standard tokenizer and of a full analyzer (lowercase, stop words, stemmer)
+
+    mb = sum(len(text) for _, text in ctx.docs) / 2 ** 20
+    tokenizer = StandardTokenizer()
+    n_tokens = sum(len(tokenizer.tokenize(text)) for _, text in ctx.docs)
+    counts = Counter(tok for _, text in ctx.docs[:200] for tok, _ in tokenizer.tokenize(text))
+    analyzer = Analyzer(StandardTokenizer(), stops=frozenset(tok for tok, _ in counts.most_common(50)),
+                        stemmer=PorterStemmer())
+    res = {"tokens": n_tokens, "mb": round(mb, 3)}
+    for name, fn in [("standard", lambda: [tokenizer.tokenize(text) for _, text in ctx.docs]),
+                     ("analyzer", lambda: [list(analyzer.analyze([text])) for _, text in ctx.docs])]:
+        sec = ctx.best_of(fn)
+        res[name + "_mb_per_sec"] = mb / sec
+        res[name + "_tokens_per_sec"] = n_tokens / sec
+    return res
+
+
+@scenario
+def build(ctx: Context) -> dict:
+
+    # Index build throughput, Term/Posting objects vs. compact arrays (tokenization included)
+
+    indexer = Index(tokenizer=StandardTokenizer())
+    res = dict()
+    for name, compact in [("objects", False), ("compact", True)]:
+        sec = ctx.best_of(lambda: indexer.build_docs(ctx.docs, compact=compact))
+        res[name + "_docs_per_sec"] = len(ctx.docs) / sec
+    res["terms"] = len(ctx.index)
+    res["postings"] = sum(ctx.index[term].df for term in ctx.index)
+    return res
+
+
+def boolean_queries(ctx: Context) -> list:
+
+    # AND / OR / NOT / nested queries over frequent, mid and rare terms (by df bands of the index)
+
+    rnd, terms = ctx.rnd(), sorted(ctx.index, key=lambda t: -ctx.index[t].df)
+    bands = [terms[:50], terms[50:1000] or terms, terms[1000:] or terms]
+    pick = lambda: rnd.choice(rnd.choice(bands))
+    queries = list()
+    for i in range(ctx.n_queries):
+        kind = i % 4
+        if kind == 0:
+            queries.append(BoolQuery([pick(), pick()]))
+        elif kind == 1:
+            queries.append(BoolQuery(should=[pick(), pick(), pick()]))
+        elif kind == 2:
+            queries.append(BoolQuery(must=[pick()], must_not=[pick()]))
+        else:
+            queries.append(BoolQuery(must=[pick(), BoolQuery(should=[pick(), pick()])]))
+    return queries
+
+
+@scenario
+def boolean(ctx: Context) -> dict:
+
+    # Boolean query latency on posting lists, on roaring DocSets, and batch throughput (caches disabled)
+
+    queries = boolean_queries(ctx)
+    res = ctx.latencies(BooleanSearch(ctx.index, cache_size=0).search, queries, "boolean")
+    bitmap = BitmapSearch(ctx.index, cache_size=0)
+    for term in ctx.index:  # DocSets are built once per term, not part of the query time
+        bitmap.postings(term)
+    res.update(ctx.latencies(bitmap.search, queries, "bitmap"))
+    batch = BatchSearch(ctx.index, cache_size=0)
+    res["batch_qps"] = len(queries) / ctx.best_of(lambda: batch.search_batch(queries))
+    return res
+
+
+@scenario
+def phrase(ctx: Context) -> dict:
+
+    # Phrase query latency, phrases of 2-3 consecutive tokens taken from the corpus (slop 1 and 3)
+
+    rnd, tokenizer, queries = ctx.rnd(), StandardTokenizer(), list()
+    while len(queries) < ctx.n_queries:
+        tokens = [tok.lower() for tok, _ in tokenizer.tokenize(rnd.choice(ctx.docs)[1])]
+        if len(tokens) < 3:
+            continue
+        i, n = rnd.randrange(len(tokens) - 2), rnd.randint(2, 3)
+        queries.append(PhraseQuery(tokens[i:i + n], slop=rnd.choice([1, 3])))
+    res = ctx.latencies(PhraseSearch(ctx.index, cache_size=0).search, queries, "phrase")
+    res["batch_qps"] = len(queries) / ctx.best_of(lambda: BatchSearch(ctx.index, cache_size=0).search_batch(queries))
+    return res
+
+
+@scenario
+def ranked(ctx: Context) -> dict:
+
+    # Top 10 BM25 latency, exhaustive vs. WAND, queries of 2-4 terms
+
+    rnd, terms = ctx.rnd(), sorted(ctx.index)
+    queries = [RankedQuery(rnd.sample(terms, rnd.randint(2, 4)), 10) for _ in range(ctx.n_queries)]
+    res = ctx.latencies(RankedSearch(ctx.index, stats=ctx.stats).search, queries, "exhaustive")
+    res.update(ctx.latencies(WANDSearch(ctx.index, stats=ctx.stats).search, queries, "wand"))
+    return res
+
+
+@scenario
+def memory(ctx: Context) -> dict:
+
+    # Bytes per posting of the index layouts, bytes per term of the term dictionaries
+
+    res, postings = dict(), sum(ctx.index[term].df for term in ctx.index)
+    indexer = Index(tokenizer=StandardTokenizer())
+    for name, build_index in [("objects", lambda: indexer.build_docs(ctx.docs, compact=False)),
+                              ("compact", lambda: indexer.build_docs(ctx.docs, compact=True)),
+                              ("compressed", lambda: CompressedIndex.from_index(ctx.index))]:
+        res[name + "_bytes_per_posting"] = measure(build_index) / postings
+    terms = sorted(ctx.index)
+    res["dict_terms_bytes_per_term"] = measure(lambda: {term: t for t, term in enumerate(terms)}) / len(terms)
+    res["sorted_terms_bytes_per_term"] = measure(lambda: TermDictionary.from_terms(terms)) / len(terms)
+    return res
+
+
+def run_suite(docs: list, scenarios: list, repeat: int = 3, n_queries: int = 200, seed: int = 7,
+              corpus: dict = None) -> dict:
+
+    # Runs the scenarios, returns the JSON document of the run: {"meta": {..}, "results": {scenario: metrics}}
+
+    ctx, results = Context(docs, repeat, n_queries, seed), dict()
+    for name in scenarios:
+        start = perf_counter()
+        results[name] = {k: round(v, 4) if isinstance(v, float) else v for k, v in SCENARIOS[name](ctx).items()}
+        print("{:<10} done in {:.1f}s".format(name, perf_counter() - start), file=sys.stderr)
+    return {"meta": run_meta(dict(corpus or {}, docs=len(docs)), repeat, n_queries, seed), "results": results}
+
+
+def run_meta(corpus: dict, repeat: int, n_queries: int, seed: int) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=path.dirname(path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds'), "commit": commit,
+            "python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "cpus": cpu_count(), "corpus": corpus, "repeat": repeat, "queries": n_queries, "seed": seed}
+
+
+def direction(metric: str) -> int:
+    # 1: higher is better, -1: lower is better, 0: not compared
+    if metric.endswith("_per_sec") or metric.endswith("_qps"):
+        return 1
+    if metric.endswith("_ms") or "_bytes" in metric:
+        return -1
+    return 0
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> list:
+
+    # Rows (scenario, metric, baseline, current, change, status) of the metrics found in both runs,
+    # status: "regression" / "improvement" when the relative change in the metric direction is over threshold
+
+    rows = list()
+    for name, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            base = baseline["results"].get(name, {}).get(metric)
+            sign = direction(metric)
+            if base is None or not sign or not base:
+                continue
+            change = (value - base) / base
+            status = "regression" if change * sign < -threshold else "improvement" if change * sign > threshold \
+                else "ok"
+            rows.append((name, metric, base, value, change, status))
+    return rows
+
+
+def print_results(run: dict):
+    for name, metrics in run["results"].items():
+        print(name)
+        for metric, value in metrics.items():
+            print("  {:<32} {:>16,.3f}".format(metric, value) if isinstance(value, float)
+                  else "  {:<32} {:>16,}".format(metric, value))
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarking.benchmarker", description="Benchmark suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    suite = sub.add_parser("suite", help="run the benchmark scenarios")
+    suite.add_argument("--trec", nargs="*", help="TREC file(s) to use instead of the synthetic corpus")
+    suite.add_argument("--docs", type=int, default=2000, help="num of docs (synthetic) or max docs (TREC)")
+    suite.add_argument("--doc-len", type=int, default=200, help="words per synthetic doc")
+    suite.add_argument("--vocab", type=int, default=20000, help="synthetic vocabulary size")
+    suite.add_argument("--zipf", type=float, default=1.07, help="synthetic Zipf exponent")
+    suite.add_argument("--seed", type=int, default=13)
+    suite.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    suite.add_argument("--repeat", type=int, default=3)
+    suite.add_argument("--queries", type=int, default=200)
+    suite.add_argument("--output", help="write the run as JSON")
+    suite.add_argument("--compare", help="baseline run JSON, exit 1 on regressions")
+    suite.add_argument("--threshold", type=float, default=0.1, help="relative change counted as a regression")
+
+    cmp = sub.add_parser("compare", help="compare 2 runs")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=0.1)
+
+    module = sub.add_parser("module", help="run one of the benchmarking/<module>.py benchmarks")
+    module.add_argument("name")
+    module.add_argument("args", nargs=argparse.REMAINDER)
+
+    args = parser.parse_args(argv)
+    if args.command == "module":
+        sys.argv = [args.name] + args.args
+        runpy.run_module("benchmarking." + args.name, run_name="__main__")
+        return 0
+
+    if args.command == "compare":
+        with open(args.baseline) as f, open(args.current) as g:
+            return report(compare(json.load(f), json.load(g), args.threshold))
+
+    if args.trec:
+        docs, corpus = list(), {"trec": args.trec}
+        for fp in args.trec:
+            docs.extend(text for _, text in read_trec(fp))
+        docs = docs[:args.docs]
+    else:
+        docs = list(zipf_docs(args.docs, args.doc_len, args.vocab, args.zipf, args.seed))
+        corpus = {"synthetic": {"doc_len": args.doc_len, "vocab": args.vocab, "zipf": args.zipf, "seed": args.seed}}
+    run = run_suite(list(enumerate(docs, 1)), args.scenarios, args.repeat, args.queries, corpus=corpus)
+    print_results(run)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            return report(compare(json.load(f), run, args.threshold))
+    return 0
+
+
+def report(rows: list) -> int:
+    # Prints the comparison, returns the exit code (1 if any regression)
+    print("{:<10} {:<32} {:>12} {:>12} {:>8}  {}".format("scenario", "metric", "baseline", "current", "change", ""))
+    for name, metric, base, value, change, status in rows:
+        print("{:<10} {:<32} {:>12.3f} {:>12.3f} {:>+7.1%}  {}".format(
+            name, metric, base, value, change, "" if status == "ok" else status))
+    return int(any(row[-1] == "regression" for row in rows))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.benchmarker suite --docs 2000 --output run.json
+    sys.exit(main())
@@ -0,0 +1,39 @@
+import random
+import sys
+from time import perf_counter
+
+from benchmarking.corpus import synthetic_docs
+from indexer.index import Index
+from preprocessing.tokenize.stand import StandardTokenizer
+from search.model.boolean import BooleanSearch
+from search.query.query import BoolQuery
+
+
+def run(n_docs: int = 5000, n_distinct: int = 500, n_queries: int = 5000):
+
+    # Skewed query traffic (query popularity follows 1/rank, as the corpus terms do):
+    # throughput without cache vs. with the QueryCache, and it hit ratios
+
+    index = Index(tokenizer=StandardTokenizer()).build_docs(enumerate(synthetic_docs(n_docs), 1), compact=True)
+    rnd = random.Random(5)
+    vocab = ["w{}".format(i) for i in range(200)]
+    distinct = [BoolQuery(must=rnd.sample(vocab, rnd.randint(2, 3))) for _ in range(n_distinct)]
+    stream = rnd.choices(distinct, [1.0 / (rank + 1) for rank in range(n_distinct)], k=n_queries)
+
+    print("{} queries ({} distinct) over {} docs".format(n_queries, n_distinct, n_docs))
+    print("{:<10} {:>10} {:>12} {:>14}".format("model", "qps", "result hits", "inters. hits"))
+    for name, cache_size in [("uncached", 0), ("cached", 1024), ("cached64", 64)]:
+        model = BooleanSearch(index, cache_size=cache_size)
+        start = perf_counter()
+        for sq in stream:
+            model.search(sq)
+        elapsed = perf_counter() - start
+        stats = model.cache.stats() if model.cache else None
+        ratio = [cache["hits"] / max(1, cache["hits"] + cache["misses"]) for cache in stats.values()] if stats \
+            else [0.0, 0.0]
+        print("{:<10} {:>10.0f} {:>12.1%} {:>14.1%}".format(name, n_queries / elapsed, *ratio))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.cache [n_docs]
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,39 @@
+import sys
+from time import perf_counter
+
+from benchmarking.corpus import synthetic_docs
+from indexer.compression import CODECS, CompressedIndex
+from indexer.index import Index
+from preprocessing.tokenize.stand import StandardTokenizer
+
+
+def scan(index, positions: bool) -> float:
+
+    # Time to decode every doc id (and optionally every position list) of every term
+
+    start = perf_counter()
+    for term in index:
+        for p in index[term].pst_list:
+            if positions:
+                p.pos_list
+            else:
+                p.id
+    return perf_counter() - start
+
+
+def run(n_docs: int):
+    compact = Index(tokenizer=StandardTokenizer()).build_docs(enumerate(synthetic_docs(n_docs), 1), compact=True)
+    n_postings = len(compact.doc_ids)
+
+    print("{:<8} {:>14} {:>14} {:>16} {:>20}".format(
+        "codec", "bytes", "bytes/posting", "ids Mpostings/s", "positions Mpostings/s"))
+    layouts = [("raw", compact)] + [(name, CompressedIndex.from_index(compact, codec)) for name, codec in CODECS.items()]
+    for name, index in layouts:
+        print("{:<8} {:>14,} {:>14.2f} {:>16.2f} {:>20.2f}".format(
+            name, index.nbytes(), index.nbytes() / n_postings,
+            n_postings / scan(index, False) / 1e6, n_postings / scan(index, True) / 1e6))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.compression [n_docs]
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,116 @@
+import gzip
+import random
+import re
+from html import escape, unescape
+from itertools import accumulate
+from os import path, makedirs
+
+
+def synthetic_docs(n_docs: int, doc_len: int = 200, vocab_size: int = 5000, seed: int = 13):
+
+    # Generates n_docs random documents over a fixed vocabulary,
+    # Word frequencies follow 1/rank so a few terms are very common (long posting lists)
+
+    rnd = random.Random(seed)
+    vocab = ["w{}".format(i) for i in range(vocab_size)]
+    weights = [1.0 / (rank + 1) for rank in range(vocab_size)]
+    for _ in range(n_docs):
+        yield " ".join(rnd.choices(vocab, weights, k=doc_len))
+
+
+def write_corpus(dir_path: str, docs) -> str:
+
+    # Writes each document into its own file under dir_path (the layout Index.build expects)
+
+    makedirs(dir_path, exist_ok=True)
+    for i, doc in enumerate(docs):
+        with open(path.join(dir_path, "d{:07d}".format(i)), 'w') as f:
+            f.write(doc)
+    return dir_path
+
+
+def zipf_vocab(size: int, seed: int = 13) -> list:
+
+    # size distinct pronounceable pseudo words (2 to 4 syllables), deterministic for a seed
+
+    rnd = random.Random(seed)
+    onsets, vowels, codas = "b c d f g h k l m n p r s t v w st tr pl ch sh".split(), "a e i o u ai ea ou".split(), \
+        ["", "", "n", "r", "s", "t", "l", "ng", "ck"]
+    words = dict()
+    while len(words) < size:
+        word = "".join(rnd.choice(onsets) + rnd.choice(vowels) + rnd.choice(codas) for _ in range(rnd.randint(1, 3)))
+        words[word] = None
+    return list(words)
+
+
+def zipf_docs(n_docs: int, doc_len: int = 200, vocab_size: int = 20000, s: float = 1.07, seed: int = 13):
+
+    # Natural looking random documents, deterministic for a seed:
+    # word frequencies follow a Zipf law 1 / rank^s (s ~1.07 for English), sentences of 4-20 words
+    # start with a capital and end with . ? or !, with commas, numbers and hyphenated words here and there
+
+    rnd = random.Random(seed)
+    vocab = zipf_vocab(vocab_size, seed)
+    cum_weights = list(accumulate(1.0 / (rank + 1) ** s for rank in range(vocab_size)))
+    for _ in range(n_docs):
+        words, sentences = rnd.choices(vocab, cum_weights=cum_weights, k=doc_len), list()
+        i = 0
+        while i < len(words):
+            sentence = words[i:i + rnd.randint(4, 20)]
+            i += len(sentence)
+            for j in range(1, len(sentence)):
+                r = rnd.random()
+                if r < 0.08:
+                    sentence[j - 1] += ","
+                elif r < 0.10:
+                    sentence[j] = str(rnd.randint(0, 10000))
+                elif r < 0.12:
+                    sentence[j] = sentence[j - 1].rstrip(",") + "-" + sentence[j]
+            sentence[0] = sentence[0].capitalize()
+            sentences.append(" ".join(sentence) + rnd.choice("...?!"))
+        yield " ".join(sentences)
+
+
+def write_trec(fp: str, docs, prefix: str = "SYN") -> str:
+
+    # Writes (text) docs as a TREC SGML file (gzip compressed when fp ends with .gz), DOCNO: prefix-000001..
+
+    with (gzip.open if fp.endswith(".gz") else open)(fp, 'wt', encoding='utf-8') as f:
+        for i, doc in enumerate(docs, 1):
+            f.write("<DOC>\n<DOCNO> {}-{:06d} </DOCNO>\n<TEXT>\n{}\n</TEXT>\n</DOC>\n".format(prefix, i, escape(doc)))
+    return fp
+
+
+# TREC tags whose content is indexed (others, e.g. DOCID, DATE, are metadata)
+TREC_TEXT_TAGS = ("TEXT", "HEADLINE", "HEAD", "TITLE", "LEADPARA", "GRAPHIC")
+
+
+def read_trec(fp: str, text_tags=TREC_TEXT_TAGS):
+
+    # Streams (docno, text) out of a TREC SGML file (as the TREC disks 4-5, AP, WSJ collections):
+    # <DOC> <DOCNO> id </DOCNO> ... <TEXT> text </TEXT> ... </DOC>, several docs per file, gzip files supported.
+    # Text is the content of the text_tags elements, with any inner markup removed and entities decoded
+
+    tag = re.compile(r"<(/?)([A-Za-z0-9]+)[^>]*>")
+    with (gzip.open if fp.endswith(".gz") else open)(fp, 'rt', encoding='utf-8', errors='replace') as f:
+        docno, parts, depth = None, list(), 0
+        for line in f:
+            pos = 0
+            for m in tag.finditer(line):
+                if depth:
+                    parts.append(line[pos:m.start()])
+                closing, name = m.group(1), m.group(2).upper()
+                if name == "DOC" and closing:
+                    yield docno, unescape(" ".join(" ".join(parts).split()))
+                    docno, parts, depth = None, list(), 0
+                elif name == "DOC":
+                    docno, parts, depth = None, list(), 0
+                elif name == "DOCNO" and not closing:
+                    end = line.find("</DOCNO>", m.end())
+                    docno = line[m.end():end if end >= 0 else len(line)].strip()
+                elif name in text_tags:
+                    depth += -1 if closing else 1
+                    depth = max(depth, 0)
+                pos = m.end()
+            if depth:
+                parts.append(line[pos:])
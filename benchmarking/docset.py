@@ -0,0 +1,47 @@
+import random
+import sys
+from timeit import timeit
+
+from indexer.compact import CompactIndexBuilder
+from indexer.docset import DocSet
+from search.model.boolean import BooleanSearch, BitmapSearch
+
+
+def run(universe: int = 1000000, repeat: int = 3):
+
+    # AND / OR / NOT throughput of term pairs by density: CompactIndex posting lists (BooleanSearch)
+    # vs. DocSets (BitmapSearch), plus the size of both representations
+
+    rnd = random.Random(21)
+    densities = {"dense": 0.5, "medium": 0.05, "sparse": 0.001}
+    builder = CompactIndexBuilder()
+    for name, density in densities.items():
+        for doc_id in sorted(rnd.sample(range(universe), int(density * universe))):
+            builder.add_posting(name, doc_id, [1])
+    index = builder.build()
+    lists = {name: index[name].pst_list for name in densities}
+    docsets = {name: DocSet.from_postings(lists[name]) for name in densities}
+
+    print("{:<8} {:>10} {:>14} {:>14}".format("term", "ids", "postings KB", "docset KB"))
+    for name in densities:
+        print("{:<8} {:>10} {:>14.0f} {:>14.0f}".format(
+            name, len(lists[name]), 8 * len(lists[name]) / 1024, docsets[name].nbytes() / 1024))
+
+    print("{:<16} {:>4} {:>12} {:>12} {:>9}".format("pair", "op", "lists ms", "docset ms", "speedup"))
+    for a, b in [("dense", "dense"), ("dense", "medium"), ("dense", "sparse"), ("medium", "sparse"),
+                 ("sparse", "sparse")]:
+        for op, lst_op, set_op in [("AND", BooleanSearch.intersect, BitmapSearch.intersect),
+                                   ("OR", BooleanSearch.union, BitmapSearch.union),
+                                   ("NOT", BooleanSearch.difference, BitmapSearch.difference)]:
+            expected = BooleanSearch.doc_ids(lst_op(lists[a], lists[b]))
+            assert expected == BitmapSearch.doc_ids(set_op(docsets[a], docsets[b])), (a, b, op)
+            t_lists = timeit(lambda: lst_op(lists[a], lists[b]), number=repeat) / repeat
+            t_sets = timeit(lambda: set_op(docsets[a], docsets[b]), number=repeat) / repeat
+            print("{:<16} {:>4} {:>12.3f} {:>12.3f} {:>9.1f}".format(
+                a + "-" + b, op, t_lists * 1000, t_sets * 1000, t_lists / t_sets))
+    print("postings KB == doc ids + tfs uint32 buffers of the CompactIndex")
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.docset [universe]
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
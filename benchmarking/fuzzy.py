@@ -0,0 +1,67 @@
+import random
+import sys
+from time import perf_counter
+
+from benchmarking.stemmer import SUFFIXES
+from indexer.terms import TermDictionary
+
+
+def edit_distance(a: str, b: str) -> int:
+
+    # Plain full matrix Damerau-Levenshtein (optimal string alignment) distance
+
+    d = [[i + j if not i * j else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[-1][-1]
+
+
+def misspell(rnd: random.Random, term: str, letters: str, edits: int) -> str:
+    for _ in range(edits):
+        i, op = rnd.randrange(len(term)), rnd.randrange(4)
+        if op == 0:
+            term = term[:i] + term[i + 1:]
+        elif op == 1:
+            term = term[:i] + rnd.choice(letters) + term[i:]
+        elif op == 2:
+            term = term[:i] + rnd.choice(letters) + term[i + 1:]
+        elif i + 1 < len(term):
+            term = term[:i] + term[i + 1] + term[i] + term[i + 2:]
+    return term
+
+
+def run(vocab_size: int = 30000, n_queries: int = 20):
+
+    # Fuzzy term lookup: Levenshtein walk of the sorted TermDictionary vs. edit distance to every term
+
+    rnd = random.Random(11)
+    letters, terms = "abcdefghilmnoprstuy", set()
+    while len(terms) < vocab_size:
+        terms.add("".join(rnd.choice(letters) for _ in range(rnd.randint(3, 8))) + rnd.choice(SUFFIXES))
+    terms = sorted(terms)
+    dictionary = TermDictionary.from_terms(terms)
+
+    print("{:<6} {:>12} {:>12} {:>9} {:>9}".format("edits", "scan ms", "walk ms", "speedup", "matches"))
+    for edits in [1, 2]:
+        queries = [misspell(rnd, term, letters, edits) for term in rnd.sample(terms, n_queries)]
+        times, matches = [0.0, 0.0], 0
+        for q in queries:
+            start = perf_counter()
+            expected = [(t, d) for t, d in ((t, edit_distance(q, t)) for t in terms) if d <= edits]
+            times[0] += perf_counter() - start
+            start = perf_counter()
+            result = dictionary.fuzzy(q, edits)
+            times[1] += perf_counter() - start
+            assert result == expected, q
+            matches += len(result)
+        print("{:<6} {:>12.1f} {:>12.2f} {:>9.1f} {:>9.1f}".format(
+            edits, 1000 * times[0] / n_queries, 1000 * times[1] / n_queries, times[0] / times[1],
+            matches / n_queries))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.fuzzy [vocab_size]
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 30000)
@@ -0,0 +1,61 @@
+import random
+from timeit import timeit
+
+from indexer.compact import CompactIndexBuilder
+from indexer.index import Posting
+from search.model.boolean import BooleanSearch
+
+
+def legacy_intersect(p1: list, p2: list) -> list:
+    # Linear merge, the implementation BooleanSearch.intersect replaced
+    res, i, j = list(), 0, 0
+    while i < len(p1) and j < len(p2):
+        if p1[i].id == p2[j].id:
+            res.append(p1[i])
+            i, j = i + 1, j + 1
+        elif p1[i].id < p2[j].id:
+            i += 1
+        else:
+            j += 1
+    return res
+
+
+def legacy_difference(p1: list, p2: list) -> list:
+    # Membership test against a list of ids, the implementation BooleanSearch.difference replaced
+    doc_id2 = [p.id for p in p2]
+    return [p for p in p1 if p.id not in doc_id2]
+
+
+def postings(n: int, universe: int, rnd: random.Random) -> list:
+    return [Posting(doc_id, [1]) for doc_id in sorted(rnd.sample(range(1, universe), n))]
+
+
+def run(universe: int = 1000000, repeat: int = 3):
+
+    # AND / NOT over skewed posting list lengths: rare term vs. very common term
+
+    rnd = random.Random(7)
+    print("{:>8} {:>8} {:>6} {:>12} {:>12} {:>9}".format("short", "long", "op", "legacy ms", "new ms", "speedup"))
+    for short, long in [(10, 100000), (100, 100000), (1000, 100000), (10000, 100000), (100000, 100000)]:
+        p1, p2 = postings(short, universe, rnd), postings(long, universe, rnd)
+        builder = CompactIndexBuilder()
+        for name, pst in [("a", p1), ("b", p2)]:
+            for p in pst:
+                builder.add_posting(name, p.id, p.pos_list)
+        compact = builder.build()
+
+        cases = [("AND", legacy_intersect, BooleanSearch.intersect, (p1, p2)),
+                 ("AND*", legacy_intersect, BooleanSearch.intersect, (compact["a"].pst_list, compact["b"].pst_list))]
+        if short * long <= 10 ** 8:  # legacy difference is O(n * m)
+            cases.append(("NOT", legacy_difference, BooleanSearch.difference, (p1, p2)))
+        for op, old, new, args in cases:
+            t_old = timeit(lambda: old(*args), number=repeat) / repeat
+            t_new = timeit(lambda: new(*args), number=repeat) / repeat
+            print("{:>8} {:>8} {:>6} {:>12.3f} {:>12.3f} {:>9.1f}".format(
+                short, long, op, t_old * 1000, t_new * 1000, t_old / t_new))
+    print("AND* == CompactIndex posting lists (seek through binary search on the doc ids buffer)")
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.intersect
+    run()
@@ -0,0 +1,51 @@
+import gc
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarking.corpus import synthetic_docs, write_corpus
+from indexer.index import Index
+from indexer.terms import TermDictionary
+from preprocessing.tokenize.stand import StandardTokenizer
+
+
+def measure(build) -> int:
+
+    # Returns the number of bytes still allocated by the object returned from build()
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def run(dir_path: str):
+    indexer = Index(tokenizer=StandardTokenizer())
+    postings = sum(t.df for t in indexer.build(dir_path, compact=True).values())
+
+    print("{:<10} {:>14} {:>16}".format("layout", "bytes", "bytes/posting"))
+    for name, compact in [("objects", False), ("compact", True)]:
+        size = measure(lambda: indexer.build(dir_path, compact=compact))
+        print("{:<10} {:>14,} {:>16.1f}".format(name, size, size / postings))
+
+    # term dictionary alone: dict of term >> ordinal vs. sorted TermDictionary
+    terms = sorted(indexer.build(dir_path, compact=True))
+    print("{:<10} {:>14} {:>16}".format("terms", "bytes", "bytes/term"))
+    for name, build in [("dict", lambda: {term: t for t, term in enumerate(terms)}),
+                        ("sorted", lambda: TermDictionary.from_terms(terms))]:
+        size = measure(build)
+        print("{:<10} {:>14,} {:>16.1f}".format(name, size, size / len(terms)))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.memory [docs dir]
+    if len(sys.argv) > 1:
+        run(sys.argv[1])
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            run(write_corpus(tmp, synthetic_docs(n_docs=2000)))
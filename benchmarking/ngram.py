@@ -0,0 +1,48 @@
+import random
+import sys
+from time import perf_counter
+
+from benchmarking.stemmer import SUFFIXES
+from indexer.ngram import NGramTermIndex
+
+
+def run(vocab_size: int = 100000, n_queries: int = 200):
+
+    # Prefix / substring term lookups: k-gram index vs. a linear scan of the index keys
+
+    rnd = random.Random(9)
+    letters, terms = "abcdefghilmnoprstuy", set()
+    while len(terms) < vocab_size:
+        terms.add("".join(rnd.choice(letters) for _ in range(rnd.randint(3, 8))) + rnd.choice(SUFFIXES))
+    terms = sorted(terms)
+    start = perf_counter()
+    ngrams = NGramTermIndex(terms)
+    print("{} terms, 3-gram index built in {:.2f}s ({} grams, {:.1f} MB)".format(
+        len(terms), perf_counter() - start, len(ngrams.grams), ngrams.nbytes() / 2 ** 20))
+
+    print("{:<10} {:>6} {:>10} {:>12} {:>9} {:>9}".format("lookup", "q len", "scan ms", "ngram ms", "speedup", "matches"))
+    for kind, lookup, scan in [("prefix", ngrams.prefix, lambda q: sorted(t for t in terms if t.startswith(q))),
+                               ("substring", ngrams.substring, lambda q: sorted(t for t in terms if q in t))]:
+        for q_len in [2, 3, 4, 6]:
+            queries = list()
+            for term in rnd.sample(terms, n_queries):
+                i = 0 if kind == "prefix" else rnd.randint(0, max(0, len(term) - q_len))
+                queries.append(term[i:i + q_len])
+            times, matches = [0.0, 0.0], 0
+            for q in queries:
+                start = perf_counter()
+                expected = scan(q)
+                times[0] += perf_counter() - start
+                start = perf_counter()
+                result = lookup(q)
+                times[1] += perf_counter() - start
+                assert result == expected, q
+                matches += len(result)
+            print("{:<10} {:>6} {:>10.3f} {:>12.3f} {:>9.1f} {:>9.0f}".format(
+                kind, q_len, 1000 * times[0] / n_queries, 1000 * times[1] / n_queries, times[0] / times[1],
+                matches / n_queries))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.ngram [vocab_size]
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
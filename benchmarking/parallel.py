@@ -0,0 +1,35 @@
+import sys
+import tempfile
+from os import cpu_count
+from time import perf_counter
+
+from benchmarking.corpus import synthetic_docs, write_corpus
+from indexer.index import Index
+from indexer.parallel import ParallelIndex
+from preprocessing.tokenize.stand import StandardTokenizer
+
+
+def run(n_docs: int, workers):
+
+    # Build throughput of the serial indexer vs. the map-reduce indexer at growing pool sizes
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs_dir = write_corpus(tmp, synthetic_docs(n_docs))
+        print("{:>8} {:>10} {:>10} {:>9}".format("workers", "sec", "docs/sec", "speedup"))
+
+        start = perf_counter()
+        Index(tokenizer=StandardTokenizer()).build(docs_dir, compact=True)
+        serial = perf_counter() - start
+        print("{:>8} {:>10.3f} {:>10,.0f} {:>9.2f}".format("serial", serial, n_docs / serial, 1))
+
+        for n in workers:
+            start = perf_counter()
+            ParallelIndex(StandardTokenizer(), workers=n).build(docs_dir, compact=True)
+            sec = perf_counter() - start
+            print("{:>8} {:>10.3f} {:>10,.0f} {:>9.2f}".format(n, sec, n_docs / sec, serial / sec))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.parallel [n_docs]
+    n_cpu = cpu_count() or 1
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 8000, sorted({1, 2, 4, n_cpu}))
@@ -0,0 +1,75 @@
+import random
+import sys
+from timeit import timeit
+
+from indexer.compact import CompactIndexBuilder
+from search.model.boolean import PhraseSearch
+from search.query.query import PhraseQuery
+
+
+def legacy_pos_intersect(p1: list, p2: list, slop: int) -> list:
+    # Pairwise unordered positional merge, the implementation PhraseSearch.pos_match replaced
+    res, i, j = list(), 0, 0
+    while i < len(p1) and j < len(p2):
+        if p1[i].id == p2[j].id:
+            l, pp1, pp2 = list(), 0, 0
+            pos1, pos2 = p1[i].pos_list, p2[j].pos_list
+            while pp1 < len(pos1):
+                while pp2 < len(pos2):
+                    if abs(pos1[pp1] - pos2[pp2]) <= slop:
+                        l.append(pos2[pp2])
+                    elif pos2[pp2] > pos1[pp1]:
+                        break
+                    pp2 += 1
+                while l and abs(l[0] - pos1[pp1]) > slop:
+                    l.pop()
+                if l:
+                    res.append(p1[i])
+                pp1 += 1
+            i, j = i + 1, j + 1
+        elif p1[i].id < p2[j].id:
+            i += 1
+        else:
+            j += 1
+    return res
+
+
+def legacy_search(index, sq: PhraseQuery) -> list:
+    terms = sorted([index[term] for term in sq.terms if term in index], key=lambda t: t.df)
+    result, terms = terms[0].pst_list, terms[1:]
+    while terms and result:
+        result = legacy_pos_intersect(result, terms[0].pst_list, slop=sq.slop)
+        terms = terms[1:]
+    return [p.id for p in result]
+
+
+def run(n_docs: int = 20, doc_len: int = 20000, repeat: int = 3):
+
+    # Phrase queries over long documents made of a few frequent terms (thousands of positions per term)
+
+    rnd = random.Random(11)
+    vocab = ["a", "b", "c", "d", "e"]
+    builder = CompactIndexBuilder()
+    for doc_id in range(1, n_docs + 1):
+        positions = dict()
+        for pos in range(1, doc_len + 1):
+            positions.setdefault(rnd.choice(vocab), list()).append(pos)
+        for term in sorted(positions):
+            builder.add_posting(term, doc_id, positions[term])
+    index = builder.build()
+    model = PhraseSearch(index, cache_size=0)
+
+    print("{} docs, ~{} positions per term per doc".format(n_docs, doc_len // len(vocab)))
+    print("{:<14} {:>5} {:>12} {:>12} {:>9} {:>8}".format("phrase", "slop", "legacy ms", "new ms", "speedup", "matches"))
+    for terms, slop in [(["a", "b"], 1), (["a", "b", "c"], 1), (["a", "b", "c", "d"], 1),
+                        (["a", "b", "c", "d", "e", "a"], 1), (["a", "b", "c"], 3), (["e", "d", "c", "b", "a"], 2)]:
+        sq = PhraseQuery(terms, slop)
+        t_old = timeit(lambda: legacy_search(index, sq), number=repeat) / repeat
+        t_new = timeit(lambda: model.search(sq), number=repeat) / repeat
+        print("{:<14} {:>5} {:>12.2f} {:>12.2f} {:>9.1f} {:>8}".format(
+            " ".join(terms), slop, t_old * 1000, t_new * 1000, t_old / t_new, len(model.search(sq))))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.phrase [n_docs] [doc_len]
+    run(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,38 @@
+import random
+import sys
+from time import perf_counter
+
+from benchmarking.corpus import synthetic_docs
+from indexer.index import Index
+from preprocessing.tokenize.stand import StandardTokenizer
+from search.model.ranked import RankedSearch, BM25, TFIDF
+from search.query.query import RankedQuery
+
+
+def run(n_docs: int, ks, n_queries: int = 50):
+
+    # Mean / p95 latency of ranked queries (3 random terms) at different k
+
+    indexer = Index(tokenizer=StandardTokenizer())
+    index = indexer.build_docs(enumerate(synthetic_docs(n_docs), 1), compact=True)
+    rnd = random.Random(3)
+    vocab = sorted(index)
+    queries = [[rnd.choice(vocab) for _ in range(3)] for _ in range(n_queries)]
+
+    print("{:<6} {:>6} {:>10} {:>10}".format("model", "k", "mean ms", "p95 ms"))
+    for name, scorer in [("bm25", BM25()), ("tfidf", TFIDF())]:
+        model = RankedSearch(index, scorer, indexer.stats)
+        for k in ks:
+            latencies = list()
+            for terms in queries:
+                start = perf_counter()
+                model.search(RankedQuery(terms, k))
+                latencies.append(perf_counter() - start)
+            latencies.sort()
+            print("{:<6} {:>6} {:>10.2f} {:>10.2f}".format(
+                name, k, 1000 * sum(latencies) / len(latencies), 1000 * latencies[int(0.95 * (len(latencies) - 1))]))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.ranked [n_docs]
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000, [1, 10, 100, 1000])
@@ -0,0 +1,92 @@
+import asyncio
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+from os import path
+from time import perf_counter
+
+from benchmarking.corpus import synthetic_docs
+from indexer.disk import write_segment
+from indexer.index import Index
+from preprocessing.tokenize.stand import StandardTokenizer
+from service.client import SearchClient
+
+MAIN = path.join(path.dirname(path.dirname(path.abspath(__file__))), "main.py")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def queries(n: int, rnd: random.Random) -> list:
+
+    # Query DSL stream, terms and whole queries popularity follow 1/rank (so identical queries overlap)
+
+    vocab = ["w{}".format(i) for i in range(300)]
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    distinct = list()
+    for _ in range(200):
+        a, b, c = rnd.choices(vocab, weights, k=3)
+        distinct.append(rnd.choice([{"bool": {"must": [a, b]}}, {"bool": {"should": [a, b, c]}},
+                                    {"bool": {"must": [a], "must_not": [b]}}, {"phrase": {"terms": [a, b], "slop": 2}}]))
+    return rnd.choices(distinct, [1.0 / (rank + 1) for rank in range(len(distinct))], k=n)
+
+
+async def load(port: int, stream: list, concurrency: int) -> tuple:
+
+    # Sends the stream over `concurrency` kept alive connections, returns (qps, sorted latencies, server stats)
+
+    latencies, it = list(), iter(stream)
+
+    async def worker():
+        client = SearchClient(port=port)
+        for query in it:
+            start = perf_counter()
+            await client.search(query, size=10)
+            latencies.append(perf_counter() - start)
+        await client.close()
+
+    start = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = perf_counter() - start
+    client = SearchClient(port=port)
+    stats = await client.stats()
+    await client.close()
+    return len(stream) / elapsed, sorted(latencies), stats
+
+
+def run(n_docs: int = 5000, n_queries: int = 2000, concurrency: int = 32):
+
+    # Load test of `python main.py serve` on localhost: thread vs. process workers
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = Index(tokenizer=StandardTokenizer()).build_docs(enumerate(synthetic_docs(n_docs), 1), compact=True)
+        write_segment(index, tmp)
+        stream = queries(n_queries, random.Random(2))
+
+        print("{} queries, {} connections, {} docs".format(n_queries, concurrency, n_docs))
+        print("{:<10} {:>8} {:>9} {:>9} {:>9} {:>10} {:>10}".format(
+            "workers", "qps", "p50 ms", "p99 ms", "srv p99", "coalesced", "offloaded"))
+        for name, flags in [("threads", []), ("processes", ["--processes"])]:
+            port = free_port()
+            server = subprocess.Popen([sys.executable, MAIN, "serve", tmp, "--port", str(port)] + flags,
+                                      stdout=subprocess.PIPE, text=True)
+            try:
+                server.stdout.readline()  # listening on ..
+                qps, latencies, stats = asyncio.run(load(port, stream, concurrency))
+            finally:
+                server.terminate()
+                server.wait()
+            at = lambda q: 1000 * latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+            print("{:<10} {:>8.0f} {:>9.2f} {:>9.2f} {:>9.2f} {:>10} {:>10}".format(
+                name, qps, at(0.5), at(0.99), stats["latency_ms"]["/search"]["p99"], stats["coalesced"],
+                stats["offloaded"]))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.server [n_docs]
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
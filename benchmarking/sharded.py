@@ -0,0 +1,67 @@
+import random
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from os import cpu_count
+from time import perf_counter
+
+from benchmarking.corpus import synthetic_docs, write_corpus
+from indexer.index import Index
+from preprocessing.tokenize.stand import StandardTokenizer
+from search.model.boolean import BooleanSearch, PhraseSearch
+from search.query.query import BoolQuery, PhraseQuery, RankedQuery
+from service.sharded import ShardedSearch
+
+
+def query_stream(n: int, rnd: random.Random) -> list:
+    vocab = ["w{}".format(i) for i in range(300)]
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    stream = list()
+    for _ in range(n):
+        a, b, c = rnd.choices(vocab, weights, k=3)
+        stream.append(rnd.choice([BoolQuery([a, b]), BoolQuery(should=[a, b, c]), BoolQuery(must=[a], must_not=[b]),
+                                  PhraseQuery([a, b], slop=2), RankedQuery([a, b, c], 10)]))
+    return stream
+
+
+def measure(search, stream: list, concurrency: int) -> tuple:
+
+    # (qps, p99 ms) of the stream sent by `concurrency` client threads
+
+    def timed(sq):
+        start = perf_counter()
+        search(sq)
+        return perf_counter() - start
+
+    start = perf_counter()
+    with ThreadPoolExecutor(concurrency) as clients:
+        latencies = sorted(clients.map(timed, stream))
+    return len(stream) / (perf_counter() - start), 1000 * latencies[int(0.99 * (len(latencies) - 1))]
+
+
+def run(n_docs: int = 20000, n_queries: int = 500, concurrency: int = 8, shard_counts=(1, 2, 4, 8)):
+
+    # Scatter-gather QPS / p99 latency by shard count vs. a single in process index (shards == 0,
+    # no ranked queries). Shards only run in parallel up to the num of cpus
+
+    stream = query_stream(n_queries, random.Random(4))
+    with tempfile.TemporaryDirectory() as tmp:
+        write_corpus(tmp, synthetic_docs(n_docs))
+        print("{} docs, {} queries, {} client threads, {} cpus".format(n_docs, n_queries, concurrency, cpu_count()))
+        print("{:>7} {:>10} {:>10}".format("shards", "qps", "p99 ms"))
+
+        index = Index(tokenizer=StandardTokenizer()).build(tmp, compact=True)
+        boolean, phrase = BooleanSearch(index), PhraseSearch(index)
+        single = [sq for sq in stream if not isinstance(sq, RankedQuery)]
+        qps, p99 = measure(lambda sq: (phrase if isinstance(sq, PhraseQuery) else boolean).search(sq), single,
+                           concurrency)
+        print("{:>7} {:>10.0f} {:>10.2f}   (single process, boolean / phrase queries only)".format(0, qps, p99))
+
+        for shards in shard_counts:
+            with ShardedSearch(tmp, shards) as sharded:
+                print("{:>7} {:>10.0f} {:>10.2f}".format(shards, *measure(sharded.search, stream, concurrency)))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.sharded [n_docs]
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,42 @@
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from os import path
+
+from benchmarking.corpus import synthetic_docs, write_corpus
+from indexer.index import Index
+from indexer.spimi import SPIMIIndexer, peak_rss
+from preprocessing.tokenize.stand import StandardTokenizer
+
+
+def _in_memory(docs_dir: str) -> dict:
+    Index(tokenizer=StandardTokenizer()).build(docs_dir, compact=False)
+    return {"blocks": 1, "index_time": float('nan'), "merge_time": 0.0, "process_peak_rss": peak_rss()}
+
+
+def _spimi(docs_dir: str, index_dir: str, budget: int) -> dict:
+    return SPIMIIndexer(StandardTokenizer(), budget=budget).build(docs_dir, index_dir)
+
+
+def run(n_docs: int, budgets):
+
+    # Peak RSS and merge time of SPIMI builds under different RAM budgets,
+    # every build runs in a fresh process so peak RSS is not inherited from the previous one
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs_dir = write_corpus(path.join(tmp, "docs"), synthetic_docs(n_docs))
+        print("{:>12} {:>7} {:>11} {:>11} {:>13}".format("budget MB", "blocks", "index sec", "merge sec", "peak RSS MB"))
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            stats = pool.submit(_in_memory, docs_dir).result()
+        print("{:>12} {:>7} {:>11} {:>11.3f} {:>13.1f}".format("in-memory", stats["blocks"], "-",
+                                                                stats["merge_time"], stats["process_peak_rss"] / 2 ** 20))
+        for i, budget in enumerate(budgets):
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                stats = pool.submit(_spimi, docs_dir, path.join(tmp, "index{}".format(i)), budget).result()
+            print("{:>12.1f} {:>7} {:>11.3f} {:>11.3f} {:>13.1f}".format(
+                budget / 2 ** 20, stats["blocks"], stats["index_time"], stats["merge_time"], stats["process_peak_rss"] / 2 ** 20))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.spimi [n_docs]
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000, [2 ** 20, 4 * 2 ** 20, 16 * 2 ** 20, 64 * 2 ** 20])
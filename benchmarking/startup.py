@@ -0,0 +1,42 @@
+import sys
+import tempfile
+from os import path
+from time import perf_counter
+
+from benchmarking.corpus import synthetic_docs, write_corpus
+from indexer.disk import DiskIndex
+from indexer.index import Index
+from preprocessing.tokenize.stand import StandardTokenizer
+from search.model.boolean import BooleanSearch
+from search.query.query import BoolQuery
+
+
+def run(sizes):
+
+    # Compares re-building the index on startup with opening the memory mapped on-disk index
+
+    indexer = Index(tokenizer=StandardTokenizer())
+    print("{:>8} {:>12} {:>12} {:>14}".format("docs", "rebuild sec", "open sec", "first query ms"))
+    for n_docs in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            docs_dir = write_corpus(path.join(tmp, "docs"), synthetic_docs(n_docs))
+            index_dir = path.join(tmp, "index")
+            indexer.build_to_disk(docs_dir, index_dir)
+
+            start = perf_counter()
+            indexer.build(docs_dir, compact=True)
+            rebuild = perf_counter() - start
+
+            start = perf_counter()
+            disk = DiskIndex(index_dir)
+            opened = perf_counter() - start
+            start = perf_counter()
+            BooleanSearch(disk).search(BoolQuery(["w1", "w20"]))
+            query = perf_counter() - start
+            disk.close()
+            print("{:>8} {:>12.3f} {:>12.5f} {:>14.2f}".format(n_docs, rebuild, opened, query * 1000))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.startup [sizes...]
+    run([int(n) for n in sys.argv[1:]] or [1000, 4000, 16000])
@@ -0,0 +1,52 @@
+import random
+import sys
+from timeit import timeit
+
+from nltk.stem.porter import PorterStemmer as NLTKPorterStemmer
+
+from preprocessing.stem.porterstemmer import PorterStemmer
+
+SUFFIXES = ["", "s", "es", "ies", "ed", "ing", "ly", "ation", "ational", "ization", "ness", "ful", "ment",
+            "ence", "able", "ive", "ous", "ism", "iti", "al", "er", "ize"]
+
+
+def token_stream(n_tokens: int, vocab_size: int, seed: int = 17) -> list:
+
+    # English-like words (stem + suffix) drawn with zipf (1 / rank) frequencies, as in real text
+
+    rnd = random.Random(seed)
+    letters = "abcdefghilmnoprstuy"
+    vocab = ["".join(rnd.choice(letters) for _ in range(rnd.randint(2, 7))) + rnd.choice(SUFFIXES)
+             for _ in range(vocab_size)]
+    weights = [1 / rank for rank in range(1, vocab_size + 1)]
+    return rnd.choices(vocab, weights, k=n_tokens)
+
+
+def run(n_tokens: int = 200000, vocab_size: int = 20000, repeat: int = 3):
+
+    # Tokens per second of NLTK's PorterStemmer vs. the native stemmer, with and without the LRU cache
+
+    tokens = token_stream(n_tokens, vocab_size)
+    nltk = NLTKPorterStemmer()
+    assert all(nltk.stem(tok) == PorterStemmer().stem(tok) for tok in set(tokens))
+
+    def stem_all(make_stemmer):
+        stemmer = make_stemmer()
+        return [stemmer.stem(tok) for tok in tokens]
+
+    cases = [("nltk (new stemmer per call)", lambda: [NLTKPorterStemmer().stem(tok) for tok in tokens]),
+             ("nltk", lambda: [nltk.stem(tok) for tok in tokens]),
+             ("native, no cache", lambda: stem_all(lambda: PorterStemmer(cache_size=0))),
+             ("native, lru cache", lambda: stem_all(PorterStemmer))]
+    print("{} tokens, {} distinct".format(n_tokens, len(set(tokens))))
+    print("{:<28} {:>12} {:>9}".format("stemmer", "tokens/s", "speedup"))
+    base = None
+    for name, fn in cases:
+        t = timeit(fn, number=repeat) / repeat
+        base = base or t
+        print("{:<28} {:>12.0f} {:>9.1f}".format(name, n_tokens / t, base / t))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.stemmer [n_tokens] [vocab_size]
+    run(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,28 @@
+import sys
+from time import perf_counter
+
+from benchmarking.corpus import synthetic_docs
+from indexer.index import Index
+from preprocessing.tokenize.stand import StandardTokenizer
+
+
+def run(sizes, doc_len: int = 200):
+
+    # Index build throughput over synthetic corpora of growing size,
+    # a linear builder keeps docs/sec roughly constant as the corpus grows
+
+    indexer = Index(tokenizer=StandardTokenizer())
+    print("{:>8} {:>8} {:>10} {:>12} {:>10}".format("docs", "layout", "sec", "tokens/sec", "docs/sec"))
+    for n_docs in sizes:
+        docs = list(enumerate(synthetic_docs(n_docs, doc_len), 1))
+        for name, compact in [("objects", False), ("compact", True)]:
+            start = perf_counter()
+            indexer.build_docs(docs, compact)
+            sec = perf_counter() - start
+            print("{:>8} {:>8} {:>10.3f} {:>12,.0f} {:>10,.0f}".format(
+                n_docs, name, sec, n_docs * doc_len / sec, n_docs / sec))
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.throughput [sizes...]
+    run([int(n) for n in sys.argv[1:]] or [500, 1000, 2000, 4000, 8000])
@@ -0,0 +1,67 @@
+import os
+import random
+import sys
+from timeit import timeit
+
+from preprocessing.tokenize.stand import StandardTokenizer
+from preprocessing.tokenize.tokenizer import Tokenizer
+
+
+def legacy_tokenize(tokenizer: Tokenizer, s: str, stops: set = None) -> list:
+
+    # Char by char algorithm, the implementation Tokenizer.tokenize replaced (reference output)
+
+    if stops is None:
+        stops = set()
+
+    s = s.strip()
+    tokens, chars, pos = list(), list(), 1
+
+    for i in range(len(s)):
+        if s[i] in tokenizer._word_divider:
+            if chars:
+                token, chars = "".join(chars), []
+                if token not in stops:
+                    tokens.append((token, pos))
+                pos += 1
+        elif s[i] in tokenizer.PUNCT_MARKS:
+            if s[i] in tokenizer._meaningful_puncts and i != len(s) - 1 and (s[i + 1].isalpha() or s[i + 1].isnumeric()):
+                chars.append(s[i])
+        else: chars.append(s[i])
+
+    if chars: tokens.append(("".join(chars), pos))
+    return tokens
+
+
+def sample_text() -> str:
+    fp = os.path.join(os.path.dirname(__file__), "..", "tests", "files", "tokenize", "before")
+    with open(fp, 'r') as f:
+        return f.read()
+
+
+def run(size_mb: float = 2.0, repeat: int = 3):
+
+    # Tokenization throughput (MB/s) of the char loop vs. the compiled engine, on the test sample
+    # repeated up to size_mb and on random text rich in punctuation
+
+    rnd = random.Random(5)
+    sample = sample_text()
+    alphabet = "abcdefghij XYZ0123.,'_-$:;()!?\n\t"
+    texts = [("sample", sample * max(1, int(size_mb * 2 ** 20 / len(sample)))),
+             ("random", "".join(rnd.choice(alphabet) for _ in range(int(size_mb * 2 ** 20))))]
+
+    tokenizer = StandardTokenizer()
+    print("{:<8} {:<6} {:>10} {:>10} {:>9}".format("text", "unit", "old MB/s", "new MB/s", "speedup"))
+    for name, text in texts:
+        lines = text.splitlines(keepends=True)
+        # single lines (call overhead dominates) and ~100 lines documents (as Index.analyze tokenizes docs)
+        for unit, chunks in [("line", lines), ("doc", ["".join(lines[i:i + 100]) for i in range(0, len(lines), 100)])]:
+            assert all(legacy_tokenize(tokenizer, c.lower()) == tokenizer.tokenize(c) for c in chunks)
+            mb = len(text) / 2 ** 20
+            t_old = timeit(lambda: [legacy_tokenize(tokenizer, c.lower()) for c in chunks], number=repeat) / repeat
+            t_new = timeit(lambda: [tokenizer.tokenize(c) for c in chunks], number=repeat) / repeat
+            print("{:<8} {:<6} {:>10.2f} {:>10.2f} {:>9.1f}".format(name, unit, mb / t_old, mb / t_new, t_old / t_new))
+
+if __name__ == '__main__':
+    # python -m benchmarking.tokenize [size_mb]
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 2.0)
@@ -0,0 +1,52 @@
+import random
+import sys
+from time import perf_counter
+
+from benchmarking.corpus import synthetic_docs
+from indexer.index import Index
+from preprocessing.tokenize.stand import StandardTokenizer
+from search.model.ranked import RankedSearch, WANDSearch, BM25
+from search.query.query import RankedQuery
+
+
+def run(n_docs: int, ks, n_queries: int = 50):
+
+    # Exhaustive vs WAND latency on multi-term queries mixing common (zipf head) and random terms,
+    # also checks both return the same top-k. Upper bounds of the query terms are computed (and timed)
+    # before the runs. WAND pays off for small k only: with k ~ 100 the threshold stays low, few docs are
+    # skipped and the pivot bookkeeping makes it slower than exhaustive scoring (speedup < 1)
+
+    indexer = Index(tokenizer=StandardTokenizer())
+    index = indexer.build_docs(enumerate(synthetic_docs(n_docs), 1), compact=True)
+    rnd = random.Random(5)
+    vocab = sorted(index, key=lambda term: -index[term].df)
+    queries = [rnd.sample(vocab[:20], 2) + [rnd.choice(vocab) for _ in range(2)] for _ in range(n_queries)]
+
+    wand = WANDSearch(index, BM25(), indexer.stats)
+    start = perf_counter()
+    for term in set(term for terms in queries for term in terms):
+        wand.upper_bound(term)
+    print("upper bounds: {:.2f}s".format(perf_counter() - start))
+    exhaustive = RankedSearch(index, BM25(), indexer.stats)
+
+    print("{:>6} {:>14} {:>10} {:>10} {:>12}".format("k", "exhaustive ms", "wand ms", "speedup", "scored docs"))
+    for k in ks:
+        times, wand.scored = [0.0, 0.0], 0
+        for terms in queries:
+            sq = RankedQuery(terms, k)
+            start = perf_counter()
+            expected = exhaustive.search(sq)
+            times[0] += perf_counter() - start
+            start = perf_counter()
+            result = wand.search(sq)
+            times[1] += perf_counter() - start
+            assert result == expected, terms
+        print("{:>6} {:>14.2f} {:>10.2f} {:>10.2f} {:>12.0f}".format(
+            k, 1000 * times[0] / n_queries, 1000 * times[1] / n_queries, times[0] / times[1],
+            wand.scored / n_queries))
+    print("speedup < 1: WAND slower than exhaustive scoring (large k, little pruning)")
+
+
+if __name__ == '__main__':
+    # python -m benchmarking.wand [n_docs]
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000, [1, 10, 100])
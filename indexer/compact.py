@@ -0,0 +1,213 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+
+from indexer.terms import TermDictionary
+
+
+class CompactPosting:
+
+    # Read-only view of a single posting inside a CompactIndex,
+    # Exposes the same id/tf/pos_list interface as indexer.index.Posting without owning any data
+
+    __slots__ = ('_store', '_i')
+
+    def __init__(self, store, i: int):
+        self._store = store
+        self._i = i
+
+    @property
+    def id(self) -> int:
+        return self._store.doc_ids[self._i]
+
+    @property
+    def tf(self) -> int:
+        return self._store.tfs[self._i]
+
+    @property
+    def pos_list(self):
+        offs = self._store.pos_offsets
+        return self._store.positions[offs[self._i]:offs[self._i + 1]]
+
+    def __repr__(self):
+        return "{},{}: [{}]".format(self.id, self.tf, ','.join(map(str, self.pos_list)))
+
+    def __str__(self):
+        return "\t{}".format(self.__repr__())
+
+
+class CompactPostingList(Sequence):
+
+    # Sequence view over the postings range [start, end) of a term,
+    # Supports len/indexing/slicing so BooleanSearch & PhraseSearch merges work on it unchanged
+
+    __slots__ = ('_store', '_start', '_end')
+
+    def __init__(self, store, start: int, end: int):
+        self._store = store
+        self._start = start
+        self._end = end
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("posting index out of range")
+        return CompactPosting(self._store, self._start + i)
+
+    def ids(self):
+        return self._store.doc_ids[self._start:self._end]
+
+    def seek(self, doc_id: int, lo: int = 0) -> int:
+        # Index of first posting at/after lo with id >= doc_id, binary search on the doc ids buffer
+        return bisect_left(self._store.doc_ids, doc_id, self._start + lo, self._end) - self._start
+
+
+class CompactTerm:
+
+    # Read-only view of a Term inside a CompactIndex (df + posting list)
+
+    __slots__ = ('_store', '_t')
+
+    def __init__(self, store, t: int):
+        self._store = store
+        self._t = t
+
+    @property
+    def df(self) -> int:
+        offs = self._store.term_offsets
+        return offs[self._t + 1] - offs[self._t]
+
+    @property
+    def pst_list(self) -> CompactPostingList:
+        offs = self._store.term_offsets
+        return CompactPostingList(self._store, offs[self._t], offs[self._t + 1])
+
+
+class CompactIndex(Mapping):
+
+    # Array-backed inverted index, terms are mapped to an ordinal and all postings live in
+    # contiguous uint32 buffers addressed through offset tables:
+
+    # term_offsets[t] .. term_offsets[t + 1]  >> postings range of term t
+    # doc_ids[p], tfs[p]                      >> document id and term frequency of posting p
+    # pos_offsets[p] .. pos_offsets[p + 1]    >> positions range of posting p
+
+    # Behaves as a read-only dict of term -> CompactTerm, so search models can consume it directly
+    # terms maps term >> ordinal (a sorted TermDictionary, in memory or memory mapped on disk)
+
+    TYPECODE = 'I'  # uint32
+
+    def __init__(self, terms, term_offsets, doc_ids, tfs, pos_offsets, positions):
+        self._terms = terms
+        self.term_offsets = term_offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.pos_offsets = pos_offsets
+        self.positions = positions
+
+    def __getitem__(self, term) -> CompactTerm:
+        return CompactTerm(self, self._terms[term])
+
+    def __contains__(self, term):
+        return term in self._terms
+
+    def __iter__(self):
+        return iter(self._terms)
+
+    def __len__(self):
+        return len(self._terms)
+
+    @property
+    def terms(self):
+        return self._terms
+
+    def term_arrays(self, term) -> tuple:
+
+        # Raw (doc_ids, tfs, positions) slices of a term
+
+        t = self._terms[term]
+        start, end = self.term_offsets[t], self.term_offsets[t + 1]
+        return self.doc_ids[start:end], self.tfs[start:end], \
+            self.positions[self.pos_offsets[start]:self.pos_offsets[end]]
+
+    def nbytes(self) -> int:
+        # Size of the posting buffers (excluding the term dictionary)
+        return sum(buf.itemsize * len(buf) for buf in
+                   [self.term_offsets, self.doc_ids, self.tfs, self.pos_offsets, self.positions])
+
+    @classmethod
+    def from_index(cls, index: dict) -> 'CompactIndex':
+
+        # Packs an existing dict of Term/Posting objects into the compact layout
+
+        builder = CompactIndexBuilder()
+        for term_name, term in index.items():
+            for pst in term.pst_list:
+                builder.add_posting(term_name, pst.id, pst.pos_list)
+        return builder.build()
+
+
+class CompactIndexBuilder:
+
+    # Accumulates (term, doc, position) triples directly into per-term arrays,
+    # Documents must be added in increasing id order, so appending a posting is O(1)
+
+    def __init__(self):
+        self._acc = dict()  # term >> (doc_ids, tfs, positions)
+
+    def add(self, term: str, doc_id: int, pos: int):
+        docs, tfs, positions = self._term_arrays(term)
+        if docs and docs[-1] == doc_id:
+            tfs[-1] += 1
+        else:
+            docs.append(doc_id)
+            tfs.append(1)
+        positions.append(pos)
+
+    def add_posting(self, term: str, doc_id: int, pos_list):
+        docs, tfs, positions = self._term_arrays(term)
+        docs.append(doc_id)
+        tfs.append(len(pos_list))
+        positions.extend(pos_list)
+
+    def extend(self, term: str, doc_ids, tfs, positions):
+        # Appends whole postings arrays of a term (ids must be larger than the ones already added)
+        docs, term_tfs, term_positions = self._term_arrays(term)
+        docs.extend(doc_ids)
+        term_tfs.extend(tfs)
+        term_positions.extend(positions)
+
+    def add_doc(self, doc_id: int, terms: dict):
+        # Adds a whole document given as term >> positions map
+        for term, pos_list in terms.items():
+            self.add_posting(term, doc_id, pos_list)
+
+    def _term_arrays(self, term: str):
+        acc = self._acc.get(term)
+        if acc is None:
+            tc = CompactIndex.TYPECODE
+            acc = self._acc[term] = (array(tc), array(tc), array(tc))
+        return acc
+
+    def build(self) -> CompactIndex:
+
+        # Concatenates per-term arrays in sorted term order and computes the offset tables
+
+        tc = CompactIndex.TYPECODE
+        terms, term_offsets = sorted(self._acc), array(tc, [0])
+        doc_ids, tfs, pos_offsets, positions = array(tc), array(tc), array(tc, [0]), array(tc)
+        for term in terms:
+            docs, term_tfs, term_positions = self._acc.pop(term)
+            doc_ids.extend(docs)
+            tfs.extend(term_tfs)
+            positions.extend(term_positions)
+            for tf in term_tfs:
+                pos_offsets.append(pos_offsets[-1] + tf)
+            term_offsets.append(len(doc_ids))
+        return CompactIndex(TermDictionary.from_terms(terms), term_offsets, doc_ids, tfs, pos_offsets, positions)
@@ -0,0 +1,269 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+
+from indexer.terms import TermDictionary
+
+
+class VByteCodec:
+
+    # Variable byte encoding (IIR ch. 5.3), 7 payload bits per byte,
+    # the high bit marks the last byte of a number
+
+    name = "vbyte"
+
+    @staticmethod
+    def encode(values) -> bytes:
+        out = bytearray()
+        for v in values:
+            while v >= 128:
+                out.append(v & 127)
+                v >>= 7
+            out.append(v | 128)
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, buf, n: int) -> list:
+        return cls.read(buf, n)[0]
+
+    @staticmethod
+    def read(buf, n: int, offset: int = 0) -> tuple:
+
+        # Decodes n numbers starting at offset, returns them with the offset right after the last one
+
+        res, v, shift, i = list(), 0, 0, offset
+        while len(res) < n:
+            byte = buf[i]
+            i += 1
+            if byte < 128:
+                v |= byte << shift
+                shift += 7
+            else:
+                res.append(v | ((byte & 127) << shift))
+                v, shift = 0, 0
+        return res, i
+
+
+class BitPackCodec:
+
+    # Packs a block of numbers with a fixed bit width (the width of the largest one),
+    # layout: 1 byte width + ceil(n * width / 8) bytes, little endian
+
+    name = "bitpack"
+
+    @staticmethod
+    def encode(values) -> bytes:
+        width = max(values, default=0).bit_length()
+        acc = 0
+        for i, v in enumerate(values):
+            acc |= v << (i * width)
+        return bytes([width]) + acc.to_bytes((len(values) * width + 7) // 8, 'little')
+
+    @staticmethod
+    def decode(buf, n: int) -> list:
+        width = buf[0]
+        if not width:
+            return [0] * n
+        acc, mask = int.from_bytes(buf[1:1 + (n * width + 7) // 8], 'little'), (1 << width) - 1
+        return [(acc >> (i * width)) & mask for i in range(n)]
+
+
+CODECS = {codec.name: codec for codec in [VByteCodec, BitPackCodec]}
+
+
+def gaps(values) -> list:
+    # Sorted numbers >> differences between neighbours (first one kept as is)
+    res, prev = list(), 0
+    for v in values:
+        res.append(v - prev)
+        prev = v
+    return res
+
+
+def ungaps(deltas, base: int = 0) -> list:
+    res = list()
+    for d in deltas:
+        base += d
+        res.append(base)
+    return res
+
+
+class CompressedPosting:
+
+    # Posting view inside a CompressedPostingList, positions are decoded only when asked for
+
+    __slots__ = ('_pl', '_i')
+
+    def __init__(self, pl, i: int):
+        self._pl = pl
+        self._i = i
+
+    @property
+    def id(self) -> int:
+        return self._pl.block(self._i)[0][self._i % self._pl.BLOCK]
+
+    @property
+    def tf(self) -> int:
+        return self._pl.block(self._i)[1][self._i % self._pl.BLOCK]
+
+    @property
+    def pos_list(self) -> list:
+        return self._pl.positions(self._i)
+
+    def __repr__(self):
+        return "{},{}: [{}]".format(self.id, self.tf, ','.join(map(str, self.pos_list)))
+
+    def __str__(self):
+        return "\t{}".format(self.__repr__())
+
+
+class CompressedPostingList(Sequence):
+
+    # Posting list stored as one compressed blob, split into blocks of BLOCK postings:
+
+    # header      >> vbyte(df, n_blocks)
+    # skip table  >> vbyte(last doc id gap, doc block bytes, positions block bytes) per block
+    # blocks      >> codec(doc id gaps + tfs), codec(position gaps) per block
+
+    # Only the skip table is decoded upfront, a block is decoded when one of it postings is accessed
+    # (the last decoded block is cached) so linear merges never materialize the whole list
+
+    BLOCK = 128
+
+    def __init__(self, blob, codec):
+        self._blob = memoryview(blob)
+        self._codec = codec
+        (self._len, n_blocks), offset = VByteCodec.read(self._blob, 2)
+        skips, offset = VByteCodec.read(self._blob, 3 * n_blocks, offset)
+
+        self.last_ids, self._offsets = ungaps(skips[0::3]), list()
+        for doc_len, pos_len in zip(skips[1::3], skips[2::3]):
+            self._offsets.append((offset, offset + doc_len, offset + doc_len + pos_len))
+            offset += doc_len + pos_len
+        self._cached, self._cached_pos = (None, None), (None, None)
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("posting index out of range")
+        return CompressedPosting(self, i)
+
+    def block(self, i: int) -> tuple:
+
+        # Returns decoded (ids, tfs) of the block holding posting i
+
+        b = i // self.BLOCK
+        if self._cached[0] != b:
+            start, pos_start, _ = self._offsets[b]
+            n = min(self.BLOCK, self._len - b * self.BLOCK)
+            values = self._codec.decode(self._blob[start:pos_start], 2 * n)
+            base = self.last_ids[b - 1] if b else 0
+            self._cached = (b, (ungaps(values[:n], base), values[n:]))
+        return self._cached[1]
+
+    def positions(self, i: int) -> list:
+        b = i // self.BLOCK
+        if self._cached_pos[0] != b:
+            _, start, end = self._offsets[b]
+            tfs = self.block(i)[1]
+            n = sum(tfs)
+            deltas, pos_lists, k = self._codec.decode(self._blob[start:end], n) if n else [], list(), 0
+            for tf in tfs:
+                pos_lists.append(ungaps(deltas[k:k + tf]))
+                k += tf
+            self._cached_pos = (b, pos_lists)
+        return self._cached_pos[1][i % self.BLOCK]
+
+    def seek(self, doc_id: int, lo: int = 0) -> int:
+
+        # Index of first posting at/after lo with id >= doc_id,
+        # skips whole blocks through the skip table and decodes only the block which may hold doc_id
+
+        b = bisect_left(self.last_ids, doc_id, lo // self.BLOCK)
+        if b == len(self.last_ids):
+            return len(self)
+        start = b * self.BLOCK
+        return start + bisect_left(self.block(start)[0], doc_id, max(lo - start, 0))
+
+    def ids(self):
+        # Iterates doc ids block by block
+        for b in range(len(self._offsets)):
+            yield from self.block(b * self.BLOCK)[0]
+
+    @classmethod
+    def encode(cls, postings, codec) -> bytes:
+
+        # postings: sorted list of (doc id, positions)
+
+        skips, blocks, prev = list(), list(), 0
+        for b in range(0, len(postings), cls.BLOCK):
+            chunk = postings[b:b + cls.BLOCK]
+            ids = [doc_id for doc_id, _ in chunk]
+            docs = codec.encode(gaps([prev] + ids)[1:] + [len(pos_list) for _, pos_list in chunk])
+            positions = codec.encode([d for _, pos_list in chunk for d in gaps(pos_list)])
+            skips += [ids[-1] - prev, len(docs), len(positions)]
+            blocks += [docs, positions]
+            prev = ids[-1]
+        return VByteCodec.encode([len(postings), len(blocks) // 2]) + VByteCodec.encode(skips) + b"".join(blocks)
+
+
+class CompressedTerm:
+
+    __slots__ = ('pst_list',)
+
+    def __init__(self, pst_list: CompressedPostingList):
+        self.pst_list = pst_list
+
+    @property
+    def df(self) -> int:
+        return len(self.pst_list)
+
+
+class CompressedIndex(Mapping):
+
+    # Inverted index whose posting lists are compressed blobs concatenated in one buffer,
+    # offsets[t] .. offsets[t + 1] is the blob of term ordinal t.
+    # terms maps term >> ordinal (a sorted TermDictionary), data may be bytes or a mmap
+
+    def __init__(self, terms, offsets, data, codec):
+        self._terms = terms
+        self.offsets = offsets
+        self.data = data
+        self.codec = codec
+
+    def __getitem__(self, term) -> CompressedTerm:
+        t = self._terms[term]
+        return CompressedTerm(CompressedPostingList(self.data[self.offsets[t]:self.offsets[t + 1]], self.codec))
+
+    def __contains__(self, term):
+        return term in self._terms
+
+    def __iter__(self):
+        return iter(self._terms)
+
+    def __len__(self):
+        return len(self._terms)
+
+    @property
+    def terms(self):
+        return self._terms
+
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.itemsize * len(self.offsets)
+
+    @classmethod
+    def from_index(cls, index, codec=VByteCodec) -> 'CompressedIndex':
+
+        # Compresses any index (dict of Term, CompactIndex, DiskIndex..) in sorted term order
+
+        terms, offsets, data = sorted(index), array('Q', [0]), bytearray()
+        for term in terms:
+            data += CompressedPostingList.encode([(p.id, p.pos_list) for p in index[term].pst_list], codec)
+            offsets.append(len(data))
+        return cls(TermDictionary.from_terms(terms), offsets, bytes(data), codec)
@@ -0,0 +1,360 @@
+import json
+import mmap
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from heapq import merge
+from os import makedirs, path
+
+from indexer.compact import CompactIndex
+from indexer.compression import CODECS, CompressedIndex, CompressedPostingList
+from indexer.terms import TermDictionary
+
+# On disk layout, an index directory holds a SEGMENTS manifest and one sub directory per segment.
+# Each segment is an immutable CompactIndex whose buffers are stored as raw uint32 files:
+
+# terms.dat  >> utf-8 bytes of all terms, sorted
+# terms.off  >> T + 1 offsets into terms.dat
+# terms.pst  >> T + 1 offsets into the postings files (CompactIndex.term_offsets)
+# docs.dat, tfs.dat  >> doc id and term frequency per posting
+# pos.off, pos.dat   >> P + 1 offsets into positions, positions
+
+# A compressed segment (meta "codec" set) keeps the term files, but postings are CompressedIndex blobs:
+# cmp.off    >> T + 1 uint64 byte offsets into cmp.dat
+# cmp.dat    >> concatenated CompressedPostingList blobs
+
+MANIFEST = "SEGMENTS"
+META = "meta.json"
+TERMS, TERM_OFFSETS, POSTING_OFFSETS = "terms.dat", "terms.off", "terms.pst"
+DOCS, TFS, POS_OFFSETS, POSITIONS = "docs.dat", "tfs.dat", "pos.off", "pos.dat"
+BLOB_OFFSETS, BLOBS = "cmp.off", "cmp.dat"
+
+
+class SegmentWriter:
+
+    # Streams terms (in sorted order) and their postings into a new segment directory,
+    # Only the current term is held in memory so segments can be larger than RAM
+    # codec (name from indexer.compression.CODECS) writes compressed posting blobs instead of raw arrays
+
+    def __init__(self, seg_path: str, codec: str = None):
+        makedirs(seg_path, exist_ok=True)
+        self.seg_path = seg_path
+        self.codec = codec
+        names = [TERMS, TERM_OFFSETS] + ([BLOB_OFFSETS, BLOBS] if codec else
+                                         [POSTING_OFFSETS, DOCS, TFS, POS_OFFSETS, POSITIONS])
+        self._files = {name: open(path.join(seg_path, name), 'wb') for name in names}
+        self._terms_len, self._postings, self._positions, self._blobs_len = 0, 0, 0, 0
+        self._last_term, self.n_terms, self.min_doc, self.max_doc = None, 0, None, 0
+        for name in [TERM_OFFSETS] + ([] if codec else [POSTING_OFFSETS, POS_OFFSETS]):
+            self._write(name, [0])
+        if codec:
+            array('Q', [0]).tofile(self._files[BLOB_OFFSETS])
+
+    def add_term(self, term: str, postings):
+
+        # Appends a term and it postings given as (doc id, positions) in increasing doc id order
+
+        if self._last_term is not None and term <= self._last_term:
+            raise ValueError("terms must be added in sorted order: {!r} after {!r}".format(term, self._last_term))
+
+        postings = list(postings)
+        encoded = term.encode('utf-8')
+        self._files[TERMS].write(encoded)
+        self._terms_len += len(encoded)
+        self._write(TERM_OFFSETS, [self._terms_len])
+        if self.codec:
+            self._write_blob(postings)
+        else:
+            self._write_arrays(postings)
+
+        self._last_term = term
+        self.n_terms += 1
+        self._postings += len(postings)
+        if postings:
+            first, last = postings[0][0], postings[-1][0]
+            self.min_doc = first if self.min_doc is None else min(self.min_doc, first)
+            self.max_doc = max(self.max_doc, last)
+
+    def _write_arrays(self, postings: list):
+        tc = CompactIndex.TYPECODE
+        docs, tfs, pos_offsets, positions = array(tc), array(tc), array(tc), array(tc)
+        for doc_id, pos_list in postings:
+            docs.append(doc_id)
+            tfs.append(len(pos_list))
+            positions.extend(pos_list)
+            pos_offsets.append(self._positions + len(positions))
+        self._positions += len(positions)
+        self._write(POSTING_OFFSETS, [self._postings + len(docs)])
+        for name, buf in [(DOCS, docs), (TFS, tfs), (POS_OFFSETS, pos_offsets), (POSITIONS, positions)]:
+            buf.tofile(self._files[name])
+
+    def _write_blob(self, postings: list):
+        blob = CompressedPostingList.encode(postings, CODECS[self.codec])
+        self._files[BLOBS].write(blob)
+        self._blobs_len += len(blob)
+        self._positions += sum(len(pos_list) for _, pos_list in postings)
+        array('Q', [self._blobs_len]).tofile(self._files[BLOB_OFFSETS])
+
+    def add_index(self, index):
+        # Writes a whole in-memory index (dict of Term or CompactIndex)
+        for term in sorted(index):
+            self.add_term(term, ((p.id, p.pos_list) for p in index[term].pst_list))
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        with open(path.join(self.seg_path, META), 'w') as f:
+            json.dump({"terms": self.n_terms, "postings": self._postings, "positions": self._positions,
+                       "min_doc": self.min_doc, "max_doc": self.max_doc, "typecode": CompactIndex.TYPECODE,
+                       "byteorder": sys.byteorder, "codec": self.codec}, f)
+
+    def _write(self, name: str, values):
+        array(CompactIndex.TYPECODE, values).tofile(self._files[name])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MappedArray:
+
+    # Numeric array view over a memory mapped file,
+    # Slices are copied out as lists so no view outlives the mapping (which could not be closed otherwise)
+
+    __slots__ = ('_view',)
+
+    def __init__(self, view: memoryview):
+        self._view = view
+
+    @property
+    def itemsize(self) -> int:
+        return self._view.itemsize
+
+    def __len__(self):
+        return len(self._view)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._view[i].tolist()
+        return self._view[i]
+
+    def __iter__(self):
+        return iter(self._view.tolist())
+
+
+class MappedFiles:
+
+    # Owns the memory maps of a segment directory
+
+    def __init__(self, seg_path: str):
+        with open(path.join(seg_path, META)) as f:
+            self.meta = json.load(f)
+        if self.meta["byteorder"] != sys.byteorder or self.meta["typecode"] != CompactIndex.TYPECODE:
+            raise ValueError("segment {} was written on an incompatible platform".format(seg_path))
+        self.seg_path = seg_path
+        self._maps, self._views = list(), list()
+
+    def map(self, name: str, typecode: str = CompactIndex.TYPECODE):
+
+        # Maps a segment file, numeric files are exposed as MappedArray of typecode,
+        # typecode=None returns the raw mmap (slicing it yields bytes)
+
+        with open(path.join(self.seg_path, name), 'rb') as f:
+            if not path.getsize(f.name):
+                return MappedArray(memoryview(b'').cast(typecode)) if typecode else b''
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mm)
+        if not typecode:
+            return mm
+        view = memoryview(mm).cast(typecode)
+        self._views.append(view)
+        return MappedArray(view)
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        for mm in self._maps:
+            mm.close()
+        self._views, self._maps = list(), list()
+
+
+class DiskSegment(CompactIndex):
+
+    # A single memory mapped segment, postings are read lazily from the page cache
+    # through the CompactIndex views, terms are found by binary search over the sorted term file (TermDictionary)
+
+    def __init__(self, seg_path: str):
+        self.files = MappedFiles(seg_path)
+        self.meta = self.files.meta
+        terms = TermDictionary(self.files.map(TERMS, typecode=None), self.files.map(TERM_OFFSETS))
+        super().__init__(terms, *(self.files.map(name) for name in
+                                  [POSTING_OFFSETS, DOCS, TFS, POS_OFFSETS, POSITIONS]))
+
+    def term_at(self, t: int) -> str:
+        return self._terms.term_at(t)
+
+    def close(self):
+        self.files.close()
+
+
+class CompressedSegment(CompressedIndex):
+
+    # A memory mapped compressed segment, a term's blob is copied out of the map only when accessed
+
+    def __init__(self, seg_path: str):
+        self.files = MappedFiles(seg_path)
+        self.meta = self.files.meta
+        terms = TermDictionary(self.files.map(TERMS, typecode=None), self.files.map(TERM_OFFSETS))
+        super().__init__(terms, self.files.map(BLOB_OFFSETS, typecode='Q'), self.files.map(BLOBS, typecode=None),
+                         CODECS[self.meta["codec"]])
+
+    def term_at(self, t: int) -> str:
+        return self._terms.term_at(t)
+
+    def close(self):
+        self.files.close()
+
+
+def open_segment(seg_path: str):
+    with open(path.join(seg_path, META)) as f:
+        codec = json.load(f).get("codec")
+    return CompressedSegment(seg_path) if codec else DiskSegment(seg_path)
+
+
+class ChainedPostingList(Sequence):
+
+    # Concatenation of posting lists of consecutive segments (segments hold increasing doc id ranges)
+
+    def __init__(self, parts: list):
+        self._parts = parts
+        self._starts = [0]
+        for part in parts:
+            self._starts.append(self._starts[-1] + len(part))
+
+    def __len__(self):
+        return self._starts[-1]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("posting index out of range")
+        k = 0
+        while self._starts[k + 1] <= i:
+            k += 1
+        return self._parts[k][i - self._starts[k]]
+
+
+class ChainedTerm:
+
+    # A term which appears in several segments
+
+    __slots__ = ('_terms',)
+
+    def __init__(self, terms: list):
+        self._terms = terms
+
+    @property
+    def df(self) -> int:
+        return sum(t.df for t in self._terms)
+
+    @property
+    def pst_list(self) -> ChainedPostingList:
+        return ChainedPostingList([t.pst_list for t in self._terms])
+
+
+class DiskIndex(Mapping):
+
+    # Read-only view over all segments of an on-disk index directory,
+    # Opening is O(#segments): nothing but the manifest is read until postings are accessed
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self.segments = [open_segment(path.join(index_dir, name)) for name in read_manifest(index_dir)]
+
+    def __getitem__(self, term):
+        terms = [seg[term] for seg in self.segments if term in seg]
+        if not terms:
+            raise KeyError(term)
+        return terms[0] if len(terms) == 1 else ChainedTerm(terms)
+
+    def __contains__(self, term):
+        return any(term in seg for seg in self.segments)
+
+    def __iter__(self):
+        last = None
+        for term in merge(*self.segments):
+            if term != last:
+                yield term
+            last = term
+
+    def __len__(self):
+        if len(self.segments) == 1:
+            return len(self.segments[0])
+        return sum(1 for _ in self)
+
+    def close(self):
+        for seg in self.segments:
+            seg.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_manifest(index_dir: str) -> list:
+    manifest = path.join(index_dir, MANIFEST)
+    if not path.exists(manifest):
+        return []
+    with open(manifest) as f:
+        return json.load(f)["segments"]
+
+
+def write_manifest(index_dir: str, segments: list):
+    makedirs(index_dir, exist_ok=True)
+    with open(path.join(index_dir, MANIFEST), 'w') as f:
+        json.dump({"segments": segments}, f)
+
+
+def new_segment_path(index_dir: str) -> str:
+    return path.join(index_dir, "seg_{:05d}".format(len(read_manifest(index_dir))))
+
+
+def commit_segment(index_dir: str, seg_path: str):
+
+    # Publishes a fully written segment, doc ids of a new segment must follow the previous ones
+
+    segments = read_manifest(index_dir)
+    with open(path.join(seg_path, META)) as f:
+        min_doc = json.load(f)["min_doc"]
+    if min_doc is not None and min_doc < next_doc_id(index_dir):
+        raise ValueError("segment {} overlaps doc ids of existing segments".format(seg_path))
+    write_manifest(index_dir, segments + [path.basename(seg_path)])
+
+
+def next_doc_id(index_dir: str) -> int:
+
+    # First free doc id after all committed segments (any of them may be empty, max_doc 0)
+
+    max_doc = 0
+    for segment in read_manifest(index_dir):
+        with open(path.join(index_dir, segment, META)) as f:
+            max_doc = max(max_doc, json.load(f)["max_doc"])
+    return max_doc + 1
+
+
+def write_segment(index, index_dir: str, codec: str = None) -> str:
+
+    # Writes an in-memory index (dict of Term or CompactIndex) as a new segment of index_dir
+
+    seg_path = new_segment_path(index_dir)
+    with SegmentWriter(seg_path, codec) as writer:
+        writer.add_index(index)
+    commit_segment(index_dir, seg_path)
+    return seg_path
@@ -0,0 +1,204 @@
+import numpy as np
+
+
+class DocSet:
+
+    # Immutable set of doc ids in a roaring bitmap layout: ids are split by their high 16 bits into chunks,
+    # each chunk (container) holds the low 16 bits of it ids either as
+    # a sorted uint16 array  >> sparse chunks, up to ARRAY_MAX ids (2 bytes per id)
+    # a 2^16 bits bitmap     >> dense chunks, 1024 uint64 words (8KB, less than an array of > 4096 ids)
+    # Boolean operations merge the chunk keys and run a NumPy kernel chosen by the kinds of each container
+    # pair (array-array: binary searches, array-bitmap: bit tests, bitmap-bitmap: word-wise and / or / andnot),
+    # results are converted back to the smallest container kind
+
+    ARRAY_MAX = 4096
+    WORDS = 1024
+
+    def __init__(self, keys: list, containers: list):
+        self.keys = keys
+        self.containers = containers
+        self._len = sum(_cardinality(c) for c in containers)
+
+    @classmethod
+    def from_ids(cls, ids) -> 'DocSet':
+
+        # ids: sorted distinct doc ids
+
+        ids = np.asarray(ids, dtype=np.uint32)
+        if not len(ids):
+            return cls([], [])
+        high = ids >> 16
+        bounds = [0] + (np.flatnonzero(np.diff(high)) + 1).tolist() + [len(ids)]
+        keys, containers = list(), list()
+        for lo, hi in zip(bounds, bounds[1:]):
+            keys.append(int(high[lo]))
+            low = (ids[lo:hi] & 0xFFFF).astype(np.uint16)
+            containers.append(_to_bitmap(low) if len(low) > cls.ARRAY_MAX else low)
+        return cls(keys, containers)
+
+    @classmethod
+    def from_postings(cls, pst_list) -> 'DocSet':
+        return cls.from_ids(doc_id_array(pst_list))
+
+    def ids(self) -> np.ndarray:
+
+        # Sorted doc ids (uint32)
+
+        if not self.keys:
+            return np.empty(0, dtype=np.uint32)
+        return np.concatenate([(np.uint32(key) << np.uint32(16)) | _to_array(c).astype(np.uint32)
+                               for key, c in zip(self.keys, self.containers)])
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return iter(self.ids().tolist())
+
+    def __contains__(self, doc_id: int):
+        key, low = doc_id >> 16, doc_id & 0xFFFF
+        i = np.searchsorted(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return False
+        c = self.containers[i]
+        if _is_bitmap(c):
+            return bool(_test(c, np.array([low]))[0])
+        j = np.searchsorted(c, low)
+        return j < len(c) and c[j] == low
+
+    def nbytes(self) -> int:
+        return sum(c.nbytes for c in self.containers) + 2 * len(self.keys)
+
+    def __and__(self, other: 'DocSet') -> 'DocSet':
+        keys, containers, i, j = list(), list(), 0, 0
+        while i < len(self.keys) and j < len(other.keys):
+            if self.keys[i] == other.keys[j]:
+                c = _and(self.containers[i], other.containers[j])
+                if c is not None:
+                    keys.append(self.keys[i])
+                    containers.append(c)
+                i, j = i + 1, j + 1
+            elif self.keys[i] < other.keys[j]:
+                i += 1
+            else:
+                j += 1
+        return DocSet(keys, containers)
+
+    def __or__(self, other: 'DocSet') -> 'DocSet':
+        keys, containers, i, j = list(), list(), 0, 0
+        while i < len(self.keys) or j < len(other.keys):
+            if j == len(other.keys) or (i < len(self.keys) and self.keys[i] < other.keys[j]):
+                keys.append(self.keys[i])
+                containers.append(self.containers[i])
+                i += 1
+            elif i == len(self.keys) or other.keys[j] < self.keys[i]:
+                keys.append(other.keys[j])
+                containers.append(other.containers[j])
+                j += 1
+            else:
+                keys.append(self.keys[i])
+                containers.append(_or(self.containers[i], other.containers[j]))
+                i, j = i + 1, j + 1
+        return DocSet(keys, containers)
+
+    def __sub__(self, other: 'DocSet') -> 'DocSet':
+        keys, containers, j = list(), list(), 0
+        for key, c in zip(self.keys, self.containers):
+            while j < len(other.keys) and other.keys[j] < key:
+                j += 1
+            if j < len(other.keys) and other.keys[j] == key:
+                c = _andnot(c, other.containers[j])
+            if c is not None:
+                keys.append(key)
+                containers.append(c)
+        return DocSet(keys, containers)
+
+    def __repr__(self):
+        return "DocSet({} ids, {} arrays, {} bitmaps)".format(
+            len(self), sum(not _is_bitmap(c) for c in self.containers), sum(map(_is_bitmap, self.containers)))
+
+
+def doc_id_array(pst_list) -> np.ndarray:
+
+    # Sorted doc ids of a posting list as a uint32 array, straight from the ids buffer of compact / disk
+    # posting lists (no copy), decoded block by block from compressed ones
+
+    ids = pst_list.ids() if hasattr(pst_list, 'ids') else (p.id for p in pst_list)
+    if hasattr(ids, '__len__'):
+        return np.asarray(ids, dtype=np.uint32)
+    return np.fromiter(ids, dtype=np.uint32, count=len(pst_list))
+
+
+# Container kernels, containers are never modified in place (DocSets share them).
+# Results are None when empty, else the smallest container kind for their cardinality
+
+def _and(a: np.ndarray, b: np.ndarray):
+    if _is_bitmap(a) and _is_bitmap(b):
+        return _from_words(a & b)
+    if _is_bitmap(a):
+        a, b = b, a
+    res = a[_test(b, a)] if _is_bitmap(b) else a[member(a, b)] if len(a) <= len(b) else b[member(b, a)]
+    return res if len(res) else None
+
+
+def _or(a: np.ndarray, b: np.ndarray):
+    if _is_bitmap(a) or _is_bitmap(b) or len(a) + len(b) > DocSet.ARRAY_MAX:
+        return _from_words(_words(a) | _words(b))
+    return np.union1d(a, b).astype(np.uint16)
+
+
+def _andnot(a: np.ndarray, b: np.ndarray):
+    if _is_bitmap(a):
+        return _from_words(a & ~_words(b))
+    res = a[~_test(b, a)] if _is_bitmap(b) else a[~member(a, b)]
+    return res if len(res) else None
+
+
+def member(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Mask of the values of a present in b (both sorted arrays), a binary search per value of a
+    if not len(b):
+        return np.zeros(len(a), dtype=bool)
+    idx = np.minimum(np.searchsorted(b, a), len(b) - 1)
+    return b[idx] == a
+
+
+def _test(words: np.ndarray, a: np.ndarray) -> np.ndarray:
+    # Mask of the values of a whose bit is set (through the byte view, so independent of the word endianness)
+    return ((words.view(np.uint8)[a >> 3] >> (a & 7).astype(np.uint8)) & 1).astype(bool)
+
+
+def _is_bitmap(c: np.ndarray) -> bool:
+    return c.dtype == np.uint64
+
+
+def _words(c: np.ndarray) -> np.ndarray:
+    return c if _is_bitmap(c) else _to_bitmap(c)
+
+
+def _to_bitmap(a: np.ndarray) -> np.ndarray:
+    bits = np.zeros(DocSet.WORDS * 64, dtype=bool)
+    bits[a] = True
+    return np.packbits(bits, bitorder='little').view(np.uint64)
+
+
+def _to_array(c: np.ndarray) -> np.ndarray:
+    if not _is_bitmap(c):
+        return c
+    return np.flatnonzero(np.unpackbits(c.view(np.uint8), bitorder='little')).astype(np.uint16)
+
+
+def _from_words(words: np.ndarray):
+    n = _popcount(words)
+    if not n:
+        return None
+    return _to_array(words) if n <= DocSet.ARRAY_MAX else words
+
+
+def _cardinality(c: np.ndarray) -> int:
+    return _popcount(c) if _is_bitmap(c) else len(c)
+
+
+def _popcount(words: np.ndarray) -> int:
+    if hasattr(np, 'bitwise_count'):  # numpy >= 2.0
+        return int(np.bitwise_count(words).sum())
+    return int(np.unpackbits(words.view(np.uint8)).sum())
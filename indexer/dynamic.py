@@ -0,0 +1,295 @@
+import threading
+from bisect import bisect_left, insort
+from collections.abc import Mapping
+from heapq import merge
+
+from indexer.compact import CompactIndexBuilder
+from indexer.index import Index, Posting, Term
+from indexer.stats import DocStats
+from preprocessing.tokenize.tokenizer import Tokenizer
+
+
+class DocBitmap:
+
+    # Set of doc ids stored as a bitmap (1 bit per id)
+
+    def __init__(self):
+        self._bits = bytearray()
+        self._count = 0
+
+    def add(self, doc_id: int):
+        byte, bit = doc_id >> 3, 1 << (doc_id & 7)
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(byte - len(self._bits) + 1))
+        if not self._bits[byte] & bit:
+            self._bits[byte] |= bit
+            self._count += 1
+
+    def __contains__(self, doc_id):
+        byte = doc_id >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (doc_id & 7)))
+
+    def __iter__(self):
+        for byte, bits in enumerate(self._bits):
+            if bits:
+                for bit in range(8):
+                    if bits & (1 << bit):
+                        yield (byte << 3) | bit
+
+    def __len__(self):
+        return self._count
+
+    def copy(self) -> 'DocBitmap':
+        bm = DocBitmap()
+        bm._bits, bm._count = bytearray(self._bits), self._count
+        return bm
+
+
+class DeltaSegment:
+
+    # Small in-memory segment holding recently added documents,
+    # docs: doc id >> (term >> positions), terms: term >> sorted doc ids
+
+    def __init__(self):
+        self.docs = dict()
+        self.terms = dict()
+
+    def add_doc(self, doc_id: int, terms: dict):
+        self.docs[doc_id] = terms
+        for term in terms:
+            insort(self.terms.setdefault(term, list()), doc_id)
+
+    def remove_doc(self, doc_id: int) -> bool:
+        terms = self.docs.pop(doc_id, None)
+        if terms is None:
+            return False
+        for term in terms:
+            ids = self.terms[term]
+            del ids[bisect_left(ids, doc_id)]
+            if not ids:
+                del self.terms[term]
+        return True
+
+    def postings(self, term: str) -> list:
+        return [Posting(doc_id, self.docs[doc_id][term]) for doc_id in self.terms.get(term, [])]
+
+    def __contains__(self, term):
+        return term in self.terms
+
+    def __iter__(self):
+        return iter(self.terms)
+
+    def __getitem__(self, term) -> Term:
+        return Term(self.postings(term))
+
+    def copy(self) -> 'DeltaSegment':
+        # docs term maps are never modified once added, only the doc ids lists are
+        delta = DeltaSegment()
+        delta.docs, delta.terms = dict(self.docs), {term: list(ids) for term, ids in self.terms.items()}
+        return delta
+
+
+class IndexSnapshot(Mapping):
+
+    # Read-only view of a DynamicIndex at one version: layers and deletion bitmaps as they were when taken,
+    # later adds / deletes / merges are not visible
+
+    def __init__(self, layers: list, version: int):
+        self._layers = layers
+        self.version = version
+
+    def __getitem__(self, term) -> Term:
+        postings = DynamicIndex._live_postings(self._layers, term)
+        if not postings:
+            raise KeyError(term)
+        return Term(postings)
+
+    def __contains__(self, term):
+        return DynamicIndex._has_live(self._layers, term)
+
+    def __iter__(self):
+        terms = sorted(set().union(*(index for index, _ in self._layers)))
+        return (term for term in terms if DynamicIndex._has_live(self._layers, term))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class DynamicIndex(Mapping):
+
+    # Incremental index supporting add/delete/update of single documents,
+    # Layers from oldest to newest: main (any read-only index), frozen (a delta being merged) and delta.
+    # Every immutable layer has a deletion bitmap, a delete marks the doc in all of them and drops it from
+    # the delta, an update is a delete followed by an add under the same id.
+    # Once delta holds max_delta_docs docs it is frozen and merged with main into a new CompactIndex
+    # (in a background thread by default), readers keep seeing main + frozen + delta until the swap.
+    # Every term lookup is consistent on it own, the lookups of a multi-term query are not if writes run
+    # concurrently: search a snapshot() to see one state of the index for all terms
+    # stats: DocStats of main (e.g. Index.stats, recovered from the postings when missing), kept up to date
+    # by every add / delete for ranked retrieval
+
+    def __init__(self, tokenizer: Tokenizer, main=None, max_delta_docs: int = 1000, background: bool = True,
+                 next_id: int = None, stats: DocStats = None):
+        self.indexer = Index(tokenizer)
+        self.max_delta_docs = max_delta_docs
+        self.background = background
+        self.version = 0
+
+        main = dict() if main is None else main
+        self._layers = [(main, DocBitmap())]  # (index, deleted) oldest first, delta excluded
+        self._delta = DeltaSegment()
+        self._next_id = next_id if next_id is not None else self._max_id(main) + 1
+        self._lock = threading.RLock()
+        self._merging = None
+        self._snapshot = None
+        self._stats = DocStats(dict(stats.doc_lens)) if stats is not None else None
+
+    @staticmethod
+    def _max_id(index) -> int:
+        return max((index[term].pst_list[-1].id for term in index if index[term].df), default=0)
+
+    def add(self, text: str) -> int:
+
+        # Indexes a new document, returns it doc id
+
+        with self._lock:
+            doc_id = self._next_id
+            self._next_id += 1
+            self._add(doc_id, text)
+            return doc_id
+
+    def delete(self, doc_id: int):
+        with self._lock:
+            self._delete(doc_id)
+            self.version += 1
+
+    def update(self, doc_id: int, text: str):
+
+        # Replaces the text of doc_id, KeyError if the id was never assigned (a later add() would reuse it)
+
+        with self._lock:
+            if not 0 < doc_id < self._next_id:
+                raise KeyError(doc_id)
+            self._delete(doc_id)
+            self._add(doc_id, text)
+
+    def _add(self, doc_id: int, text: str):
+        terms = self.indexer.analyze(text)
+        self._delta.add_doc(doc_id, terms)
+        if self._stats is not None:
+            self._stats.add(doc_id, sum(len(pos_list) for pos_list in terms.values()))
+        self.version += 1
+        if len(self._delta.docs) >= self.max_delta_docs and self._merging is None:
+            self.merge(wait=not self.background)
+
+    def _delete(self, doc_id: int):
+        self._delta.remove_doc(doc_id)
+        if self._stats is not None:
+            self._stats.remove(doc_id)
+        for _, deleted in self._layers:
+            deleted.add(doc_id)
+
+    def merge(self, wait: bool = True):
+
+        # Freezes the delta and merges all layers into a new main CompactIndex,
+        # wait=True merges in the calling thread, otherwise in a background thread (one merge at a time)
+
+        if wait:
+            self.wait()
+        with self._lock:
+            if self._merging is not None or not self._delta.docs:
+                return
+            self._layers.append((self._delta, DocBitmap()))
+            self._delta = DeltaSegment()
+            snapshot = [(index, deleted.copy()) for index, deleted in self._layers]
+            if wait:
+                self._merge(snapshot)
+            else:
+                self._merging = threading.Thread(target=self._merge, args=(snapshot,), daemon=True)
+                self._merging.start()
+
+    def wait(self):
+        merging = self._merging
+        if merging is not None:
+            merging.join()
+
+    def _merge(self, snapshot: list):
+        try:
+            builder = CompactIndexBuilder()
+            terms = sorted(set().union(*(layer for layer, _ in snapshot)))
+            for term in terms:
+                for pst in self._live_postings(snapshot, term):
+                    builder.add_posting(term, pst.id, pst.pos_list)
+            main = builder.build()
+
+            with self._lock:
+                # deletions which arrived while merging (in background) still apply to the new main
+                merged = self._layers[:len(snapshot)]
+                deleted = DocBitmap()
+                for (_, now), (_, before) in zip(merged, snapshot):
+                    for doc_id in now:
+                        if doc_id not in before:
+                            deleted.add(doc_id)
+                self._layers = [(main, deleted)] + self._layers[len(snapshot):]
+                self.version += 1
+        finally:
+            self._merging = None
+
+    @staticmethod
+    def _live_postings(layers: list, term: str) -> list:
+        lists = list()
+        for index, deleted in layers:
+            if term in index:
+                lists.append([p for p in index[term].pst_list if p.id not in deleted] if deleted
+                             else index[term].pst_list)
+        return list(merge(*lists, key=lambda p: p.id)) if len(lists) > 1 else list(lists[0]) if lists else []
+
+    @property
+    def stats(self) -> DocStats:
+
+        # Statistics of the live documents, scanned from the postings once if main came without them
+
+        with self._lock:
+            if self._stats is None:
+                self._stats = DocStats.from_index(self.snapshot())
+            return self._stats
+
+    def snapshot(self) -> IndexSnapshot:
+
+        # Consistent read-only view of the current state (layers, delta and deletions read once under the lock),
+        # shared by all readers until the next change
+
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != self.version:
+                layers = [(index, deleted.copy()) for index, deleted in self._layers]
+                self._snapshot = IndexSnapshot(layers + [(self._delta.copy(), None)], self.version)
+            return self._snapshot
+
+    @staticmethod
+    def _has_live(layers: list, term: str) -> bool:
+        # Whether some layer holds a non deleted posting of term, stops at the first one found
+        for index, deleted in layers:
+            if term in index and (not deleted or any(p.id not in deleted for p in index[term].pst_list)):
+                return True
+        return False
+
+    def __getitem__(self, term) -> Term:
+        with self._lock:
+            postings = self._live_postings(self._layers + [(self._delta, None)], term)
+        if not postings:
+            raise KeyError(term)
+        return Term(postings)
+
+    def __contains__(self, term):
+        with self._lock:
+            return self._has_live(self._layers + [(self._delta, None)], term)
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+    def __len__(self):
+        return len(self.snapshot())
+
+    @property
+    def segments(self) -> int:
+        return len(self._layers) + 1
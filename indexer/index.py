@@ -1,4 +1,8 @@
+from preprocessing.analyzer import read_chunks
 from preprocessing.tokenize.tokenizer import Tokenizer
+from indexer.compact import CompactIndexBuilder
+from indexer.disk import next_doc_id, write_segment
+from indexer.stats import DocStats
 from os import listdir, path
 
 
@@ -25,21 +29,25 @@ class Term:
     # Each term has document-frequency (num of docs term appeared in) and posting list
 
     def __init__(self, pst_list: list = None):
-        self.pst_list = pst_list
-        self.df = 0 if not pst_list else len(pst_list)
+        self.pst_list = [] if pst_list is None else pst_list
+        self.df = len(self.pst_list)
 
     def add_post(self, id, pos):
-        # Adds post to posts list,
-        # if exists: increments it df
+        # Adds position to the posting of document id,
+        # Documents are indexed in increasing id order so only the last posting can match (O(1))
 
-        post = next((p for p in self.pst_list if p.id == id), None)
-        if not post:
-            post = Posting(id, [pos])
-            self.pst_list.append(Posting(id, [pos]))
-            self.df += 1
+        if self.pst_list and self.pst_list[-1].id == id:
+            post = self.pst_list[-1]
+            post.pos_list.append(pos)
+            post.tf += 1
+        else:
+            self.append(Posting(id, [pos]))
 
-        post.pos_list.append(pos)
-        post.tf += 1
+    def append(self, post: Posting):
+        # Appends a complete posting of a new (larger) document id, increments it df
+
+        self.pst_list.append(post)
+        self.df += 1
 
 
 class Index:
@@ -49,21 +57,90 @@ class Index:
 
     def __init__(self, tokenizer: Tokenizer):
         self.tokenizer = tokenizer
+        self.stats = None  # DocStats of the last built index
 
-    def build(self, dir_path: str) -> dict:
+    def build(self, dir_path: str, compact: bool = False):
 
         # Builds an inverted index from a given path file,
         # Parses directory path, tokenizes it docs and adds tokenized terms as posting list
-
-        index, n = dict(), 0
-        for fp in listdir(dir_path):
+        # compact=True produces an array-backed CompactIndex instead of a dict of Term objects
+
+        return self.build_docs(self._read_docs(dir_path, chunk_size=self.chunk_size), compact)
+
+    def build_to_disk(self, dir_path: str, index_dir: str, codec: str = None) -> str:
+
+        # Builds an index from a given path file and writes it as a new segment of the on-disk index
+        # at index_dir (opened later via indexer.disk.DiskIndex), doc ids continue after existing segments
+        # codec: optional posting compression, one of indexer.compression.CODECS
+
+        docs = self._read_docs(dir_path, first_id=next_doc_id(index_dir), chunk_size=self.chunk_size)
+        return write_segment(self.build_docs(docs, compact=True), index_dir, codec)
+
+    def build_docs(self, docs, compact: bool = False):
+
+        # Single pass indexing of (doc id, text) pairs given in increasing id order,
+        # Each doc is first collected into a doc-local term >> positions map, then every term
+        # gets exactly one posting appended, build time is linear in number of corpus tokens
+        # Doc lengths are recorded on the way into self.stats (used by ranked retrieval)
+
+        doc_lens = dict()
+        if compact:
+            builder = CompactIndexBuilder()
+            for n, dstr in docs:
+                terms = self.analyze(dstr)
+                doc_lens[n] = sum(len(pos_list) for pos_list in terms.values())
+                builder.add_doc(n, terms)
+            self.stats = DocStats(doc_lens)
+            return builder.build()
+
+        index = dict()
+        for n, dstr in docs:
+            terms = self.analyze(dstr)
+            doc_lens[n] = sum(len(pos_list) for pos_list in terms.values())
+            for tok, pos_list in terms.items():
+                term = index.get(tok)
+                if term is None:
+                    index[tok] = Term([Posting(n, pos_list)])
+                else:
+                    term.append(Posting(n, pos_list))
+
+        self.stats = DocStats(doc_lens)
+        return index
+
+    @property
+    def chunk_size(self) -> int:
+        # Files are streamed in chunks of this size when the tokenizer is a streaming Analyzer, else None
+        return getattr(self.tokenizer, 'chunk_size', None)
+
+    def analyze(self, dstr) -> dict:
+
+        # Tokenizes a document (text or iterable of text chunks, see Analyzer) into a term >> positions map
+
+        terms = dict()
+        for tok, pos in self.tokenizer.tokenize(dstr) if isinstance(dstr, str) else self.tokenizer.analyze(dstr):
+            pos_list = terms.get(tok)
+            if pos_list is None:
+                terms[tok] = [pos]
+            else:
+                pos_list.append(pos)
+        return terms
+
+    @staticmethod
+    def _read_docs(dir_path: str, first_id: int = 1, chunk_size: int = None):
+
+        # Yields (doc id, text) for each file in directory path,
+        # ids start at first_id and follow file name order so they do not depend on the OS listing order
+        # chunk_size: yields (doc id, lazy text chunks) instead, files are never read whole
+
+        return Index._read_files(dir_path, sorted(listdir(dir_path)), first_id, chunk_size)
+
+    @staticmethod
+    def _read_files(dir_path: str, files: list, first_id: int = 1, chunk_size: int = None):
+        n = first_id - 1
+        for fp in files:
             n += 1
+            if chunk_size:
+                yield n, read_chunks(path.join(dir_path, fp), chunk_size)
+                continue
             with open(path.join(dir_path, fp), 'r') as doc:
-                dstr = "".join(doc.readlines()).replace("\n", " ")
-                for tok, pos in self.tokenizer.tokenize(dstr):
-                    if tok not in index:
-                        index[tok] = Term([Posting(n, [pos])])
-                    else:
-                        index.get(tok).add_post(n, pos)
-
-        return index
\ No newline at end of file
+                yield n, doc.read().replace("\n", " ")
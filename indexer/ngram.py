@@ -0,0 +1,93 @@
+import re
+from array import array
+from bisect import bisect_left
+
+from indexer.terms import TermDictionary, wildcard_regex
+from preprocessing.tokenize.ngram import NGramTokenizer
+
+
+class NGramTermIndex:
+
+    # k-gram index over the term dictionary (IIR ch. 3.2.2) for prefix / substring (infix) term lookups,
+    # Every term is padded with boundary markers ('$term$$' for k = 3) and split into k-grams, each gram maps
+    # to the sorted ordinals of the terms holding it. A lookup intersects the lists of the query grams
+    # (shortest first) and verifies the few candidates, instead of scanning the whole dictionary.
+    # The k - 1 end markers give every position of a term a full k-gram starting there, so a query shorter
+    # than k is found in the grams it prefixes: a prefix range of the sorted gram dictionary
+
+    MARKER = "$"
+
+    def __init__(self, terms, k: int = 3):
+        self.k = k
+        self.terms = sorted(terms)
+        tokenizer, grams = NGramTokenizer(), dict()
+        for t, term in enumerate(self.terms):
+            padded = self.MARKER + term + self.MARKER * (k - 1)
+            for gram in dict.fromkeys(g for g, _ in tokenizer.tokenize(padded, min_gram=k, max_gram=k)):
+                grams.setdefault(gram, array('I')).append(t)
+        self.grams = grams
+        self.gram_terms = TermDictionary.from_terms(sorted(grams))
+
+    def prefix(self, q: str) -> list:
+
+        # Terms starting with q, sorted
+
+        if not q:
+            return list(self.terms)
+        return [self.terms[t] for t in self._candidates(self.MARKER + q) if self.terms[t].startswith(q)]
+
+    def substring(self, q: str) -> list:
+
+        # Terms containing q, sorted
+
+        if not q:
+            return list(self.terms)
+        return [self.terms[t] for t in self._candidates(q) if q in self.terms[t]]
+
+    def wildcard(self, pattern: str) -> list:
+
+        # Terms matching a wildcard pattern ('*', '?', see TermDictionary.wildcard), sorted
+        # Candidates hold the grams of every literal fragment of the pattern, anchored ones with the boundary
+        # markers ('*ink' >> 'ink$', 'dr*' >> '$dr'), then are verified by the pattern regex
+
+        fragments = re.split(r"[*?]+", self.MARKER + pattern + self.MARKER)
+        ordinals = None
+        for fragment in fragments:
+            if fragment and fragment != self.MARKER:
+                candidates = self._candidates(fragment)
+                ordinals = candidates if ordinals is None else [t for t in ordinals if _contains(candidates, t)]
+                if not ordinals:
+                    return []
+        regex = wildcard_regex(pattern)
+        return [self.terms[t] for t in (range(len(self.terms)) if ordinals is None else ordinals)
+                if regex.fullmatch(self.terms[t])]
+
+    def _candidates(self, q: str) -> list:
+
+        # Sorted ordinals of terms holding all k-grams of q (a superset of the matches)
+
+        if len(q) < self.k:
+            # union of the lists of grams starting with q
+            ordinals = set()
+            for gram in self.gram_terms.prefix(q):
+                ordinals.update(self.grams[gram])
+            return sorted(ordinals)
+
+        lists = [self.grams.get(q[i:i + self.k]) for i in range(len(q) - self.k + 1)]
+        if not all(lists):
+            return []
+        lists.sort(key=len)
+        res = lists[0]
+        for lst in lists[1:]:
+            res = [t for t in res if _contains(lst, t)]
+            if not res:
+                break
+        return list(res)
+
+    def nbytes(self) -> int:
+        return sum(lst.itemsize * len(lst) for lst in self.grams.values()) + self.gram_terms.nbytes()
+
+
+def _contains(lst, t: int) -> bool:
+    i = bisect_left(lst, t)
+    return i < len(lst) and lst[i] == t
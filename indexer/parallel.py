@@ -0,0 +1,76 @@
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count, listdir
+
+from indexer.compact import CompactIndexBuilder
+from indexer.index import Index, Posting, Term
+from indexer.stats import DocStats
+from preprocessing.tokenize.tokenizer import Tokenizer
+
+
+def _map(tokenizer: Tokenizer, dir_path: str, files: list, first_id: int):
+
+    # Map step (runs in a worker process): indexes a contiguous shard of files,
+    # doc ids are global (first_id + offset in the sorted file list) so shards never need renumbering,
+    # returns the partial index and it doc lengths
+
+    indexer = Index(tokenizer)
+    partial = indexer.build_docs(Index._read_files(dir_path, files, first_id, indexer.chunk_size), compact=True)
+    return partial, indexer.stats.doc_lens
+
+
+class ParallelIndex:
+
+    # Map-reduce indexing over a process pool,
+    # The sorted document list is split into contiguous shards, every worker builds a partial CompactIndex
+    # and the reduce step concatenates posting lists of each term in shard order (ids are already increasing)
+    # and merges the doc lengths of every shard into self.stats, as Index.build does
+
+    def __init__(self, tokenizer: Tokenizer, workers: int = None, shards_per_worker: int = 4):
+        self.tokenizer = tokenizer
+        self.workers = workers or cpu_count() or 1
+        self.shards_per_worker = shards_per_worker
+        self.stats = None  # DocStats of the last built index
+
+    def build(self, dir_path: str, compact: bool = False):
+        files = sorted(listdir(dir_path))
+        shards = self._split(files, self.workers * self.shards_per_worker)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures, first_id = list(), 1
+            for shard in shards:
+                futures.append(pool.submit(_map, self.tokenizer, dir_path, shard, first_id))
+                first_id += len(shard)
+            results = [f.result() for f in futures]
+
+        doc_lens = dict()
+        for _, shard_lens in results:
+            doc_lens.update(shard_lens)
+        self.stats = DocStats(doc_lens)
+        return self._reduce([partial for partial, _ in results], compact)
+
+    @staticmethod
+    def _split(files: list, n: int) -> list:
+        size = max(1, -(-len(files) // n))  # ceil
+        return [files[i:i + size] for i in range(0, len(files), size)]
+
+    @staticmethod
+    def _reduce(partials: list, compact: bool):
+
+        # Merges partial indexes (in shard order) into one index
+
+        if compact:
+            builder = CompactIndexBuilder()
+            for partial in partials:
+                for term_name in partial:
+                    builder.extend(term_name, *partial.term_arrays(term_name))
+            return builder.build()
+
+        index = dict()
+        for partial in partials:
+            for term_name, term in partial.items():
+                dest = index.get(term_name)
+                if dest is None:
+                    dest = index[term_name] = Term()
+                for pst in term.pst_list:
+                    dest.append(Posting(pst.id, pst.pos_list.tolist()))
+        return index
@@ -0,0 +1,126 @@
+import shutil
+import sys
+import tempfile
+from heapq import merge
+from itertools import groupby
+from os import path
+from time import perf_counter
+
+from indexer.compact import CompactTerm
+from indexer.disk import DiskSegment, SegmentWriter, commit_segment, new_segment_path, next_doc_id
+from indexer.index import Index
+from preprocessing.tokenize.tokenizer import Tokenizer
+
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None
+
+
+class SPIMIIndexer:
+
+    # Single-pass in-memory indexing (SPIMI), based on the algorithm presented in IIR book (ch. 4.3)
+    # Postings are accumulated in a dict until the estimated memory reaches budget bytes,
+    # the block is then flushed to disk as a sorted segment. At the end all blocks are k-way merged
+    # into one segment of the final on-disk index, so memory is bounded by budget regardless of corpus size
+
+    # Rough CPython costs used to estimate the block size (dict slot + str, tuple + list, int + pointer)
+    TERM_BYTES, POSTING_BYTES, POSITION_BYTES = 120, 120, 36
+
+    def __init__(self, tokenizer: Tokenizer, budget: int = 64 * 1024 * 1024, tmp_dir: str = None,
+                 codec: str = None):
+        self.indexer = Index(tokenizer)
+        self.budget = budget
+        self.tmp_dir = tmp_dir
+        self.codec = codec  # compression of the final segment, blocks are always raw
+
+    def build(self, dir_path: str, index_dir: str) -> dict:
+
+        # Indexes all docs of dir_path into a new segment of index_dir, returns build statistics
+
+        docs = Index._read_docs(dir_path, first_id=next_doc_id(index_dir), chunk_size=self.indexer.chunk_size)
+        return self.build_docs(docs, index_dir)
+
+    def build_docs(self, docs, index_dir: str) -> dict:
+
+        # Returns build stats: docs, tokens, blocks, index_time, merge_time, segment, process_peak_rss
+        # process_peak_rss is the peak of the whole process lifetime, not of this build: a build after a
+        # larger one reports the earlier peak (measure each build in a fresh process, see benchmarking.spimi)
+
+        stats = {"docs": 0, "tokens": 0, "blocks": 0}
+        blocks_dir = tempfile.mkdtemp(prefix="spimi-", dir=self.tmp_dir)
+        try:
+            start, blocks = perf_counter(), list()
+            block, used = dict(), 0
+            for n, dstr in docs:
+                for tok, pos_list in self.indexer.analyze(dstr).items():
+                    postings = block.get(tok)
+                    if postings is None:
+                        postings = block[tok] = list()
+                        used += self.TERM_BYTES + len(tok)
+                    postings.append((n, pos_list))
+                    used += self.POSTING_BYTES + self.POSITION_BYTES * len(pos_list)
+                    stats["tokens"] += len(pos_list)
+                stats["docs"] += 1
+                if used >= self.budget:
+                    blocks.append(self._flush(block, path.join(blocks_dir, str(len(blocks)))))
+                    block, used = dict(), 0
+            if block or not blocks:
+                blocks.append(self._flush(block, path.join(blocks_dir, str(len(blocks)))))
+            stats["index_time"] = perf_counter() - start
+            stats["blocks"] = len(blocks)
+
+            start = perf_counter()
+            stats["segment"] = self._merge(blocks, index_dir, self.codec)
+            stats["merge_time"] = perf_counter() - start
+        finally:
+            shutil.rmtree(blocks_dir, ignore_errors=True)
+
+        stats["process_peak_rss"] = peak_rss()
+        return stats
+
+    @staticmethod
+    def _flush(block: dict, block_path: str) -> str:
+
+        # Sorts block terms and writes them as a temporary segment
+
+        with SegmentWriter(block_path) as writer:
+            for term in sorted(block):
+                writer.add_term(term, block.pop(term))
+        return block_path
+
+    @staticmethod
+    def _merge(blocks: list, index_dir: str, codec: str = None) -> str:
+
+        # k-way merge of sorted blocks (heap over each block's term iterator),
+        # Blocks hold increasing doc id ranges so postings of a term are concatenated in block order
+
+        segments = [DiskSegment(b) for b in blocks]
+        try:
+            seg_path = new_segment_path(index_dir)
+            streams = [_terms_stream(seg, k) for k, seg in enumerate(segments)]
+            with SegmentWriter(seg_path, codec) as writer:
+                for term, group in groupby(merge(*streams), key=lambda entry: entry[0]):
+                    writer.add_term(term, ((p.id, p.pos_list) for _, k, t in group
+                                           for p in CompactTerm(segments[k], t).pst_list))
+            commit_segment(index_dir, seg_path)
+        finally:
+            for seg in segments:
+                seg.close()
+        return seg_path
+
+
+def _terms_stream(seg: DiskSegment, k: int):
+    # Yields (term, block no, term ordinal) in sorted term order
+    for t in range(len(seg)):
+        yield seg.term_at(t), k, t
+
+
+def peak_rss() -> int:
+
+    # Peak resident set size of the current process since it started, in bytes (None where unsupported)
+
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024  # bytes on macOS, kilobytes elsewhere
@@ -0,0 +1,44 @@
+from math import sqrt
+
+
+class DocStats:
+
+    # Per document statistics needed by ranking models, computed once at index time:
+    # doc length (num of indexed tokens), collection size, average length and length norms (1 / sqrt(len))
+    # Kept up to date in O(1) per document by an incremental index (see add / remove)
+
+    def __init__(self, doc_lens: dict):
+        self.doc_lens = doc_lens
+        self.total = sum(doc_lens.values())
+        self.norms = {doc_id: 1 / sqrt(dl) if dl else 0.0 for doc_id, dl in doc_lens.items()}
+        self._update()
+
+    def _update(self):
+        self.n = len(self.doc_lens)
+        self.avgdl = self.total / self.n if self.n else 0.0
+
+    def add(self, doc_id: int, dl: int):
+        self.remove(doc_id)
+        self.doc_lens[doc_id] = dl
+        self.norms[doc_id] = 1 / sqrt(dl) if dl else 0.0
+        self.total += dl
+        self._update()
+
+    def remove(self, doc_id: int):
+        dl = self.doc_lens.pop(doc_id, None)
+        if dl is not None:
+            del self.norms[doc_id]
+            self.total -= dl
+            self._update()
+
+    @classmethod
+    def from_index(cls, index) -> 'DocStats':
+
+        # Recovers doc lengths from the postings (sum of term frequencies per doc),
+        # for indexes which were not built by Index (e.g. opened from disk)
+
+        doc_lens = dict()
+        for term in index:
+            for pst in index[term].pst_list:
+                doc_lens[pst.id] = doc_lens.get(pst.id, 0) + pst.tf
+        return cls(doc_lens)
@@ -0,0 +1,198 @@
+import re
+from array import array
+from os.path import commonprefix
+
+
+class TermDictionary:
+
+    # Sorted, compact term dictionary: all terms utf-8 encoded back to back in one buffer,
+    # term_starts[t] .. term_starts[t + 1] is term ordinal t. Maps term >> ordinal like a dict,
+    # lookups are binary searches on bytes (utf-8 byte order == code point order == sorted(str) order).
+    # Sorted order makes prefix, range and wildcard enumeration a contiguous slice of ordinals.
+    # In memory the buffer is bytes, on disk (see DiskSegment) a memory mapped file
+
+    def __init__(self, term_bytes, term_starts):
+        self._bytes = term_bytes
+        self._starts = term_starts
+        self.ngrams = None  # NGramTermIndex of the terms, resolves leading wildcards (see with_ngrams)
+
+    @classmethod
+    def from_terms(cls, terms) -> 'TermDictionary':
+
+        # terms: sorted iterable of distinct terms
+
+        buf, starts = bytearray(), array('I', [0])
+        for term in terms:
+            buf += term.encode('utf-8')
+            starts.append(len(buf))
+        return cls(bytes(buf), starts)
+
+    @classmethod
+    def of(cls, index) -> 'TermDictionary':
+        # The term dictionary of an index, built from it sorted keys when it has none (dict, DiskIndex..)
+        terms = getattr(index, 'terms', None)
+        return terms if isinstance(terms, TermDictionary) else cls.from_terms(sorted(index))
+
+    def with_ngrams(self, k: int = 3) -> 'TermDictionary':
+
+        # Same terms (buffers shared) with a k-gram index for leading wildcard / substring lookups
+
+        from indexer.ngram import NGramTermIndex
+        terms = TermDictionary(self._bytes, self._starts)
+        terms.ngrams = NGramTermIndex(terms, k)
+        return terms
+
+    def term_at(self, t: int) -> str:
+        return self._key(t).decode('utf-8')
+
+    def _key(self, t: int) -> bytes:
+        return self._bytes[self._starts[t]:self._starts[t + 1]]
+
+    def _bisect(self, key: bytes, lo: int = 0) -> int:
+        # Ordinal of the first term >= key
+        hi = len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _gallop(self, key: bytes, lo: int) -> int:
+        # As _bisect for a key expected close to lo: doubles the step until past key, then bisects
+        step, n = 1, len(self)
+        while lo + step < n and self._key(lo + step) < key:
+            lo, step = lo + step, step * 2
+        hi = min(lo + step, n)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def __getitem__(self, term) -> int:
+        key = term.encode('utf-8')
+        t = self._bisect(key)
+        if t < len(self) and self._key(t) == key:
+            return t
+        raise KeyError(term)
+
+    def __contains__(self, term):
+        try:
+            self[term]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return (self.term_at(t) for t in range(len(self)))
+
+    def __len__(self):
+        return len(self._starts) - 1
+
+    def nbytes(self) -> int:
+        return len(self._bytes) + self._starts.itemsize * len(self._starts)
+
+    # Term enumeration, all return sorted terms
+
+    def prefix(self, prefix: str) -> list:
+        return self._terms(*self._prefix_range(prefix))
+
+    def _prefix_range(self, prefix: str) -> tuple:
+        # 0xff never appears in utf-8, so prefix + 0xff sorts after every term starting with prefix
+        key = prefix.encode('utf-8')
+        lo = self._bisect(key)
+        return lo, self._bisect(key + b'\xff', lo)
+
+    def range(self, lower: str = None, upper: str = None, include_lower: bool = True,
+              include_upper: bool = True) -> list:
+
+        # Terms between lower and upper (None == unbounded)
+
+        lo, hi = 0, len(self)
+        if lower is not None:
+            key = lower.encode('utf-8')
+            lo = self._bisect(key)
+            if not include_lower and lo < hi and self._key(lo) == key:
+                lo += 1
+        if upper is not None:
+            key = upper.encode('utf-8')
+            hi = self._bisect(key, lo)
+            if include_upper and hi < len(self) and self._key(hi) == key:
+                hi += 1
+        return self._terms(lo, max(lo, hi))
+
+    def wildcard(self, pattern: str) -> list:
+
+        # ES wildcard syntax: '*' any chars sequence (also empty), '?' any single char
+        # The literal prefix before the first wildcard narrows the scan to a range of ordinals, a leading
+        # wildcard goes through the k-gram index if there is one (else scans the whole dictionary)
+
+        literal = re.match(r"[^*?]*", pattern).group()
+        if literal == pattern:
+            return [pattern] if pattern in self else []
+        if not literal and self.ngrams is not None:
+            return self.ngrams.wildcard(pattern)
+        regex = wildcard_regex(pattern)
+        return [term for term in self.prefix(literal) if regex.fullmatch(term)]
+
+    def fuzzy(self, term: str, max_edits: int, prefix_length: int = 0) -> list:
+
+        # (term, distance) of all terms within max_edits Damerau-Levenshtein (optimal string alignment)
+        # edits of term, sharing it first prefix_length chars, in sorted term order
+        # Walks the sorted terms as a trie: the DP rows of a common prefix are reused from the previous
+        # term, and once no extension of a prefix can get back within max_edits, all terms sharing
+        # that prefix are skipped with a single binary search (a Levenshtein automaton over the dictionary)
+
+        t, hi = self._prefix_range(term[:prefix_length])
+        rows, prev, res = [list(range(len(term) + 1))], "", list()
+        while t < hi:
+            word = self.term_at(t)
+            common = min(len(commonprefix([prev, word])), len(rows) - 1)
+            del rows[common + 1:]
+            for i in range(common, len(word)):
+                rows.append(_edit_row(rows, word, i, term))
+                if _exhausted(rows, word[i], term, max_edits):
+                    prev = word[:i + 1]
+                    t = self._gallop(prev.encode('utf-8') + b'\xff', t + 1)
+                    break
+            else:
+                if rows[-1][-1] <= max_edits:
+                    res.append((word, rows[-1][-1]))
+                prev, t = word, t + 1
+        return res
+
+    def _terms(self, lo: int, hi: int) -> list:
+        return [self.term_at(t) for t in range(lo, hi)]
+
+
+def wildcard_regex(pattern: str):
+    return re.compile("".join(".*" if c == "*" else "." if c == "?" else re.escape(c) for c in pattern), re.DOTALL)
+
+
+def _edit_row(rows: list, word: str, i: int, term: str) -> list:
+
+    # Edit distance DP row of word[:i + 1] against all prefixes of term (rows[i] is the row of word[:i])
+
+    prev, c, row = rows[i], word[i], [i + 1]
+    for j in range(1, len(term) + 1):
+        d = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (term[j - 1] != c))
+        if i and j > 1 and c == term[j - 2] and word[i - 1] == term[j - 1]:
+            d = min(d, rows[i - 1][j - 2] + 1)  # transposition
+        row.append(d)
+    return row
+
+
+def _exhausted(rows: list, c: str, term: str, max_edits: int) -> bool:
+
+    # True when no extension of the prefix ending with c (rows[-1] it DP row) can be within max_edits:
+    # every cell of the last row exceeds it, and so does every transposition of c with the next char
+    # (the only way back to rows[-2])
+
+    if min(rows[-1]) <= max_edits:
+        return False
+    prev = rows[-2]
+    return all(prev[j - 2] >= max_edits for j in range(2, len(term) + 1) if term[j - 1] == c)
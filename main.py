@@ -0,0 +1,44 @@
+import argparse
+import asyncio
+
+from search.query.cache import QueryCache
+from service.server import SearchServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search server")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="serve an index over HTTP/JSON (see service.server.SearchServer)")
+    serve.add_argument("index", help="on-disk index directory or a directory of documents")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--workers", type=int, default=None, help="worker pool size (default: num of cpus)")
+    serve.add_argument("--processes", action="store_true", help="worker processes instead of threads")
+    serve.add_argument("--inline-cost", type=int, default=SearchServer.INLINE_COST,
+                       help="queries reading up to this num of postings run on the event loop")
+    serve.add_argument("--cache-size", type=int, default=QueryCache.SIZE)
+    serve.add_argument("--shards", type=int, default=0,
+                       help="partition the documents of the index directory across n shard processes")
+    args = parser.parse_args()
+
+    server = SearchServer(index_path=args.index, host=args.host, port=args.port, workers=args.workers,
+                          processes=args.processes, inline_cost=args.inline_cost, cache_size=args.cache_size,
+                          shards=args.shards)
+
+    async def serve():
+        port = await server.start()
+        print("listening on {}:{}".format(args.host, port), flush=True)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    # python main.py serve <index dir> [--port 8080] [--workers n] [--processes] [--shards n]
+    main()
@@ -0,0 +1,96 @@
+from preprocessing.tokenize.registry import STOPWORDS
+from preprocessing.tokenize.tokenizer import Tokenizer
+
+
+class Analyzer:
+
+    # Streaming analysis pipeline, analyzer names and behavior are borrowed from Elasticsearch:
+    # char reader >> tokenizer >> lowercase >> stop words filter >> stemmer
+    # Every stage is a generator of (token, position), text is read and tokenized chunk by chunk so memory
+    # stays flat regardless of the document size. Stop words keep their position (as ES does).
+
+    # Can be used wherever a Tokenizer is expected (Index, SPIMIIndexer, DynamicIndex..), Index reads
+    # files in chunks when given an Analyzer
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, tokenizer: Tokenizer, lowercase: bool = True, stops=None, stemmer=None,
+                 chunk_size: int = CHUNK_SIZE):
+
+        # stops: a set of stop words or a stop words file path (loaded once through the StopwordsRegistry)
+
+        self.tokenizer = tokenizer
+        self.lowercase = lowercase
+        self.stops = STOPWORDS.from_file(stops) if isinstance(stops, str) else stops
+        self.stemmer = stemmer
+        self.chunk_size = chunk_size
+
+    def tokenize(self, s: str) -> list:
+        return list(self.analyze([s]))
+
+    def analyze(self, chunks):
+
+        # Yields (token, position) of a document given as an iterable of text chunks
+
+        tokens = tokenize_stream(chunks, self.tokenizer)
+        if self.lowercase:
+            tokens = lowercase(tokens)
+        if self.stops:
+            tokens = remove_stops(tokens, self.stops)
+        if self.stemmer is not None:
+            tokens = stem(tokens, self.stemmer)
+        return tokens
+
+    def analyze_file(self, fp: str):
+        return self.analyze(read_chunks(fp, self.chunk_size))
+
+
+def read_chunks(fp: str, chunk_size: int = Analyzer.CHUNK_SIZE):
+
+    # Yields the text of a file chunk_size chars at a time, line breaks read as spaces (as Index reads docs)
+
+    with open(fp, 'r') as f:
+        chunk = f.read(chunk_size)
+        while chunk:
+            yield chunk.replace("\n", " ")
+            chunk = f.read(chunk_size)
+
+
+def tokenize_stream(chunks, tokenizer: Tokenizer):
+
+    # Tokenizes text chunks with any Tokenizer, a chunk is cut after it last word divider and the tail
+    # is carried to the next chunk, so no token is split and positions continue across chunks.
+    # Output equals tokenizer.tokenize on the whole text (without stop words, those are a later stage)
+
+    buf, offset = "", 0
+    for chunk in chunks:
+        buf += chunk
+        cut = max((buf.rfind(d) for d in tokenizer._word_divider if len(d) == 1), default=-1)
+        if cut >= 0:
+            piece, buf = buf[:cut + 1], buf[cut + 1:]
+            offset = yield from _shift(tokenizer.tokenize(piece), offset)
+    if buf:
+        yield from _shift(tokenizer.tokenize(buf), offset)
+
+
+def _shift(tokens: list, offset: int):
+    # Yields tokens with positions moved by offset, returns the new offset (positions are 1..n)
+    for tok, pos in tokens:
+        yield tok, pos + offset
+    return offset + tokens[-1][1] if tokens else offset
+
+
+def lowercase(tokens):
+    for tok, pos in tokens:
+        yield tok.lower(), pos
+
+
+def remove_stops(tokens, stops: set):
+    for tok, pos in tokens:
+        if tok not in stops:
+            yield tok, pos
+
+
+def stem(tokens, stemmer):
+    for tok, pos in tokens:
+        yield stemmer.stem(tok), pos
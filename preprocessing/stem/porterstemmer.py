@@ -1,9 +1,47 @@
+from collections import OrderedDict
+
 
 class PorterStemmer:
 
-    def __init__(self) -> None:
+    # Porter stemming algorithm ("An algorithm for suffix stripping", Porter 1980),
+    # with the extensions of NLTK's default mode (NLTK_EXTENSIONS) so stems are the same as nltk's:
+    # irregular forms, words of 1-2 chars kept, 'dies' >> 'die', y >> i only after a consonant, bli/logi/fulli..
+
+    # Vocabularies are highly repetitive (zipf) so stems are memoized in a bounded LRU cache
+
+    VOWELS = frozenset("aeiou")
+
+    IRREGULAR_FORMS = {"sky": "sky", "skies": "sky", "dying": "die", "lying": "lie", "tying": "tie",
+                       "news": "news", "innings": "inning", "inning": "inning", "outings": "outing",
+                       "outing": "outing", "cannings": "canning", "canning": "canning", "howe": "howe",
+                       "proceed": "proceed", "exceed": "exceed", "succeed": "succeed"}
+
+    # (suffix, replacement) in the paper order, the first suffix matched decides (logi, alli, ion have extra rules)
+    STEP2 = [("ational", "ate"), ("tional", "tion"), ("enci", "ence"), ("anci", "ance"), ("izer", "ize"),
+             ("bli", "ble"), ("alli", "al"), ("entli", "ent"), ("eli", "e"), ("ousli", "ous"),
+             ("ization", "ize"), ("ation", "ate"), ("ator", "ate"), ("alism", "al"), ("iveness", "ive"),
+             ("fulness", "ful"), ("ousness", "ous"), ("aliti", "al"), ("iviti", "ive"), ("biliti", "ble"),
+             ("fulli", "ful")]
+    STEP3 = [("icate", "ic"), ("ative", ""), ("alize", "al"), ("iciti", "ic"), ("ical", "ic"), ("ful", ""),
+             ("ness", "")]
+    STEP4 = ["al", "ance", "ence", "er", "ic", "able", "ible", "ant", "ement", "ment", "ent", "ou",
+             "ism", "ate", "iti", "ous", "ive", "ize"]
+
+    def __init__(self, cache_size: int = 64 * 1024) -> None:
         super().__init__()
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        # rules grouped by last letter (in rules order), only those can match a word
+        self._step2 = self._by_last_letter(self.STEP2)
+        self._step3 = self._by_last_letter(self.STEP3)
+        self._step4 = self._by_last_letter([(suffix, "") for suffix in self.STEP4])
 
+    @staticmethod
+    def _by_last_letter(rules: list) -> dict:
+        groups = dict()
+        for suffix, replacement in rules:
+            groups.setdefault(suffix[-1], []).append((suffix, replacement))
+        return groups
 
     def stem(self, tkn):
 
@@ -11,4 +49,124 @@ class PorterStemmer:
         # ['caresses', 'flies', 'dies']
         # >> ['caress', 'fli', 'die']
 
-        pass
\ No newline at end of file
+        stem = self._cache.get(tkn)
+        if stem is not None:
+            self._cache.move_to_end(tkn)
+            return stem
+
+        stem = self._stem(tkn)
+        self._cache[tkn] = stem
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return stem
+
+    def _stem(self, tkn: str) -> str:
+        word = tkn.lower()
+        if word in self.IRREGULAR_FORMS:
+            return self.IRREGULAR_FORMS[word]
+        if len(tkn) <= 2:
+            return word
+
+        word = self._step1a(word)
+        word = self._step1b(word)
+        word = self._step1c(word)
+        word = self._step2_rules(word)
+        word = self._apply(word, self._step3, 1)
+        word = self._step4_rules(word)
+        word = self._step5(word)
+        return word
+
+    # Measure helpers, cv(word) marks every letter as (c)onsonant or (v)owel:
+    # y is a consonant when first or after a vowel. Letters only depend on their prefix,
+    # so cv(word)[:n] == cv(word[:n]) and the measure of a stem is computed on a slice
+
+    def _cv(self, word: str) -> str:
+        flags, prev = list(), 'v'
+        for ch in word:
+            prev = 'v' if ch in self.VOWELS or (ch == 'y' and prev == 'c') else 'c'
+            flags.append(prev)
+        return "".join(flags)
+
+    def _measure(self, word: str) -> int:
+        # m in [C](VC){m}[V]
+        return self._cv(word).count("vc")
+
+    def _has_vowel(self, word: str) -> bool:
+        return 'v' in self._cv(word)
+
+    def _ends_cvc(self, word: str) -> bool:
+        # *o: stem ends consonant-vowel-consonant, the last one not w, x or y (or a 2 letters vc word)
+        cv = self._cv(word)
+        return (cv.endswith("cvc") and word[-1] not in "wxy") or cv == "vc"
+
+    def _apply(self, word: str, rules: dict, min_measure: int) -> str:
+        for suffix, replacement in rules.get(word[-1], ()):
+            if word.endswith(suffix):
+                stem = word[:-len(suffix)]
+                return stem + replacement if self._measure(stem) >= min_measure else word
+        return word
+
+    def _step1a(self, word: str) -> str:
+        if word.endswith("sses"):
+            return word[:-2]
+        if word.endswith("ies"):
+            return word[:-1] if len(word) == 4 else word[:-2]
+        if word.endswith("ss"):
+            return word
+        if word.endswith("s"):
+            return word[:-1]
+        return word
+
+    def _step1b(self, word: str) -> str:
+        if word.endswith("ied"):
+            return word[:-1] if len(word) == 4 else word[:-2]
+        if word.endswith("eed"):
+            return word[:-1] if self._measure(word[:-3]) > 0 else word
+
+        for suffix in ("ed", "ing"):
+            if word.endswith(suffix) and self._has_vowel(word[:-len(suffix)]):
+                stem = word[:-len(suffix)]
+                break
+        else:
+            return word
+
+        if stem.endswith(("at", "bl", "iz")):
+            return stem + "e"
+        if len(stem) >= 2 and stem[-1] == stem[-2] and self._cv(stem)[-1] == 'c':
+            return stem if stem[-1] in "lsz" else stem[:-1]
+        if self._measure(stem) == 1 and self._ends_cvc(stem):
+            return stem + "e"
+        return stem
+
+    def _step1c(self, word: str) -> str:
+        # y >> i when preceded by a consonant which is not the first letter
+        if word.endswith("y"):
+            stem = word[:-1]
+            return stem + "i" if len(stem) > 1 and self._cv(stem)[-1] == 'c' else word
+        return word
+
+    def _step2_rules(self, word: str) -> str:
+        # alli >> al first, then step 2 again on the result
+        if word.endswith("alli") and self._measure(word[:-4]) > 0:
+            return self._step2_rules(word[:-2])
+        if word.endswith("logi"):
+            # the 'l' stays in the stem so short stems (geo, theo) work as long ones (archaeo, philo)
+            return word[:-1] if self._measure(word[:-3]) > 0 else word
+        return self._apply(word, self._step2, 1)
+
+    def _step4_rules(self, word: str) -> str:
+        if word.endswith("ion"):
+            # (m>1 and (*S or *T)) ION >>
+            stem = word[:-3]
+            return stem if stem[-1:] in ("s", "t") and self._measure(stem) > 1 else word
+        return self._apply(word, self._step4, 2)
+
+    def _step5(self, word: str) -> str:
+        if word.endswith("e"):
+            stem = word[:-1]
+            m = self._measure(stem)
+            if m > 1 or (m == 1 and not self._ends_cvc(stem)):
+                word = stem
+        if word.endswith("ll") and self._measure(word[:-1]) > 1:
+            word = word[:-1]
+        return word
@@ -0,0 +1,54 @@
+import re
+from functools import lru_cache
+
+
+class TokenizerEngine:
+
+    # Compiled form of the Tokenizer char rules, output is identical to the char by char algorithm:
+    # 1. Punctuation which is not a word divider is dropped without splitting, unless it is a meaningful
+    #    punctuation followed by a letter / number (isalpha() or isnumeric() == regex [^\W_])
+    # 2. Word dividers split tokens, positions count the non empty tokens
+    # 3. Stop words are skipped (their position is kept), except the last token when nothing follows it
+    # Both steps run as a single compiled regex pass each (C loops instead of a python loop per char)
+
+    def __init__(self, word_divider: tuple, punct_marks: tuple, meaningful_puncts: tuple):
+
+        # multi char entries (e.g '...') never match a single char, the char loop ignores them too
+
+        dividers = {c for c in word_divider if len(c) == 1}
+        puncts = {c for c in punct_marks if len(c) == 1} - dividers
+        meaningful = puncts & set(meaningful_puncts)
+
+        drops = list()
+        if puncts - meaningful:
+            drops.append(self._char_class(puncts - meaningful))
+        if meaningful:
+            drops.append(self._char_class(meaningful) + r"(?![^\W_])")
+        self._drop = re.compile("|".join(drops)) if drops else None
+        self._token = re.compile("[^" + self._char_class(dividers)[1:] + "+" if dividers else ".+", re.DOTALL)
+        self._dividers = dividers
+
+    @staticmethod
+    def _char_class(chars: set) -> str:
+        return "[" + "".join(re.escape(c) for c in sorted(chars)) + "]"
+
+    def tokenize(self, s: str, stops: set = None) -> list:
+        s = s.strip()
+        if self._drop is not None:
+            s = self._drop.sub("", s)
+        words = self._token.findall(s)
+        if not words:
+            return []
+
+        if stops:
+            tokens = [(token, pos) for pos, token in enumerate(words, 1) if token not in stops]
+            if s[-1] not in self._dividers and words[-1] in stops:
+                tokens.append((words[-1], len(words)))
+            return tokens
+        return list(zip(words, range(1, len(words) + 1)))
+
+
+@lru_cache(maxsize=32)
+def compile_rules(word_divider: tuple, punct_marks: tuple, meaningful_puncts: tuple) -> TokenizerEngine:
+    # Engines are cached per rules set (tokenizers may change their rules, see UAXEmailTokenizer)
+    return TokenizerEngine(word_divider, punct_marks, meaningful_puncts)
@@ -3,6 +3,9 @@ from preprocessing.tokenize.tokenizer import Tokenizer
 
 class KeywordTokenizer(Tokenizer):
 
+    def __init__(self):
+        super().__init__(word_divider=[])  # never splits (a streaming Analyzer keeps the whole text)
+
     def tokenize(self, s: str, stops: set = None) -> list:
         # The keyword tokenizer is a “noop” tokenizer that accepts whatever text it
         #  is given and outputs the exact same text as a single term
@@ -18,6 +18,7 @@ class NGramTokenizer(Tokenizer):
         # min_g, max_g = Min, max length of characters in a gram.
         # Character classes that should be included in a token. split on characters that don’t
         # belong to the classes specified. Defaults to [] (keep all characters).
+        # Returns list of tuples (gram, position), grams get sequential positions (as ES)
 
         # "Quick Fox"
         # >> [ Q, Qu, u, ui, i, ic, c, ck, k, "k ", " ", " F", F, Fo, o, ox, x ]
@@ -30,7 +31,12 @@ class NGramTokenizer(Tokenizer):
         if edges:
             return self._edge_ngram(s, min_gram, max_gram, tok_chars)
 
-        return []           # TODO impl this
+        tokens = list()
+        for word in self._split(s, tok_chars):
+            for start in range(len(word)):
+                for n in range(min_gram, min(max_gram, len(word) - start) + 1):
+                    tokens.append((word[start:start + n], len(tokens) + 1))
+        return tokens
 
     def _edge_ngram(self, s: str, min_gram: int = 1, max_gram: int = 2, tok_chars: list=None) -> list:
 
@@ -47,33 +53,31 @@ class NGramTokenizer(Tokenizer):
         # "Quick2Fox" with token_chars == ["letter"], will split on "2" (~token_chars)
         # >> [Q, Qu, F, Fo]
 
-        split_regex = self._gen_reg_from_token_chars(tok_chars)
-        splitted = re.split(split_regex, s) if split_regex else [s]
-
         tokens = list()
-        for word in splitted:
-            cur_gram, chars, cur_idx = min_gram, list(), 0
-            while cur_idx < cur_gram <= max_gram and cur_gram <= len(word):
-                chars.append(word[cur_idx])
-                cur_idx += 1
-                if len(chars) == cur_gram:
-                    tokens.append("".join(chars))
-                    chars, cur_idx = list(), 0
-                    cur_gram += 1
+        for word in self._split(s, tok_chars):
+            for n in range(min_gram, min(max_gram, len(word)) + 1):
+                tokens.append((word[:n], len(tokens) + 1))
         return tokens
 
+    def _split(self, s: str, tok_chars: list) -> list:
+        split_regex = self._gen_reg_from_token_chars(tok_chars)
+        return re.split(split_regex, s) if split_regex else [s]
+
     def _gen_reg_from_token_chars(self, sep_lst: list) -> str:
-        separators = list()
+        # Splits on runs of chars which belong to none of the classes (e.g letter + digit keeps 'abc123')
+        classes = list()
         for sep in sep_lst:
             if sep == "letter":
-                separators.append(self.REGEX_NOT_WORD)
+                classes.append(self.REGEX_NOT_WORD)
             elif sep == "digit":
-                separators.append(self.REGEX_NOT_DIGIT)
+                classes.append(self.REGEX_NOT_DIGIT)
             elif sep == "whitespace":
-                separators.append(self.REGEX_NOT_WHITESPACE)
+                classes.append(r"[^\s]")
             elif sep == "punctuation" or sep == "symbol":
-                separators.append(self.REGEX_NOT_PUNCTUATION)
-        return "|".join(separators)  # create an OR regex
+                classes.append(self.REGEX_NOT_PUNCTUATION)
+        if not classes:
+            return ""
+        return "[^" + "".join(dict.fromkeys(c[2:-1] for c in classes)) + "]+"  # [^a-zA-Z] >> a-zA-Z
 
     def _assert_grams(self, min_gram, max_gram, tok_chars):
         assert 0 < min_gram < 25, 0 < max_gram < 25
@@ -1,5 +1,6 @@
 from nltk import word_tokenize, PorterStemmer
-from nltk.corpus import stopwords
+
+from preprocessing.tokenize.registry import STOPWORDS
 
 
 class NLTKTokenizer:
@@ -8,7 +9,7 @@ class NLTKTokenizer:
         return [word.lower() for word in word_tokenize(s) if word.isalpha()]
 
     def remove_stopwords_nltk(self, tokens: list) -> list:
-        stops = set(stopwords.words('english'))
+        stops = STOPWORDS.language('english')
         return [word for word in tokens if word not in stops]
 
     def stem_words_nltk(self, words: str) -> list:
@@ -0,0 +1,55 @@
+import threading
+from os import path, stat
+
+
+class StopwordsRegistry:
+
+    # Loads every stop words list once and hands out the same frozenset to all tokenizers / analyzers,
+    # Files are keyed by absolute path and re-read only when their mtime or size changes,
+    # languages are read from the NLTK stopwords corpus (imported on first use)
+
+    def __init__(self):
+        self._files = dict()      # abs path >> ((mtime, size), stops)
+        self._languages = dict()  # language >> stops
+        self._lock = threading.Lock()
+        self.loads = 0            # num of lists actually read (files or languages)
+
+    def from_file(self, fp: str) -> frozenset:
+
+        # Stop words file: one stop word per line (trailing whitespace ignored)
+
+        fp = path.abspath(fp)
+        st = stat(fp)
+        version = (st.st_mtime_ns, st.st_size)
+        cached = self._files.get(fp)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        with self._lock:
+            cached = self._files.get(fp)
+            if cached is None or cached[0] != version:
+                with open(fp, 'r') as f:
+                    cached = self._files[fp] = (version, frozenset(line.rstrip() for line in f))
+                self.loads += 1
+            return cached[1]
+
+    def language(self, language: str = 'english') -> frozenset:
+        stops = self._languages.get(language)
+        if stops is not None:
+            return stops
+
+        with self._lock:
+            if language not in self._languages:
+                from nltk.corpus import stopwords
+                self._languages[language] = frozenset(stopwords.words(language))
+                self.loads += 1
+            return self._languages[language]
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+            self._languages.clear()
+
+
+# Process wide registry
+STOPWORDS = StopwordsRegistry()
@@ -1,3 +1,4 @@
+from preprocessing.tokenize.registry import STOPWORDS
 from preprocessing.tokenize.tokenizer import Tokenizer
 
 
@@ -20,9 +21,6 @@ class StandardTokenizer(Tokenizer):
 
         return super().tokenize(s.lower(), stops)
 
-    def _build_stops(self, sf):
-        stops = set()
-        with open(sf, 'r') as f:
-            for line in f:
-                stops.add(line.rstrip())
-        return stops
+    def _build_stops(self, sf) -> frozenset:
+        # Read once per file version, shared by all tokenizers (see StopwordsRegistry)
+        return STOPWORDS.from_file(sf)
@@ -1,5 +1,4 @@
-from nltk.corpus import stopwords
-
+from preprocessing.tokenize.registry import STOPWORDS
 from preprocessing.tokenize.tokenizer import Tokenizer
 
 
@@ -7,7 +6,7 @@ class StopwordsTokenizer(Tokenizer):
 
     # ------------------
     # STOPWORDS:
-    ENG_STOPS = set(stopwords.words('english'))
+    ENG_STOPS = STOPWORDS.language('english')
     # ------------------
 
     def tokenize(self, s: str, sw_file=None, stops=ENG_STOPS, rmv_trail=True) -> list:
@@ -24,11 +23,7 @@ class StopwordsTokenizer(Tokenizer):
         # >> [2, QUICK, Brown-Foxes, jumped, lazy, dog's, bone.]
 
         if sw_file:
-            stops = set()
-            with open(sw_file, 'r') as f:
-                for line in f:
-                    stops.add(line.rstrip())
-                return self._stops_remover(s, stops, rmv_trail)
+            stops = STOPWORDS.from_file(sw_file)
         return self._stops_remover(s, stops, rmv_trail)
 
     def _stops_remover(self, s: str, stops: set, rmv_trail=True):
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 
+from preprocessing.tokenize.fast import compile_rules
+
 
 class Tokenizer(ABC):
     # Tokenizer names and behavior is borrowed from Elasticsearch,
@@ -27,26 +29,9 @@ class Tokenizer(ABC):
     @abstractmethod
     def tokenize(self, s: str, stops: set=None) -> list:
 
-        # General tokenizing algorithm, iterates on given string,
-        # Splits on given word dividers returns tokens as list of tuples (token, position)
-
-        if stops is None:
-            stops = set()
-
-        s = s.strip()
-        tokens, chars, pos = list(), list(), 1
-
-        for i in range(len(s)):
-            if s[i] in self._word_divider:
-                if chars:
-                    token, chars = "".join(chars), []
-                    if token not in stops:
-                        tokens.append((token, pos))
-                    pos += 1
-            elif s[i] in self.PUNCT_MARKS:
-                if s[i] in self._meaningful_puncts and i != len(s) - 1 and (s[i + 1].isalpha() or s[i + 1].isnumeric()):
-                    chars.append(s[i])
-            else: chars.append(s[i])
-
-        if chars: tokens.append(("".join(chars), pos))
-        return tokens
\ No newline at end of file
+        # General tokenizing algorithm, splits on given word dividers, drops punctuation marks
+        # (keeps meaningful ones followed by a letter / number) returns tokens as list of tuples (token, position)
+        # Rules are compiled into regexes once per rules set (see TokenizerEngine)
+
+        return compile_rules(tuple(self._word_divider), tuple(self.PUNCT_MARKS),
+                             tuple(self._meaningful_puncts)).tokenize(s, stops)
@@ -0,0 +1,111 @@
+from functools import reduce
+
+import numpy as np
+
+from indexer.docset import doc_id_array, member
+from search.model.boolean import BooleanSearch, PhraseSearch
+from search.query.cache import QueryCache
+from search.query.query import Query, BoolQuery, PhraseQuery
+
+
+class BatchSearch(BooleanSearch):
+
+    # Boolean and phrase retrieval of query batches on NumPy doc ids arrays:
+    # every distinct term of a batch is fetched once (in sorted term order) as a uint32 doc ids array,
+    # AND / OR / NOT are vectorized set kernels over those arrays (no per posting Python loop), equal queries
+    # and shared AND operands are evaluated once (see QueryCache). Phrases intersect the doc ids arrays first
+    # and check positions on the candidate docs only.
+    # Fetched terms belong to the running batch (or to the index version, for single queries),
+    # run one batch at a time per instance
+
+    def __init__(self, index: dict, cache_size: int = QueryCache.SIZE, ngram_k: int = 0):
+        super().__init__(index, cache_size, ngram_k)
+        self._fetched, self._fetched_version = dict(), None
+
+    def search_batch(self, queries: list) -> list:
+
+        # queries: BoolQuery, PhraseQuery or MultiTermQuery, returns the sorted doc ID's of each query,
+        # same results as BooleanSearch / PhraseSearch search on every single query
+
+        terms = set()
+        for sq in queries:
+            _collect_terms(sq, terms)
+        try:
+            for term in sorted(terms):
+                self.postings(term)
+            return [self.search(sq) for sq in queries]
+        finally:
+            self._fetched = dict()
+
+    def search(self, sq: Query) -> list:
+        if isinstance(sq, PhraseQuery):
+            if sq.is_empty():
+                return super().search(BoolQuery())
+            return self._cached(sq, lambda: self._phrase(sq))
+        return super().search(sq)
+
+    def _phrase(self, sq: PhraseQuery) -> list:
+        if not all(term in self.index for term in sq.terms):
+            return []
+        lists, arrays = zip(*(self._fetch(term) for term in sq.terms))
+        docs = reduce(self.intersect, sorted(arrays, key=len))
+        if not len(docs):
+            return []
+
+        # posting of each term for every candidate doc, located by one vectorized binary search per term
+        idx = [np.searchsorted(a, docs).tolist() for a in arrays]
+        return [doc_id for k, doc_id in enumerate(docs.tolist())
+                if PhraseSearch.pos_match([lst[i[k]].pos_list for lst, i in zip(lists, idx)], sq.slop)]
+
+    def postings(self, term: str) -> np.ndarray:
+        return self._fetch(term)[1]
+
+    def _fetch(self, term: str) -> tuple:
+
+        # (posting list, doc ids array) of term, fetched again once the index changed
+
+        version = getattr(self.index, 'version', None)
+        if self._fetched_version != version:
+            self._fetched, self._fetched_version = dict(), version
+        fetched = self._fetched.get(term)
+        if fetched is None:
+            pst_list = super().postings(term)
+            fetched = self._fetched[term] = pst_list, doc_id_array(pst_list)
+        return fetched
+
+    @staticmethod
+    def doc_ids(postings: np.ndarray) -> list:
+        return postings.tolist()
+
+    @staticmethod
+    def from_ids(ids) -> np.ndarray:
+        return np.asarray(ids, dtype=np.uint32)
+
+    @staticmethod
+    def intersect(p1: np.ndarray, p2: np.ndarray) -> np.ndarray:
+        # Binary search of every id of the shorter array in the longer one
+        short, long = (p1, p2) if len(p1) <= len(p2) else (p2, p1)
+        return short[member(short, long)]
+
+    @staticmethod
+    def union(p1: np.ndarray, p2: np.ndarray) -> np.ndarray:
+        return np.union1d(p1, p2)
+
+    @staticmethod
+    def union_all(lists: list) -> np.ndarray:
+        return np.unique(np.concatenate(lists)) if lists else np.empty(0, dtype=np.uint32)
+
+    @staticmethod
+    def difference(p1: np.ndarray, p2: np.ndarray) -> np.ndarray:
+        return p1[~member(p1, p2)]
+
+
+def _collect_terms(sq, terms: set):
+    # Plain terms of a (nested) query, MultiTermQuery terms are only known once expanded (fetched lazily)
+    if isinstance(sq, BoolQuery):
+        for q in sq.get_all():
+            _collect_terms(q, terms)
+    elif isinstance(sq, PhraseQuery):
+        terms.update(sq.terms)
+    elif not isinstance(sq, Query):
+        terms.add(sq)
@@ -1,5 +1,11 @@
 from abc import ABC, abstractmethod
+from heapq import merge
 
+from indexer.docset import DocSet
+from indexer.index import Posting
+from indexer.terms import TermDictionary
+from search.query.cache import QueryCache, query_key
+from search.query.processor import QueryProcessor
 from search.query.query import Query, BoolQuery, PhraseQuery
 
 
@@ -23,39 +29,82 @@ class SearchModel(ABC):
 
 class BooleanSearch(SearchModel):
 
+    # cache_size: num of query results (and of intermediate intersections) kept in the model QueryCache,
+    # 0 disables caching
+    # ngram_k: k of an NGramTermIndex built along the term dictionary, resolves leading wildcards ('*ink*')
+    # without scanning all terms. 0: none
+
+    def __init__(self, index: dict, cache_size: int = QueryCache.SIZE, ngram_k: int = 0):
+        super().__init__(index)
+        self._terms, self._terms_version = None, None
+        self.cache = QueryCache(cache_size) if cache_size else None
+        self.ngram_k = ngram_k
+
+    def term_dictionary(self) -> TermDictionary:
+
+        # Sorted term dictionary used to expand prefix / wildcard / range queries, the index one if it has
+        # one (CompactIndex, segments), else built once from the index keys (again when a DynamicIndex changes)
+
+        version = getattr(self.index, 'version', None)
+        if self._terms is None or self._terms_version != version:
+            terms = TermDictionary.of(self.index)
+            self._terms, self._terms_version = terms.with_ngrams(self.ngram_k) if self.ngram_k else terms, version
+        return self._terms
+
     def search(self, sq: BoolQuery) -> list:
 
-        # Performs a search from a given query in boolean retrieval model,
-        # Supports none-nested queries (for now) and returns sorted document ID's as result:
+        # Performs a search from a given (nested) query in boolean retrieval model, or a MultiTermQuery,
+        # the query is compiled into a cost based plan (see QueryProcessor), returns sorted document ID's
+        # An empty query matches all documents
 
-        if sq.is_empty():
-            return super().search(sq)
+        return self._cached(sq, lambda: QueryProcessor(self).search(BoolQuery() if sq.is_empty() else sq))
 
-        terms = sorted([self.index[term] for term in sq.get_all() if term in self.index], key=lambda t: t.df)
-        if not terms:
-            return []
+    def _cached(self, sq: Query, search) -> list:
+
+        # Result of sq from the cache, else of search() (then cached)
 
-        operator = self.build_operator(sq)
+        if self.cache is None:
+            return search()
+        version = self.cache.validate(self.index)
+        key = query_key(sq)
+        res = self.cache.results.get(key)
+        if res is None:
+            res = search()
+            self.cache.put(self.cache.results, key, res, version)
+        return list(res)
 
-        result, terms = terms[0].pst_list, terms[1:]
-        while terms and result:
-            result = operator(result, terms[0].pst_list)
-            terms = terms[1:]
-        return [p.id for p in result]
+    def explain(self, sq: BoolQuery) -> str:
+        # Executes sq and returns it plan with planned vs. actual cost per node
+        processor = QueryProcessor(self)
+        plan = processor.plan(sq)
+        processor.execute(plan)
+        return plan.explain()
 
-    def build_operator(self, sq: BoolQuery):
-        if sq.must:
-            return self.intersect
-        elif sq.should:
-            return self.union
-        else:
-            return self.difference
+    # Postings representation the QueryProcessor executes plans on: sorted posting lists
+
+    def postings(self, term: str):
+        return self.index[term].pst_list if term in self.index else []
+
+    @staticmethod
+    def doc_ids(postings) -> list:
+        return [p.id for p in postings]
+
+    @staticmethod
+    def from_ids(ids) -> list:
+        return [Posting(doc_id) for doc_id in ids]
+
+    # Length ratio from which intersect switches from a linear merge to galloping search
+    GALLOP_RATIO = 8
 
     @staticmethod
     def intersect(p1: list, p2: list) -> list:
 
-        # Performs linear merge of 2x sorted lists of postings,
-        # Returns the intersection between them (== matched documents):
+        # Intersection of 2x sorted lists of postings (== matched documents), returns postings of p1
+        # Similar lengths: linear merge. Skewed lengths: iterates the shorter list and gallops (exponential
+        # search) in the longer one, O(n log(m/n)) instead of O(n + m)
+
+        if min(len(p1), len(p2)) * BooleanSearch.GALLOP_RATIO < max(len(p1), len(p2)):
+            return BooleanSearch._gallop_intersect(p1, p2)
 
         res, i, j = list(), 0, 0
         while i < len(p1) and j < len(p2):
@@ -68,6 +117,42 @@ class BooleanSearch(SearchModel):
                 j += 1
         return res
 
+    @staticmethod
+    def _gallop_intersect(p1: list, p2: list) -> list:
+        short, long, res, j = (p1, p2, list(), 0) if len(p1) <= len(p2) else (p2, p1, list(), 0)
+        for p in short:
+            j = BooleanSearch.seek(long, p.id, j)
+            if j == len(long):
+                break
+            if long[j].id == p.id:
+                res.append(p if short is p1 else long[j])
+        return res
+
+    @staticmethod
+    def seek(pst: list, doc_id: int, lo: int = 0) -> int:
+
+        # Index of first posting at/after lo with id >= doc_id (len(pst) if none),
+        # uses the list skip pointers if it has any, else gallops from lo then binary searches the last step
+
+        if hasattr(pst, 'seek'):
+            return pst.seek(doc_id, lo)
+
+        n, step = len(pst), 1
+        if lo >= n or pst[lo].id >= doc_id:
+            return lo
+        while lo + step < n and pst[lo + step].id < doc_id:
+            lo += step
+            step *= 2
+        hi = min(lo + step, n)
+        lo += 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if pst[mid].id < doc_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
     @staticmethod
     def union(p1: list, p2: list) -> list:
 
@@ -89,55 +174,148 @@ class BooleanSearch(SearchModel):
         res += p1[i:] if i < len(p1) else p2[j:]
         return res
 
+    @staticmethod
+    def union_all(lists: list) -> list:
+
+        # Union of any num of posting lists, k-way heap merge of many lists (e.g. a prefix expanded
+        # to hundreds of terms)
+
+        if len(lists) == 2:
+            return BooleanSearch.union(*lists)
+        res = list()
+        for p in merge(*lists, key=lambda p: p.id):
+            if not res or res[-1].id != p.id:
+                res.append(p)
+        return res
+
     @staticmethod
     def difference(p1: list, p2: list) -> list:
-        doc_id2 = [p.id for p in p2]
-        return [p for p in p1 if p.id not in doc_id2]
+
+        # Postings of p1 whose id is not in p2, single forward pass over both sorted lists
+        # (seeking in p2 instead of the former O(n * m) membership test)
+
+        res, j = list(), 0
+        for p in p1:
+            j = BooleanSearch.seek(p2, p.id, j)
+            if j == len(p2) or p2[j].id != p.id:
+                res.append(p)
+        return res
+
+
+class BitmapSearch(BooleanSearch):
+
+    # Boolean retrieval on DocSets (roaring bitmaps) instead of posting lists: every term postings are
+    # converted once into a DocSet (bitmap containers for dense doc id ranges, sorted arrays for sparse ones),
+    # AND / OR / NOT run as NumPy kernels per container pair. Best with many very common terms
+    # Same results as BooleanSearch, positions are not available (no phrase search)
+
+    def __init__(self, index: dict, cache_size: int = QueryCache.SIZE, ngram_k: int = 0):
+        super().__init__(index, cache_size, ngram_k)
+        self._docsets, self._docsets_version = dict(), None
+
+    def postings(self, term: str) -> DocSet:
+        version = getattr(self.index, 'version', None)
+        if self._docsets_version != version:
+            self._docsets, self._docsets_version = dict(), version
+        docset = self._docsets.get(term)
+        if docset is None:
+            docset = self._docsets[term] = DocSet.from_postings(super().postings(term))
+        return docset
+
+    @staticmethod
+    def doc_ids(postings: DocSet) -> list:
+        return postings.ids().tolist()
+
+    @staticmethod
+    def from_ids(ids) -> DocSet:
+        return DocSet.from_ids(ids)
+
+    @staticmethod
+    def intersect(p1: DocSet, p2: DocSet) -> DocSet:
+        return p1 & p2
+
+    @staticmethod
+    def union(p1: DocSet, p2: DocSet) -> DocSet:
+        return p1 | p2
+
+    @staticmethod
+    def union_all(lists: list) -> DocSet:
+        # Smallest sets first, so the larger ones are merged (mostly word-wise) fewer times
+        res = DocSet([], [])
+        for docset in sorted(lists, key=len):
+            res = res | docset
+        return res
+
+    @staticmethod
+    def difference(p1: DocSet, p2: DocSet) -> DocSet:
+        return p1 - p2
 
 
 class PhraseSearch(BooleanSearch):
 
+    # Ordered phrase search with a slop: terms must appear in query order,
+    # each one at most slop positions after the previous one (slop == 1 >> exact phrase)
+
     def search(self, sq: PhraseQuery) -> list:
 
         if sq.is_empty():
-            return SearchModel.search(self, sq)
+            return BooleanSearch.search(self, BoolQuery())
+        return self._cached(sq, lambda: self._search(sq))
 
-        terms = sorted([self.index[term] for term in sq.terms if term in self.index], key=lambda t: t.df)
-        if not terms:
+    def _search(self, sq: PhraseQuery) -> list:
+        if not all(term in self.index for term in sq.terms):
             return []
-
-        result, terms = terms[0].pst_list, terms[1:]
-        while terms and result:
-            result = self.pos_intersect(result, terms[0].pst_list, slop=sq.slop)
-            terms = terms[1:]
-        return [p.id for p in result]
+        pst_lists = [self.index[term].pst_list for term in sq.terms]
+        return [doc_id for doc_id, postings in self.doc_intersect(pst_lists)
+                if self.pos_match([p.pos_list for p in postings], sq.slop)]
 
     @staticmethod
-    def pos_intersect(p1: list, p2: list, slop: int) -> list:
-
-        # Iterates on both posting lists, matches document id
-        # && tests if matched terms position are adjacent (|pos1 - pos2| < slop)
-
-        res, i, j = list(), 0, 0
-        while i < len(p1) and j < len(p2):
-            if p1[i].id == p2[j].id:
-                l, pp1, pp2 = list(), 0, 0
-                pos1, pos2 = p1[i].pos_list, p2[j].pos_list
-                while pp1 < len(pos1):
-                    while pp2 < len(pos2):
-                        if abs(pos1[pp1] - pos2[pp2]) <= slop:
-                            l.append(pos2[pp2])
-                        elif pos2[pp2] > pos1[pp1]:
-                            break
-                        pp2 += 1
-                    while l and abs(l[0] - pos1[pp1]) > slop:
-                        l.pop()
-                    if l:
-                        res.append(p1[i])
-                    pp1 += 1
-                i, j = i + 1, j + 1
-            elif p1[i].id < p2[j].id:
-                i += 1
+    def doc_intersect(pst_lists: list):
+
+        # Leapfrog intersection of all posting lists at once: every list seeks to the largest current id,
+        # Yields (doc id, [posting of each list]) of docs found in all lists, positions are never touched here
+
+        n, idx = len(pst_lists), [0] * len(pst_lists)
+        if not all(pst_lists):
+            return
+        target, k, agreed = pst_lists[0][0].id, 0, 0
+        while True:
+            pst = pst_lists[k]
+            idx[k] = BooleanSearch.seek(pst, target, idx[k])
+            if idx[k] == len(pst):
+                return
+            doc_id = pst[idx[k]].id
+            if doc_id == target:
+                agreed += 1
+                if agreed >= n:
+                    yield target, [pst_lists[j][idx[j]] for j in range(n)]
+                    idx[k] += 1
+                    if idx[k] == len(pst):
+                        return
+                    target, agreed = pst[idx[k]].id, 1
             else:
-                j += 1
-        return res
\ No newline at end of file
+                target, agreed = doc_id, 1
+            k = (k + 1) % n
+
+    @staticmethod
+    def pos_match(pos_lists: list, slop: int) -> bool:
+
+        # Single forward pass over the positions of all terms (in phrase order):
+        # reachable holds the positions of term i ending a valid partial phrase, a position q of term i + 1
+        # extends it iff some reachable p has q - slop <= p < q. Both lists are sorted so one pointer suffices,
+        # O(sum of positions) overall
+
+        reachable = pos_lists[0]
+        for positions in pos_lists[1:]:
+            extended, j = list(), 0
+            for q in positions:
+                while j < len(reachable) and reachable[j] < q - slop:
+                    j += 1
+                if j == len(reachable):
+                    break
+                if reachable[j] < q:
+                    extended.append(q)
+            if not extended:
+                return False
+            reachable = extended
+        return bool(reachable)
@@ -0,0 +1,227 @@
+from abc import ABC, abstractmethod
+from heapq import heappush, heappushpop, merge
+from itertools import groupby
+from math import log, sqrt
+from operator import itemgetter
+
+from indexer.index import Term
+from indexer.stats import DocStats
+from search.model.boolean import BooleanSearch, SearchModel
+from search.query.query import RankedQuery
+
+
+class Scorer(ABC):
+
+    # Relevance of a (term, document) pair from the term frequency (Posting.tf),
+    # the document frequency (Term.df) and the per document statistics computed at index time
+
+    def __init__(self):
+        self.stats = None
+
+    def prepare(self, stats: DocStats):
+        self.stats = stats
+
+    @abstractmethod
+    def score(self, tf: int, df: int, doc_id: int) -> float:
+        pass
+
+    def upper_bound(self, term) -> float:
+        # Max score the term can contribute to any document (scan of it postings)
+        return max((self.score(p.tf, term.df, p.id) for p in term.pst_list), default=0.0)
+
+
+class TFIDF(Scorer):
+
+    # Lucene's classic practical scoring function (Elasticsearch TF/IDF):
+    # tf = sqrt(freq), idf = 1 + ln(N / (df + 1)), norm = 1 / sqrt(doc length), score = tf * idf^2 * norm
+
+    def idf(self, df: int) -> float:
+        return 1 + log(self.stats.n / (df + 1))
+
+    def score(self, tf: int, df: int, doc_id: int) -> float:
+        idf = self.idf(df)
+        return sqrt(tf) * idf * idf * self.stats.norms[doc_id]
+
+
+class BM25(Scorer):
+
+    # Okapi BM25 (Elasticsearch default similarity):
+    # idf = ln(1 + (N - df + 0.5) / (df + 0.5)), tf saturates with k1 and is normalized by doc length with b
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        super().__init__()
+        self.k1 = k1
+        self.b = b
+
+    def idf(self, df: int) -> float:
+        return log(1 + (self.stats.n - df + 0.5) / (df + 0.5))
+
+    def score(self, tf: int, df: int, doc_id: int) -> float:
+        dl = self.stats.doc_lens[doc_id]
+        norm = self.k1 * (1 - self.b + self.b * dl / self.stats.avgdl)
+        return self.idf(df) * tf * (self.k1 + 1) / (tf + norm)
+
+
+class RankedSearch(SearchModel):
+
+    # Ranked retrieval model, scores the union of the query terms postings document at a time
+    # and keeps the k best documents in a bounded min-heap (O(n log k) instead of sorting all candidates)
+
+    # stats: DocStats of index as built, else the index own ones (DynamicIndex, maintained on every change),
+    # else recovered from the postings
+
+    def __init__(self, index, scorer: Scorer = None, stats: DocStats = None):
+        super().__init__(index)
+        self.stats = stats if stats is not None else self._index_stats()
+        self.scorer = scorer if scorer is not None else BM25()
+        self.scorer.prepare(self.stats)
+        self._version = getattr(index, 'version', None)
+
+    def _index_stats(self) -> DocStats:
+        stats = getattr(self.index, 'stats', None)
+        return stats if isinstance(stats, DocStats) else DocStats.from_index(self.index)
+
+    def refresh(self) -> bool:
+
+        # Switches to the index statistics if the index changed since the last call, returns whether it did
+
+        version = getattr(self.index, 'version', None)
+        if version == self._version:
+            return False
+        self.stats = self._index_stats()
+        self.scorer.prepare(self.stats)
+        self._version = version
+        return True
+
+    def search(self, sq: RankedQuery) -> list:
+
+        # Returns [(doc id, score)] of the k best documents, best first (ties: smaller doc id first)
+
+        if sq.is_empty():
+            return []
+        self.refresh()
+
+        terms = self.query_terms(sq)
+        heap = list()
+        for doc_id, group in groupby(merge(*(_stream(i, pst) for i, (_, pst) in enumerate(terms))),
+                                     key=itemgetter(0)):
+            score = 0.0
+            for _, i, tf in group:
+                score += self.scorer.score(tf, terms[i][0], doc_id)
+            self.offer(heap, sq.k, score, doc_id)
+        return self.top(heap)
+
+    def query_terms(self, sq: RankedQuery) -> list:
+        # (df, posting list) of distinct query terms found in index, in query order
+        terms = list()
+        for term in dict.fromkeys(sq.terms):
+            if term in self.index:
+                t = self.index[term]
+                terms.append((t.df, t.pst_list))
+        return terms
+
+    @staticmethod
+    def offer(heap: list, k: int, score: float, doc_id: int):
+
+        # Bounded min-heap of (score, -doc id), the root is the current k-th best document
+
+        if len(heap) < k:
+            heappush(heap, (score, -doc_id))
+        elif (score, -doc_id) > heap[0]:
+            heappushpop(heap, (score, -doc_id))
+
+    @staticmethod
+    def top(heap: list) -> list:
+        return [(-neg_id, score) for score, neg_id in sorted(heap, reverse=True)]
+
+
+class WANDSearch(RankedSearch):
+
+    # Ranked retrieval with WAND dynamic pruning (Broder et al. 2003),
+    # Every term has a score upper bound over the whole index, computed the first time the term is queried
+    # and recomputed after the index changed (a stale bound could be too low and prune a top-k document).
+    # Cursors are kept sorted by their current doc id, the pivot is the first cursor where the sum of upper
+    # bounds can beat the k-th best score so far: documents before the pivot are skipped (seek) without being
+    # scored.
+    # Returns exactly the same top-k as RankedSearch
+
+    # Upper bounds are inflated by this relative margin so float rounding never prunes a real candidate
+    EPSILON = 1e-9
+
+    def __init__(self, index, scorer: Scorer = None, stats: DocStats = None):
+        super().__init__(index, scorer, stats)
+        self._bounds = dict()
+        self.scored = 0  # num of fully scored documents (for benchmarking)
+
+    def refresh(self) -> bool:
+        if not super().refresh():
+            return False
+        self._bounds = dict()
+        return True
+
+    def upper_bound(self, term: str, t: Term = None) -> float:
+        # t: the Term of term when already fetched
+        bound = self._bounds.get(term)
+        if bound is None:
+            t = t if t is not None else self.index[term]
+            bound = self._bounds[term] = self.scorer.upper_bound(t) * (1 + self.EPSILON)
+        return bound
+
+    def search(self, sq: RankedQuery) -> list:
+        if sq.is_empty():
+            return []
+        self.refresh()
+
+        # cursor: [doc id, posting index, posting list, term index, df, upper bound]
+        cursors = list()
+        for i, term in enumerate(t for t in dict.fromkeys(sq.terms) if t in self.index):
+            t = self.index[term]
+            if t.df:
+                cursors.append([t.pst_list[0].id, 0, t.pst_list, i, t.df, self.upper_bound(term, t)])
+
+        heap = list()
+        while cursors:
+            cursors.sort(key=itemgetter(0))
+            pivot = self._pivot(cursors, heap[0][0] if len(heap) == sq.k else None)
+            if pivot is None:
+                break
+            doc_id = cursors[pivot][0]
+            if cursors[0][0] == doc_id:
+                matched = [c for c in cursors if c[0] == doc_id]
+                score = 0.0
+                for c in sorted(matched, key=itemgetter(3)):
+                    score += self.scorer.score(c[2][c[1]].tf, c[4], doc_id)
+                self.scored += 1
+                self.offer(heap, sq.k, score, doc_id)
+                for c in matched:
+                    self._advance(c, c[1] + 1)
+            else:
+                for c in cursors[:pivot]:
+                    self._advance(c, BooleanSearch.seek(c[2], doc_id, c[1]))
+            cursors = [c for c in cursors if c[0] is not None]
+        return self.top(heap)
+
+    @staticmethod
+    def _pivot(cursors: list, threshold):
+
+        # Index of the first cursor whose accumulated upper bound exceeds threshold (heap not full: 0)
+
+        if threshold is None:
+            return 0
+        acc = 0.0
+        for i, c in enumerate(cursors):
+            acc += c[5]
+            if acc > threshold:
+                return i
+        return None
+
+    @staticmethod
+    def _advance(cursor: list, i: int):
+        cursor[1] = i
+        cursor[0] = cursor[2][i].id if i < len(cursor[2]) else None
+
+
+def _stream(i: int, pst_list):
+    # Yields (doc id, term index, tf) of a posting list, merged by doc id then term index
+    for p in pst_list:
+        yield p.id, i, p.tf
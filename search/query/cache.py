@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+
+from search.query.query import Query, BoolQuery, PhraseQuery
+
+
+class LRUCache:
+
+    # Size bounded mapping evicting the least recently used entry, counts hits and misses.
+    # Safe to share between threads
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+
+        # Cached value of key or None
+
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class QueryCache:
+
+    # Cache of a search model over one index:
+    # results       >> normalized query >> sorted matched doc ID's
+    # intersections >> set of AND operands >> their intersected postings, shared by all queries
+    #                  (and nested sub queries) intersecting the same operands
+    # Both are emptied as soon as the index version changes (e.g. a DynamicIndex add / delete / merge).
+    # Only versioned or immutable indexes are supported: an index without a version (dict, CompactIndex,
+    # DiskIndex..) is never invalidated, modifying one in place requires a clear() of the cache.
+    # Entries are stored with the version read before computing them (see put), a result computed while the
+    # index changed is dropped rather than cached as current
+
+    SIZE = 1024
+
+    def __init__(self, size: int = SIZE, intersections_size: int = None):
+        self.results = LRUCache(size)
+        self.intersections = LRUCache(size if intersections_size is None else intersections_size)
+        self.version = None
+        self._lock = threading.Lock()
+
+    def validate(self, index):
+
+        # Invalidates all entries if index changed since the last call, returns the index version
+
+        version = getattr(index, 'version', None)
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self.results.clear()
+                    self.intersections.clear()
+                    self.version = version
+        return version
+
+    def put(self, entries: LRUCache, key, value, version):
+
+        # Caches value in entries (results or intersections) if it was computed at the current version,
+        # version: what validate returned before computing value
+
+        with self._lock:
+            if version == self.version:
+                entries.put(key, value)
+
+    def clear(self):
+        with self._lock:
+            self.results.clear()
+            self.intersections.clear()
+
+    def stats(self) -> dict:
+        return {name: {"size": len(cache), "hits": cache.hits, "misses": cache.misses}
+                for name, cache in [("results", self.results), ("intersections", self.intersections)]}
+
+
+def query_key(sq):
+
+    # Hashable normalized form of a query, equal for equivalent queries:
+    # must / should / must_not are order insensitive (and duplicates dropped), phrase terms keep their order
+
+    if isinstance(sq, BoolQuery):
+        return ("BOOL", frozenset(map(query_key, sq.must)), frozenset(map(query_key, sq.should)),
+                frozenset(map(query_key, sq.must_not)))
+    if isinstance(sq, PhraseQuery):
+        return "PHRASE", tuple(sq.terms), sq.slop
+    if isinstance(sq, Query):
+        return (type(sq).__name__,) + tuple((k, _freeze(v)) for k, v in sorted(vars(sq).items()))
+    return sq
+
+
+def _freeze(v):
+    return tuple(map(_freeze, v)) if isinstance(v, list) else v
@@ -0,0 +1,174 @@
+from search.query.query import BoolQuery, MultiTermQuery
+
+
+class PlanNode:
+
+    # Node of a boolean execution plan, op is one of TERM, AND, OR, NOT, ALL
+    # NOT has exactly 2 children: (positive, negative) >> positive minus negative
+
+    # estimate    >> planned result size (df for a term)
+    # cost        >> planned num of postings read by the node (sum of it children estimates)
+    # size        >> actual result size, None if the node was never executed (short-circuited)
+    # actual_cost >> actual num of postings read by the node
+
+    def __init__(self, op: str, children: list = None, term: str = None, estimate: int = 0, cost: int = 0):
+        self.op = op
+        self.children = children if children is not None else []
+        self.term = term
+        self.estimate = estimate
+        self.cost = cost
+        self.size = None
+        self.actual_cost = None
+
+    def explain(self, depth: int = 0) -> str:
+        name = "{} '{}'".format(self.op, self.term) if self.op == "TERM" else self.op
+        actual = "skipped" if self.size is None else "size={} cost={}".format(self.size, self.actual_cost)
+        lines = ["{}{} (planned: size={} cost={}, actual: {})".format(
+            "  " * depth, name, self.estimate, self.cost, actual)]
+        return "\n".join(lines + [child.explain(depth + 1) for child in self.children])
+
+    @property
+    def key(self):
+        # Normalized (operands order insensitive) form of the node, identifies it result in a QueryCache
+        if self.op == "TERM":
+            return self.term
+        if self.op == "NOT":
+            return self.op, self.children[0].key, self.children[1].key
+        return self.op, frozenset(child.key for child in self.children)
+
+    def __repr__(self):
+        return self.explain()
+
+
+class QueryProcessor:
+
+    # Compiles a (nested) BoolQuery into a plan of PlanNode and executes it with the operators of a
+    # BooleanSearch model (on it postings representation: posting lists, DocSets..). Semantics of a BoolQuery node:
+    # must >> AND of all, should >> OR of all (required when not empty), must_not >> OR of all excluded.
+    # A node with only must_not excludes from all docs, an empty node matches all docs.
+
+    # Planning rules:
+    # 1. AND operands are executed by increasing estimated size (df), so intermediates stay small
+    # 2. NOT is pushed after the positives as a single difference with the union of excluded operands
+    # 3. An empty intermediate short-circuits the rest of an AND (and the negatives of a NOT)
+    # 4. With a QueryCache (model.cache), every intersection of the first i operands of an AND is cached,
+    #    an AND resumes from the longest cached one (queries sharing their rarest terms share the work)
+
+    def __init__(self, model):
+        self.model = model
+        self.index = model.index
+        self.cache = getattr(model, 'cache', None)
+        self.version = self.cache.validate(self.index) if self.cache is not None else None
+        self._all = None
+
+    def search(self, sq: BoolQuery) -> list:
+        return self.model.doc_ids(self.execute(self.plan(sq)))
+
+    def plan(self, sq) -> PlanNode:
+
+        # sq: BoolQuery, MultiTermQuery (expanded into an OR of it terms) or a single term
+
+        if isinstance(sq, MultiTermQuery):
+            return self._union([self.plan(term) for term in sq.expand(self.model.term_dictionary())])
+        if not isinstance(sq, BoolQuery):
+            df = self.index[sq].df if sq in self.index else 0
+            return PlanNode("TERM", term=sq, estimate=df, cost=df)
+
+        positives = [self.plan(q) for q in sq.must]
+        if sq.should:
+            positives.append(self._union([self.plan(q) for q in sq.should]))
+        if len(positives) > 1:
+            positive = self._intersection(positives)
+        else:
+            positive = positives[0] if positives else self._all_docs()
+
+        if not sq.must_not:
+            return positive
+        negative = self._union([self.plan(q) for q in sq.must_not])
+        return PlanNode("NOT", [positive, negative], estimate=positive.estimate,
+                        cost=positive.estimate + negative.estimate)
+
+    def _intersection(self, nodes: list) -> PlanNode:
+        nodes = self.optimize_query(nodes)
+        return PlanNode("AND", nodes, estimate=nodes[0].estimate, cost=sum(n.estimate for n in nodes))
+
+    def _union(self, nodes: list) -> PlanNode:
+        if len(nodes) == 1:
+            return nodes[0]
+        nodes = self.optimize_query(nodes)  # merging small lists first keeps intermediates small
+        estimate = sum(n.estimate for n in nodes)
+        return PlanNode("OR", nodes, estimate=estimate, cost=estimate)
+
+    def _all_docs(self) -> PlanNode:
+        node = PlanNode("ALL")
+        if self._all is None:
+            self._all = self.cache.intersections.get(node.key) if self.cache is not None else None
+        if self._all is None:
+            ids = {p.id for term in self.index for p in self.index[term].pst_list}
+            self._all = self.model.from_ids(sorted(ids))
+            if self.cache is not None:
+                self.cache.put(self.cache.intersections, node.key, self._all, self.version)
+        node.estimate = node.cost = len(self._all)
+        return node
+
+    @staticmethod
+    def optimize_query(operands: list) -> list:
+
+        # Orders operands cheapest first (stable): plan nodes by estimate, terms by df, posting lists by length
+
+        return sorted(operands, key=QueryProcessor.estimate)
+
+    @staticmethod
+    def estimate(operand) -> int:
+        if isinstance(operand, PlanNode):
+            return operand.estimate
+        df = getattr(operand, 'df', None)
+        return df if df is not None else len(operand)
+
+    def _cached_intersection(self, children: list) -> tuple:
+
+        # (postings, i) of the longest cached intersection of children[:i], (None, 0) if none
+
+        for i in range(len(children), 1, -1):
+            res = self.cache.intersections.get(("AND", frozenset(c.key for c in children[:i])))
+            if res is not None:
+                return res, i
+        return None, 0
+
+    def execute(self, node: PlanNode) -> list:
+
+        # Returns the sorted postings matched by node, records actual size and cost on every executed node
+
+        if node.op == "TERM":
+            res = self.model.postings(node.term)
+            node.actual_cost = len(res)
+        elif node.op == "ALL":
+            res = self._all
+            node.actual_cost = len(res)
+        elif node.op == "AND":
+            res, node.actual_cost, start = None, 0, 0
+            if self.cache is not None:
+                res, start = self._cached_intersection(node.children)
+            for i in range(start, len(node.children)):
+                if res is not None and not len(res):
+                    break
+                other = self.execute(node.children[i])
+                node.actual_cost += len(other)
+                res = other if res is None else self.model.intersect(res, other)
+                if self.cache is not None and i:
+                    key = ("AND", frozenset(c.key for c in node.children[:i + 1]))
+                    self.cache.put(self.cache.intersections, key, res, self.version)
+        elif node.op == "OR":
+            lists = [self.execute(child) for child in node.children]
+            node.actual_cost = sum(len(lst) for lst in lists)
+            res = self.model.union_all(lists)
+        else:  # NOT
+            positive, negative = node.children
+            res = self.execute(positive)
+            node.actual_cost = len(res)
+            if len(res):
+                other = self.execute(negative)
+                node.actual_cost += len(other)
+                res = self.model.difference(res, other)
+        node.size = len(res)
+        return res
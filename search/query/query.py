@@ -54,4 +54,103 @@ class PhraseQuery(Query):
         self.slop = slop
 
     def is_empty(self) -> bool:
-        return not self.terms
\ No newline at end of file
+        return not self.terms
+
+
+class MultiTermQuery(Query):
+
+    # A query which expands to the terms of the index term dictionary it matches,
+    # matches documents of any of them (OR). Can be nested in a BoolQuery like a single term
+
+    def expand(self, terms) -> list:
+
+        # terms: a sorted TermDictionary, returns the sorted matched terms
+
+        return []
+
+
+class PrefixQuery(MultiTermQuery):
+
+    # "ink*" >> all terms starting with "ink"
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+
+    def is_empty(self) -> bool:
+        return not self.prefix
+
+    def expand(self, terms) -> list:
+        return terms.prefix(self.prefix)
+
+
+class WildcardQuery(MultiTermQuery):
+
+    # Wildcard pattern (as ES): '*' matches any chars sequence, '?' any single char
+    # "p?nk*" >> pink, punk, pinky..
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+
+    def is_empty(self) -> bool:
+        return not self.pattern
+
+    def expand(self, terms) -> list:
+        return terms.wildcard(self.pattern)
+
+
+class RangeQuery(MultiTermQuery):
+
+    # Terms between lower and upper in lexicographic order, None == unbounded
+    # RangeQuery("ink", "pink") >> ink, is, likes, pink
+
+    def __init__(self, lower: str = None, upper: str = None, include_lower: bool = True, include_upper: bool = True):
+        self.lower = lower
+        self.upper = upper
+        self.include_lower = include_lower
+        self.include_upper = include_upper
+
+    def is_empty(self) -> bool:
+        return self.lower is None and self.upper is None
+
+    def expand(self, terms) -> list:
+        return terms.range(self.lower, self.upper, self.include_lower, self.include_upper)
+
+
+class FuzzyQuery(MultiTermQuery):
+
+    # Terms within fuzziness Damerau-Levenshtein edits of term (as ES fuzzy query), resolves misspelled terms
+    # FuzzyQuery("drnik") >> drink, FuzzyQuery("pnk", fuzziness=1) >> ink, pink
+    # fuzziness: max edits or "AUTO" (0 edits for terms of 1-2 chars, 1 for 3-5, 2 for longer ones)
+    # prefix_length: num of leading chars which must match exactly, max_expansions: only the closest ones are kept
+
+    def __init__(self, term: str, fuzziness="AUTO", prefix_length: int = 0, max_expansions: int = 50):
+        self.term = term
+        self.fuzziness = fuzziness
+        self.prefix_length = prefix_length
+        self.max_expansions = max_expansions
+
+    def is_empty(self) -> bool:
+        return not self.term
+
+    def max_edits(self) -> int:
+        if self.fuzziness == "AUTO":
+            return 0 if len(self.term) <= 2 else 1 if len(self.term) <= 5 else 2
+        return int(self.fuzziness)
+
+    def expand(self, terms) -> list:
+        matched = terms.fuzzy(self.term, self.max_edits(), self.prefix_length)
+        closest = sorted(matched, key=lambda td: td[1])[:self.max_expansions]
+        return sorted(term for term, _ in closest)
+
+
+class RankedQuery(Query):
+
+    # Represents a free text query scored by a ranking model,
+    # Terms are OR-ed and only the k best scored documents are returned
+
+    def __init__(self, terms: list, k: int = 10):
+        self.terms = terms
+        self.k = k
+
+    def is_empty(self) -> bool:
+        return not self.terms or self.k <= 0
@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+
+class SearchClient:
+
+    # Minimal asyncio HTTP/1.1 JSON client of a SearchServer, keeps one connection alive
+    # (one request at a time per client, use several clients for concurrent load)
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8080):
+        self.host = host
+        self.port = port
+        self._reader, self._writer = None, None
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._reader, self._writer = None, None
+
+    async def search(self, query, size: int = None) -> dict:
+        body = {"query": query} if size is None else {"query": query, "size": size}
+        return (await self.request("POST", "/search", body))[1]
+
+    async def stats(self) -> dict:
+        return (await self.request("GET", "/stats"))[1]
+
+    async def request(self, method: str, target: str, body: dict = None) -> tuple:
+
+        # (status, json payload) of a request, reconnects if the server closed the connection
+
+        if self._writer is None:
+            await self.connect()
+        data = json.dumps(body).encode('utf-8') if body is not None else b""
+        self._writer.write("{} {} HTTP/1.1\r\nHost: {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n"
+                           .format(method, target, self.host, len(data)).encode('latin-1') + data)
+        await self._writer.drain()
+
+        status = int((await self._reader.readline()).split()[1])
+        headers = dict()
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(":")
+            headers[name.strip().lower()] = value.strip()
+        payload = json.loads(await self._reader.readexactly(int(headers.get("content-length", 0))))
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, payload
@@ -0,0 +1,52 @@
+from search.query.query import BoolQuery, PhraseQuery, PrefixQuery, WildcardQuery, FuzzyQuery, RangeQuery
+
+
+def parse_query(dsl):
+
+    # JSON query DSL (a subset of the Elasticsearch one) >> Query
+    # "ink"                                                    >> term
+    # {"bool": {"must": [..], "should": [..], "must_not": [..]}} >> BoolQuery, clauses are any (nested) query
+    # {"phrase": {"terms": ["pink", "ink"], "slop": 1}}        >> PhraseQuery (or {"phrase": ["pink", "ink"]})
+    # {"prefix": "in"}, {"wildcard": "?ink"}                   >> PrefixQuery, WildcardQuery
+    # {"fuzzy": "drnik"} or {"fuzzy": {"term": "drnik", "fuzziness": 1, "prefix_length": 0, "max_expansions": 50}}
+    # {"range": {"lower": "ink", "upper": "pink", "include_lower": true, "include_upper": true}}
+    # Raises ValueError on an invalid query
+
+    if isinstance(dsl, str):
+        return dsl
+    if not isinstance(dsl, dict) or len(dsl) != 1:
+        raise ValueError("a query is a term or an object with a single query type, got: {!r}".format(dsl))
+
+    kind, body = next(iter(dsl.items()))
+    try:
+        if kind == "bool":
+            unknown = set(body) - {"must", "should", "must_not"}
+            if unknown:
+                raise ValueError("unknown bool clauses: {}".format(sorted(unknown)))
+            return BoolQuery(**{clause: [parse_query(q) for q in _list(body[clause])] for clause in body})
+        if kind == "phrase":
+            body = {"terms": body} if isinstance(body, list) else body
+            return PhraseQuery(terms=[_term(t) for t in _list(body["terms"])], slop=int(body.get("slop", 1)))
+        if kind == "prefix":
+            return PrefixQuery(_term(body))
+        if kind == "wildcard":
+            return WildcardQuery(_term(body))
+        if kind == "fuzzy":
+            return FuzzyQuery(_term(body)) if isinstance(body, str) else FuzzyQuery(**body)
+        if kind == "range":
+            return RangeQuery(**body)
+    except (KeyError, TypeError) as e:
+        raise ValueError("invalid {} query: {!r} ({})".format(kind, body, e))
+    raise ValueError("unknown query type: {}".format(kind))
+
+
+def _list(v) -> list:
+    if not isinstance(v, list):
+        raise ValueError("expected a list, got: {!r}".format(v))
+    return v
+
+
+def _term(v) -> str:
+    if not isinstance(v, str):
+        raise ValueError("expected a term, got: {!r}".format(v))
+    return v
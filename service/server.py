@@ -0,0 +1,307 @@
+import asyncio
+import json
+import math
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from os import cpu_count, path
+from time import perf_counter
+
+from indexer.disk import DiskIndex, MANIFEST
+from indexer.index import Index
+from preprocessing.tokenize.stand import StandardTokenizer
+from search.model.boolean import BooleanSearch, PhraseSearch
+from search.query.cache import QueryCache, query_key
+from search.query.query import Query, BoolQuery, PhraseQuery, MultiTermQuery
+from service.dsl import parse_query
+from service.sharded import ShardedSearch
+
+
+def load_index(index_path: str):
+
+    # An on-disk index directory (opened through mmap, so worker processes share it pages),
+    # or a directory of documents (indexed in memory)
+
+    if path.exists(path.join(index_path, MANIFEST)):
+        return DiskIndex(index_path)
+    return Index(tokenizer=StandardTokenizer()).build(index_path, compact=True)
+
+
+class SearchService:
+
+    # Executes parsed queries on an index: PhraseQuery on a PhraseSearch, anything else on a BooleanSearch
+    # (both with their QueryCache). Safe to share between threads
+
+    def __init__(self, index, cache_size: int = QueryCache.SIZE):
+        self.index = index
+        self.boolean = BooleanSearch(index, cache_size)
+        self.phrase = PhraseSearch(index, cache_size)
+
+    def search(self, sq: Query) -> list:
+        return (self.phrase if isinstance(sq, PhraseQuery) else self.boolean).search(sq)
+
+    @property
+    def cache(self) -> QueryCache:
+        return self.boolean.cache
+
+    def cost(self, sq) -> float:
+
+        # Rough num of postings sq reads (inf when unknown before expansion: multi-term, match all queries)
+
+        if isinstance(sq, MultiTermQuery) or (isinstance(sq, BoolQuery) and sq.is_empty()):
+            return math.inf
+        if isinstance(sq, BoolQuery):
+            return sum(self.cost(q) for q in sq.get_all())
+        if isinstance(sq, PhraseQuery):
+            return 2 * sum(self.cost(term) for term in sq.terms)  # doc ids + positions
+        return self.index[sq].df if sq in self.index else 0
+
+
+# SearchService of a worker process (process pools), opened by the pool initializer
+_worker_service = None
+
+
+def _init_worker(index_path: str, cache_size: int):
+    global _worker_service
+    _worker_service = SearchService(load_index(index_path), cache_size)
+
+
+def _worker_search(sq: Query) -> list:
+    return _worker_service.search(sq)
+
+
+class LatencyStats:
+
+    # Latencies of the last `window` requests, reports count, mean and percentiles in ms
+
+    def __init__(self, window: int = 10000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def percentiles(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {"count": self.count}
+        at = lambda q: round(1000 * samples[min(len(samples) - 1, int(q * len(samples)))], 3)
+        return {"count": self.count, "mean": round(1000 * sum(samples) / len(samples), 3),
+                "p50": at(0.50), "p90": at(0.90), "p99": at(0.99), "max": round(1000 * samples[-1], 3)}
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class SearchServer:
+
+    # asyncio HTTP/1.1 JSON search server (stdlib only), routes:
+    # POST /search  {"query": <query DSL, see service.dsl>, "size": n}  >> {"total", "hits", "took_ms"}
+    # GET  /stats   >> latency percentiles per route, in flight / coalesced / offloaded counters, cache stats
+    # GET  /health  >> {"status": "ok"}
+
+    # Connections are kept alive (HTTP/1.1) and served concurrently by the event loop.
+    # Queries reading less than inline_cost postings run right on the event loop, heavier ones are offloaded
+    # to a pool of worker threads, or processes (given index_path, each worker opens the index itself:
+    # an on-disk index is memory mapped once and shared by all of them) so the loop stays responsive.
+    # Identical in flight queries (same normalized query) are coalesced: executed once, awaited by all
+    # With shards > 0 (index_path: a directory of documents) queries are scattered to a ShardedSearch instead,
+    # the pool threads only wait for the shard processes
+
+    INLINE_COST = 2000
+    MAX_BODY = 1 << 20
+    REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+    def __init__(self, index=None, index_path: str = None, host: str = "127.0.0.1", port: int = 8080,
+                 workers: int = None, processes: bool = False, inline_cost: int = INLINE_COST,
+                 cache_size: int = QueryCache.SIZE, shards: int = 0):
+        if index is None and index_path is None:
+            raise ValueError("an index or an index_path is required")
+        if processes and index_path is None:
+            raise ValueError("worker processes open the index from index_path")
+        if shards and (index_path is None or processes):
+            raise ValueError("shards are built from the documents of index_path, by their own processes")
+        if shards:
+            self.service = ShardedSearch(index_path, shards)
+        else:
+            self.service = SearchService(index if index is not None else load_index(index_path), cache_size)
+        self.host = host
+        self.port = port
+        self.workers = workers or cpu_count() or 1
+        self.inline_cost = inline_cost
+        self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(index_path, cache_size)) \
+            if processes else ThreadPoolExecutor(self.workers)
+        self._server = None
+        self._in_flight = dict()  # normalized query >> future of it result
+        self.latency = {route: LatencyStats() for route in ["/search", "/stats", "/health"]}
+        self.counters = {"connections": 0, "coalesced": 0, "offloaded": 0, "inline": 0, "errors": 0}
+
+    async def start(self) -> int:
+
+        # Starts listening, returns the bound port (port 0 >> any free port)
+
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._pool.shutdown(wait=True)
+        if isinstance(self.service, ShardedSearch):
+            self.service.close()
+
+    async def search(self, sq: Query) -> list:
+
+        # Result of sq, coalesced with an identical query in flight, executed inline or in the pool by cost
+
+        key = query_key(sq)
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        future = self._in_flight[key] = asyncio.get_running_loop().create_future()
+        try:
+            if self.service.cost(sq) <= self.inline_cost:
+                self.counters["inline"] += 1
+                res = self.service.search(sq)
+            else:
+                self.counters["offloaded"] += 1
+                res = await asyncio.get_running_loop().run_in_executor(self._pool, self._search_fn(), sq)
+            future.set_result(res)
+            return res
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved here, waiters still get it raised
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def _search_fn(self):
+        return _worker_search if isinstance(self._pool, ProcessPoolExecutor) else self.service.search
+
+    def stats(self) -> dict:
+        return {"latency_ms": {route: stats.percentiles() for route, stats in self.latency.items()},
+                "in_flight": len(self._in_flight), "workers": self.workers,
+                "cache": self.service.cache.stats() if getattr(self.service, 'cache', None) else None,
+                **self.counters}
+
+    # HTTP
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+
+        # Serves the requests of one connection until the client closes it (or asks to)
+
+        self.counters["connections"] += 1
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._respond(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, keep_alive, body = request
+                start = perf_counter()
+                status, payload = await self._dispatch(method, target, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if target in self.latency:
+                    self.latency[target].add(perf_counter() - start)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+
+        # (method, target, keep alive, body) of the next request, None once the connection is closed
+
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, version = line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+        headers = dict()
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(400, "invalid content-length")
+        if length > self.MAX_BODY:
+            raise HTTPError(413, "request body over {} bytes".format(self.MAX_BODY))
+        body = await reader.readexactly(length) if length else b""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+        return method.upper(), target.split("?")[0], keep_alive, body
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> tuple:
+        routes = {"/search": ("POST", self._search_route), "/stats": ("GET", self._stats_route),
+                  "/health": ("GET", self._health_route)}
+        if target not in routes:
+            return 404, {"error": "no route {}".format(target)}
+        if method != routes[target][0]:
+            return 405, {"error": "{} expects {}".format(target, routes[target][0])}
+        try:
+            return 200, await routes[target][1](body)
+        except HTTPError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            self.counters["errors"] += 1
+            return 500, {"error": "{}: {}".format(type(e).__name__, e)}
+
+    async def _search_route(self, body: bytes) -> dict:
+        start = perf_counter()
+        try:
+            request = json.loads(body or b"{}")
+            sq = parse_query(request.get("query", {"bool": {}}))
+            size = request.get("size")
+        except (ValueError, AttributeError) as e:
+            raise HTTPError(400, str(e))
+        if size is not None and (not isinstance(size, int) or size < 0):
+            raise HTTPError(400, "size must be a non negative int")
+        if not isinstance(sq, Query):
+            sq = BoolQuery(must=[sq])  # a single term
+        hits = await self.search(sq)
+        return {"total": len(hits), "hits": hits if size is None else hits[:size],
+                "took_ms": round(1000 * (perf_counter() - start), 3)}
+
+    async def _stats_route(self, body: bytes) -> dict:
+        return self.stats()
+
+    async def _health_route(self, body: bytes) -> dict:
+        return {"status": "ok"}
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool):
+        body = json.dumps(payload).encode('utf-8')
+        head = "HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\nConnection: {}\r\n\r\n" \
+            .format(status, self.REASONS.get(status, ""), len(body), "keep-alive" if keep_alive else "close")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
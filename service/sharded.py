@@ -0,0 +1,145 @@
+import math
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from heapq import merge
+from itertools import chain
+from os import listdir
+
+from indexer.index import Index
+from indexer.parallel import ParallelIndex
+from preprocessing.tokenize.stand import StandardTokenizer
+from preprocessing.tokenize.tokenizer import Tokenizer
+from search.model.boolean import BooleanSearch, PhraseSearch
+from search.model.ranked import RankedSearch, Scorer
+from search.query.query import Query, PhraseQuery, RankedQuery
+
+
+class Shard:
+
+    # Index of a contiguous range of documents with it own search models, lives in a shard worker process
+
+    def __init__(self, index, stats, scorer: Scorer = None):
+        self.index = index
+        self.boolean = BooleanSearch(index)
+        self.phrase = PhraseSearch(index)
+        self.ranked = ShardRankedSearch(index, scorer, stats)
+
+    def search(self, sq: Query) -> list:
+        return (self.phrase if isinstance(sq, PhraseQuery) else self.boolean).search(sq)
+
+    def doc_stats(self) -> tuple:
+        # (num of docs, total doc length) of the shard
+        return self.ranked.stats.n, sum(self.ranked.stats.doc_lens.values())
+
+    def set_collection_stats(self, n: int, avgdl: float):
+        self.ranked.stats.n, self.ranked.stats.avgdl = n, avgdl
+
+    def dfs(self, terms: list) -> dict:
+        return {term: self.index[term].df for term in terms if term in self.index}
+
+    def search_ranked(self, sq: RankedQuery, dfs: dict) -> list:
+        return self.ranked.search_with_dfs(sq, dfs)
+
+
+class ShardRankedSearch(RankedSearch):
+
+    # RankedSearch of a shard scoring with collection wide statistics, so shard scores are comparable:
+    # doc count and average doc length (set once, see Shard.set_collection_stats) and the query terms
+    # document frequencies (summed over all shards for every query)
+
+    _dfs = None
+
+    def search_with_dfs(self, sq: RankedQuery, dfs: dict) -> list:
+        self._dfs = dfs
+        try:
+            return self.search(sq)
+        finally:
+            self._dfs = None
+
+    def query_terms(self, sq: RankedQuery) -> list:
+        terms = super().query_terms(sq)
+        if self._dfs is None:
+            return terms
+        names = [term for term in dict.fromkeys(sq.terms) if term in self.index]
+        return [(self._dfs.get(name, df), pst) for name, (df, pst) in zip(names, terms)]
+
+
+# Shard of a worker process, opened by the pool initializer
+_shard = None
+
+
+def _open_shard(tokenizer: Tokenizer, scorer: Scorer, dir_path: str, files: list, first_id: int):
+    global _shard
+    indexer = Index(tokenizer)
+    index = indexer.build_docs(Index._read_files(dir_path, files, first_id, indexer.chunk_size), compact=True)
+    _shard = Shard(index, indexer.stats, scorer)
+
+
+def _call(method: str, *args):
+    return getattr(_shard, method)(*args)
+
+
+class ShardedSearch:
+
+    # Scatter-gather search over documents partitioned across N local worker processes:
+    # the sorted documents of a directory are split into N contiguous ranges (doc ids stay global, as with
+    # ParallelIndex), every shard process builds and holds the index of it range.
+    # A query is scattered to all shards and their results gathered:
+    # BoolQuery / PhraseQuery (/ MultiTermQuery) >> k-way merge of the sorted doc ids of every shard
+    # RankedQuery                                >> global dfs are gathered first (a DFS phase, as ES
+    #                                               dfs_query_then_fetch), then merge of the shards top k
+    # Each shard is GIL free from the others, queries run on all shards in parallel.
+    # Thread safe: concurrent queries are queued per shard
+
+    def __init__(self, dir_path: str, shards: int = 2, tokenizer: Tokenizer = None, scorer: Scorer = None):
+        tokenizer = tokenizer if tokenizer is not None else StandardTokenizer()
+        parts, first_id = ParallelIndex._split(sorted(listdir(dir_path)), shards), 1
+        self._pools = list()
+        for files in parts:
+            self._pools.append(ProcessPoolExecutor(1, initializer=_open_shard,
+                                                   initargs=(tokenizer, scorer, dir_path, files, first_id)))
+            first_id += len(files)
+
+        # collection wide ranking statistics (also waits until all shards are indexed)
+        n, total = map(sum, zip(*self._scatter("doc_stats"))) if self._pools else (0, 0)
+        self.n_docs = n
+        self._scatter("set_collection_stats", n, total / n if n else 0.0)
+
+    @property
+    def shards(self) -> int:
+        return len(self._pools)
+
+    def search(self, sq: Query) -> list:
+        if isinstance(sq, RankedQuery):
+            return self.search_ranked(sq)
+        return list(merge(*self._scatter("search", sq)))
+
+    def search_ranked(self, sq: RankedQuery) -> list:
+
+        # [(doc id, score)] of the k best documents of all shards, best first (ties: smaller doc id first)
+
+        if sq.is_empty():
+            return []
+        dfs = Counter()
+        for shard_dfs in self._scatter("dfs", list(dict.fromkeys(sq.terms))):
+            dfs.update(shard_dfs)
+        tops = self._scatter("search_ranked", sq, dict(dfs))
+        return sorted(chain(*tops), key=lambda doc: (-doc[1], doc[0]))[:sq.k]
+
+    def cost(self, sq) -> float:
+        # Every query is a scatter-gather (see SearchServer, never run on the event loop)
+        return math.inf
+
+    def _scatter(self, method: str, *args) -> list:
+        futures = [pool.submit(_call, method, *args) for pool in self._pools]
+        return [future.result() for future in futures]
+
+    def close(self):
+        for pool in self._pools:
+            pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
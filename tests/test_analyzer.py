@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from os.path import join, dirname
+
+from indexer.index import Index
+from preprocessing.analyzer import Analyzer, read_chunks
+from preprocessing.tokenize.keyword import KeywordTokenizer
+from preprocessing.tokenize.registry import StopwordsRegistry, STOPWORDS
+from preprocessing.tokenize.stand import StandardTokenizer
+
+
+class TestAnalyzer(unittest.TestCase):
+
+    def test_chunked_tokenize(self):
+        # tokens and positions do not depend on where chunks are cut
+        text = "He likes to wink, he likes to drink. Dog's bone-ink $5.51 (you) ever_5speak!"
+        expected = StandardTokenizer().tokenize(text)
+        for size in [1, 2, 3, 7, 100]:
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            self.assertListEqual(expected, list(Analyzer(StandardTokenizer()).analyze(chunks)))
+
+    def test_pipeline_stages(self):
+        analyzer = Analyzer(StandardTokenizer(), stops={"to", "he"})
+        self.assertListEqual([("likes", 2), ("wink", 4), ("likes", 6), ("drink", 8)],
+                             analyzer.tokenize("He likes to WINK, he likes to drink"))
+        self.assertListEqual([("new york", 1)], Analyzer(KeywordTokenizer(), chunk_size=2).tokenize("New York"))
+
+    def test_read_chunks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fp = os.path.join(tmp, "doc")
+            with open(fp, 'w') as f:
+                f.write("pink\nink " * 1000)
+            chunks = list(read_chunks(fp, chunk_size=64))
+            self.assertTrue(all(len(chunk) <= 64 for chunk in chunks))
+            self.assertEqual("pink ink " * 1000, "".join(chunks))
+            tokens = list(Analyzer(StandardTokenizer(), chunk_size=64).analyze_file(fp))
+            self.assertEqual(2000, len(tokens))
+            self.assertEqual(("ink", 2000), tokens[-1])
+
+    def test_streaming_index(self):
+        fp = join(dirname(__file__), "files", "indexer", "docs")
+        expected = Index(StandardTokenizer()).build(fp)
+        index = Index(Analyzer(StandardTokenizer(), chunk_size=4)).build(fp)
+        self.assertListEqual(sorted(expected), sorted(index))
+        for term in expected:
+            self.assertListEqual([(p.id, p.pos_list) for p in expected[term].pst_list],
+                                 [(p.id, p.pos_list) for p in index[term].pst_list])
+
+    def test_stopwords_registry(self):
+        registry = StopwordsRegistry()
+        with tempfile.TemporaryDirectory() as tmp:
+            fp = os.path.join(tmp, "stops.txt")
+            with open(fp, 'w') as f:
+                f.write("to\nhe \n")
+            stops = registry.from_file(fp)
+            self.assertEqual(frozenset(["to", "he"]), stops)
+            self.assertIs(stops, registry.from_file(os.path.join(tmp, ".", "stops.txt")))
+            self.assertEqual(1, registry.loads)
+
+            # a modified file is read again
+            with open(fp, 'w') as f:
+                f.write("likes\n")
+            self.assertEqual(frozenset(["likes"]), registry.from_file(fp))
+            self.assertEqual(2, registry.loads)
+
+    def test_analyzer_stops_file(self):
+        fp = join(dirname(__file__), "files", "tokenize", "stops.txt")
+        analyzer = Analyzer(StandardTokenizer(), stops=fp)
+        self.assertIs(STOPWORDS.from_file(fp), analyzer.stops)
+        self.assertListEqual([("awake", 2), ("or", 3), ("asleep", 4)], analyzer.tokenize("im awake or asleep a"))
@@ -1,9 +1,16 @@
+import tempfile
 import unittest
 
+from indexer.disk import DiskIndex, write_segment
+from indexer.dynamic import DynamicIndex
 from indexer.index import Index, Posting
 from preprocessing.tokenize.stand import StandardTokenizer
-from search.model.boolean import BooleanSearch, PhraseSearch
-from search.query.query import BoolQuery, PhraseQuery
+from search.model.batch import BatchSearch
+from search.model.boolean import BooleanSearch, PhraseSearch, BitmapSearch
+from search.query.cache import QueryCache, query_key
+from search.query.processor import QueryProcessor
+from search.query.query import BoolQuery, PhraseQuery, PrefixQuery, WildcardQuery, RangeQuery, \
+    FuzzyQuery
 
 
 class TestBooleanSearch(unittest.TestCase):
@@ -27,7 +34,13 @@ class TestBooleanSearch(unittest.TestCase):
         result = [p.id for p in BooleanSearch.difference(p1, p2)]
         self.assertListEqual([2, 6], result)
 
-    @unittest.skip
+    def test_skewed_intersection(self):
+        # rare vs. common term >> galloping search in the long list
+        p1, p2 = (self.init_posting_from_ids(lst) for lst in [[5, 300, 999], list(range(0, 1000, 3))])
+        self.assertListEqual([300, 999], [p.id for p in BooleanSearch.intersect(p1, p2)])
+        self.assertListEqual([300, 999], [p.id for p in BooleanSearch.intersect(p2, p1)])
+        self.assertListEqual([5], [p.id for p in BooleanSearch.difference(p1, p2)])
+
     def test_simple_query_optimization(self):
         t1, t2, t3 = (self.init_posting_from_ids(lst) for lst in [[1, 2, 4, 11, 31, 45, 173, 174],
                                                                   [1, 2, 4, 5, 6, 16, 57, 132, 140],
@@ -53,12 +66,36 @@ class TestBooleanSearch(unittest.TestCase):
         result = model.search(BoolQuery(should=t2_or))
         self.assertListEqual([1, 3, 4, 5], result)
 
-    @unittest.skip("think on NOT alg")
     def test_not_boolean_search(self):
-        t3_not = ["drink", "and"]   # "drink" NOT "and"
+        # "drink" NOT "and"
         model = BooleanSearch(self._index)
-        result = model.search(BoolQuery(must_not=t3_not))
+        result = model.search(BoolQuery(must=["drink"], must_not=["and"]))
         self.assertListEqual([1, 3, 4], result)
+        self.assertListEqual([1, 3, 4], model.search(BoolQuery(must_not=["and"])))
+
+    def test_nested_boolean_search(self):
+        model = BooleanSearch(self._index)
+        # ('wink' AND 'ink') OR ('thing' AND 'drink')
+        query = BoolQuery(should=[BoolQuery(["wink", "ink"]), BoolQuery(["thing", "drink"])])
+        self.assertListEqual([3, 5], model.search(query))
+        # 'drink' AND ('wink' OR 'ink') AND NOT 'pink'
+        query = BoolQuery(must=["drink"], should=["wink", "ink"], must_not=["pink"])
+        self.assertListEqual([1, 3], model.search(query))
+        self.assertListEqual([], model.search(BoolQuery(["drink", "wine"])))
+
+    def test_query_plan(self):
+        processor = QueryProcessor(BooleanSearch(self._index))
+        plan = processor.plan(BoolQuery(must=["drink", "wine", "pink"], must_not=["and"]))
+        self.assertEqual("NOT", plan.op)
+        intersection = plan.children[0]
+        self.assertListEqual(["wine", "pink", "drink"], [n.term for n in intersection.children])
+        self.assertEqual(0, intersection.estimate)
+        self.assertListEqual([], processor.execute(plan))
+        # empty intermediate >> remaining operands and negatives are never read
+        self.assertListEqual([0, None, None], [n.size for n in intersection.children])
+        self.assertIsNone(plan.children[1].size)
+        self.assertEqual(0, plan.actual_cost)
+        self.assertIn("TERM 'drink' (planned: size=5 cost=5, actual: skipped)", plan.explain())
 
     def test_phrase_search(self):
         phrase = ["drink", "pink", "ink"]
@@ -78,5 +115,149 @@ class TestBooleanSearch(unittest.TestCase):
         result = model.search(PhraseQuery(terms=phrase))
         self.assertListEqual([], result)
 
+    def test_ordered_phrase_search(self):
+        model = PhraseSearch(self._index)
+        self.assertListEqual([], model.search(PhraseQuery(terms=["ink", "pink"])))
+        self.assertListEqual([], model.search(PhraseQuery(terms=["drink", "likes"], slop=2)))
+        self.assertListEqual([4], model.search(PhraseQuery(terms=["ink", "he", "drink", "pink"], slop=3)))
+        self.assertListEqual([1, 2, 3, 4], model.search(PhraseQuery(terms=["likes", "drink"], slop=2)))
+
+    def test_search_on_compact_index(self):
+        compact = Index(tokenizer=StandardTokenizer()).build("files\indexer\\docs", compact=True)
+        queries = [BoolQuery(), BoolQuery(["and", "he", "ink"]), BoolQuery(should=["wink", "ink"])]
+        for query in queries:
+            self.assertListEqual(BooleanSearch(self._index).search(query), BooleanSearch(compact).search(query))
+        phrase = PhraseQuery(terms=["likes", "drink"], slop=2)
+        self.assertListEqual(PhraseSearch(self._index).search(phrase), PhraseSearch(compact).search(phrase))
+
+    def test_search_on_disk_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_segment(self._index, tmp)
+            with DiskIndex(tmp) as disk:
+                query = BoolQuery(["and", "he", "ink"])
+                self.assertListEqual(BooleanSearch(self._index).search(query), BooleanSearch(disk).search(query))
+                phrase = PhraseQuery(terms=["drink", "pink", "ink"])
+                self.assertListEqual([5], PhraseSearch(disk).search(phrase))
+
+    def test_multi_term_queries(self):
+        compact = Index(tokenizer=StandardTokenizer()).build("files\indexer\\docs", compact=True)
+        for index in [self._index, compact]:
+            model = BooleanSearch(index)
+            self.assertListEqual([3, 4, 5], model.search(PrefixQuery("in")))              # ink
+            self.assertListEqual([1, 4, 5], model.search(WildcardQuery("?ink")))       # pink, wink
+            self.assertListEqual([3], model.search(WildcardQuery("*hi*")))             # thing
+            self.assertListEqual([], model.search(WildcardQuery("x*")))
+            self.assertListEqual([3, 4, 5], model.search(RangeQuery("ink", "is", include_upper=False)))
+            # 'drink' AND (wink OR pink) NOT th*
+            query = BoolQuery(must=["drink", WildcardQuery("?ink")], must_not=[PrefixQuery("th")])
+            self.assertListEqual([1, 5], model.search(query))
+            # misspelled terms
+            self.assertListEqual([1, 2, 3, 4, 5], model.search(FuzzyQuery("drnik")))    # drink
+            self.assertListEqual([3, 4, 5], model.search(FuzzyQuery("pnk", fuzziness=1)))  # ink, pink
+            self.assertListEqual([1, 5], model.search(FuzzyQuery("wnk", fuzziness=1, prefix_length=1)))
+            self.assertListEqual([3], model.search(BoolQuery(must=[FuzzyQuery("thnig"), "drink"])))
+
+    def test_ngram_wildcards(self):
+        compact = Index(tokenizer=StandardTokenizer()).build("files\\indexer\\docs", compact=True)
+        queries = [WildcardQuery("*ink*"), WildcardQuery("*nk"), WildcardQuery("?ink"), WildcardQuery("*i?k"),
+                   WildcardQuery("*hi*"), WildcardQuery("*x*"), WildcardQuery("*"), WildcardQuery("d*k"),
+                   BoolQuery(must=["drink", WildcardQuery("*in?")], must_not=[WildcardQuery("*hin*")])]
+        for index in [self._index, compact]:
+            model = BooleanSearch(index, ngram_k=3)
+            self.assertIsNotNone(model.term_dictionary().ngrams)
+            for query in queries:
+                self.assertListEqual(BooleanSearch(index).search(query), model.search(query))
+            self.assertListEqual([1, 2, 3, 4, 5], model.search(WildcardQuery("*ink*")))  # drink, ink, pink, wink
+
+        # the k-gram index follows a DynamicIndex
+        index = DynamicIndex(StandardTokenizer(), compact, background=False)
+        model = BooleanSearch(index, ngram_k=3)
+        self.assertListEqual([], model.search(WildcardQuery("*inky")))
+        doc_id = index.add("inky pinky")
+        self.assertListEqual([doc_id], model.search(WildcardQuery("*inky")))
+
+    def test_bitmap_search(self):
+        queries = [BoolQuery(["he", "likes"]), BoolQuery(must=["drink"], must_not=["pink", "thing"]),
+                   BoolQuery(should=["wink", "thing", "is"]), BoolQuery(must_not=["and"]), BoolQuery(),
+                   BoolQuery(must=[WildcardQuery("?ink"), BoolQuery(should=["the", "and"])]),
+                   BoolQuery(["drink", "zzz"]), WildcardQuery("x*")]
+        compact = Index(tokenizer=StandardTokenizer()).build("files\indexer\docs", compact=True)
+        for index in [self._index, compact]:
+            for query in queries:
+                self.assertListEqual(BooleanSearch(index).search(query), BitmapSearch(index).search(query))
+
+    def test_batch_search(self):
+        queries = [BoolQuery(["he", "likes"]), PhraseQuery(["likes", "to", "drink"]),
+                   BoolQuery(must=["drink"], must_not=["pink", "thing"]), PhraseQuery(["drink", "ink"], slop=2),
+                   BoolQuery(should=["wink", "thing"]), BoolQuery(["likes", "he"]), BoolQuery(),
+                   BoolQuery(must=[PrefixQuery("th"), BoolQuery(should=["is", "zzz"])]), PhraseQuery(["ink", "zzz"]),
+                   FuzzyQuery("drnik"), PhraseQuery(["pink", "ink"])]
+        compact = Index(tokenizer=StandardTokenizer()).build("files\indexer\docs", compact=True)
+        for index in [self._index, compact]:
+            expected = [(PhraseSearch if isinstance(query, PhraseQuery) else BooleanSearch)(index).search(query)
+                        for query in queries]
+            model = BatchSearch(index)
+            self.assertListEqual(expected, model.search_batch(queries))
+            self.assertEqual(1, model.cache.results.hits)  # likes AND he
+            self.assertListEqual(expected[:2], model.search_batch(queries[:2]))
+
+    def test_query_cache(self):
+        model = BooleanSearch(self._index)
+        self.assertListEqual([4, 5], model.search(BoolQuery(["drink", "pink"])))
+        self.assertListEqual([4, 5], model.search(BoolQuery(["pink", "drink", "pink"])))  # same normalized query
+        self.assertEqual(1, model.cache.results.hits)
+        self.assertEqual(1, len(model.cache.results))
+
+        # pink AND ink (the 2 rarest operands) is reused by another query
+        self.assertListEqual([4, 5], model.search(BoolQuery(["ink", "he", "pink"])))
+        self.assertListEqual([4, 5], model.search(BoolQuery(must=["pink", "ink"], must_not=["thing"])))
+        self.assertGreaterEqual(model.cache.intersections.hits, 1)
+        self.assertListEqual([1, 2, 3, 4, 5], model.search(BoolQuery()))
+
+        uncached = BooleanSearch(self._index, cache_size=0)
+        self.assertIsNone(uncached.cache)
+        self.assertListEqual([4, 5], uncached.search(BoolQuery(["drink", "pink"])))
+
+        # lru eviction
+        small = BooleanSearch(self._index, cache_size=2)
+        for term in ["drink", "pink", "ink"]:
+            small.search(BoolQuery([term]))
+        self.assertEqual(2, len(small.cache.results))
+        small.search(BoolQuery(["drink"]))
+        self.assertEqual(0, small.cache.results.hits)
+
+    def test_query_cache_invalidation(self):
+        main = Index(tokenizer=StandardTokenizer()).build("files\indexer\docs", compact=True)
+        index = DynamicIndex(StandardTokenizer(), main, background=False)
+        for model, query in [(BooleanSearch(index), BoolQuery(["pink", "ink"])),
+                             (PhraseSearch(index), PhraseQuery(["pink", "ink"]))]:
+            before = model.search(query)
+            doc_id = index.add("pink ink")
+            self.assertListEqual(before + [doc_id], model.search(query))
+            index.delete(doc_id)
+            self.assertListEqual(before, model.search(query))
+
+        # batch arrays are fetched again after a change, single queries and batches, boolean and phrase
+        queries = [BoolQuery(["thing", "ink"]), PhraseQuery(["thing", "ink"])]
+        for cache_size in [0, QueryCache.SIZE]:
+            batch = BatchSearch(index, cache_size)
+            before = [batch.search(query) for query in queries]
+            doc_id = index.add("thing ink")
+            self.assertListEqual([res + [doc_id] for res in before], [batch.search(query) for query in queries])
+            self.assertListEqual([BooleanSearch(index).search(queries[0]), PhraseSearch(index).search(queries[1])],
+                                 batch.search_batch(queries))
+            index.delete(doc_id)
+            self.assertListEqual(before, batch.search_batch(queries))
+
+        # a result computed while the index changed is not cached as current
+        model, query = BooleanSearch(index), BoolQuery(["drink", "ink"])
+        version = model.cache.validate(index)
+        stale = QueryProcessor(model).search(query)
+        doc_id = index.add("drink ink")
+        model.cache.validate(index)
+        model.cache.put(model.cache.results, query_key(query), stale, version)
+        self.assertEqual(0, len(model.cache.results))
+        self.assertListEqual(stale + [doc_id], model.search(query))
+
     def init_posting_from_ids(self, l1) -> list:
         return [Posting(p1) for p1 in l1]
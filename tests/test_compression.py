@@ -0,0 +1,56 @@
+import random
+import tempfile
+import unittest
+from os.path import join, dirname
+
+from indexer.compression import CODECS, VByteCodec, CompressedIndex, CompressedPostingList
+from indexer.disk import DiskIndex
+from indexer.index import Index
+from preprocessing.tokenize.stand import StandardTokenizer
+
+
+class TestCompression(unittest.TestCase):
+
+    def test_vbyte_encoding(self):
+        # 824 == 6 * 128 + 56 >> low 7 bits first, high bit set on the last byte
+        self.assertEqual(bytes([56, 6 | 128]), VByteCodec.encode([824]))
+        self.assertEqual(bytes([5 | 128]), VByteCodec.encode([5]))
+        self.assertListEqual([824, 5, 214577], VByteCodec.decode(VByteCodec.encode([824, 5, 214577]), 3))
+
+    def test_codecs_round_trip(self):
+        for codec in CODECS.values():
+            values = [random.randrange(0, 1 << random.randrange(1, 32)) for _ in range(300)]
+            self.assertListEqual(values, codec.decode(codec.encode(values), len(values)))
+            self.assertListEqual([0, 0, 0], codec.decode(codec.encode([0, 0, 0]), 3))
+
+    def test_posting_list_blocks(self):
+        # more than one block, doc id gaps continue across blocks
+        postings = [(i * 3 + 1, [i % 7 + 1, i % 7 + 4]) for i in range(300)]
+        for codec in CODECS.values():
+            pl = CompressedPostingList(CompressedPostingList.encode(postings, codec), codec)
+            self.assertEqual(300, len(pl))
+            self.assertListEqual([doc_id for doc_id, _ in postings], list(pl.ids()))
+            self.assertListEqual(postings[299][1], pl[299].pos_list)
+            self.assertListEqual(postings[5][1], pl[5].pos_list)
+
+    def test_compressed_index(self):
+        index = Index(tokenizer=StandardTokenizer()).build(join(dirname(__file__), "files", "indexer", "docs"))
+        for codec in CODECS.values():
+            compressed = CompressedIndex.from_index(index, codec)
+            self.assertListEqual(sorted(index), list(compressed))
+            for term_name, term in index.items():
+                self.assertEqual(term.df, compressed[term_name].df)
+                self.assertListEqual([str(p) for p in term.pst_list], [str(p) for p in compressed[term_name].pst_list])
+
+    def test_compressed_disk_index(self):
+        indexer = Index(tokenizer=StandardTokenizer())
+        fp = join(dirname(__file__), "files", "indexer", "docs")
+        index = indexer.build(fp)
+        for codec in CODECS:
+            with tempfile.TemporaryDirectory() as tmp:
+                indexer.build_to_disk(fp, tmp, codec=codec)
+                with DiskIndex(tmp) as disk:
+                    self.assertListEqual(sorted(index), list(disk))
+                    self.assertListEqual([str(p) for p in index["drink"].pst_list],
+                                         [str(p) for p in disk["drink"].pst_list])
+
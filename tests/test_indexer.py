@@ -1,7 +1,14 @@
-import unittest, filecmp
+import unittest, filecmp, tempfile, sys
 from os.path import join, dirname
 
-from indexer.index import Index
+from indexer.disk import DiskIndex, next_doc_id, write_segment
+from indexer.docset import DocSet
+from indexer.dynamic import DynamicIndex
+from indexer.index import Index, Term
+from indexer.ngram import NGramTermIndex
+from indexer.terms import TermDictionary
+from indexer.parallel import ParallelIndex
+from indexer.spimi import SPIMIIndexer
 from preprocessing.tokenize.stand import StandardTokenizer
 
 
@@ -18,4 +25,156 @@ class TestIndexer(unittest.TestCase):
                 for pst in term.pst_list:
                     w.write("{}\n".format(pst))
                 w.write("\n")
-        self.assertTrue(filecmp.cmp(fp + "positional\\expected", fp + "positional\\result"))
\ No newline at end of file
+        self.assertTrue(filecmp.cmp(fp + "positional\\expected", fp + "positional\\result"))
+
+    def test_compact_indexing(self):
+
+        # compact index should hold exactly the same postings as the Term/Posting layout
+        indexer = Index(tokenizer=StandardTokenizer())
+        fp = join(dirname(__file__), "files", "indexer", "docs")
+        index, compact = indexer.build(fp), indexer.build(fp, compact=True)
+        self.assertListEqual(sorted(index), sorted(compact))
+        for term_name, term in index.items():
+            self.assertEqual(term.df, compact[term_name].df)
+            self.assertListEqual([str(p) for p in term.pst_list], [str(p) for p in compact[term_name].pst_list])
+
+    def test_term_add_post(self):
+        term = Term()
+        for doc_id, pos in [(1, 2), (1, 5), (3, 1), (4, 2), (4, 7), (4, 9)]:
+            term.add_post(doc_id, pos)
+        self.assertEqual(3, term.df)
+        self.assertListEqual(["1,2: [2,5]", "3,1: [1]", "4,3: [2,7,9]"], [repr(p) for p in term.pst_list])
+
+    def test_disk_indexing(self):
+
+        # two segments of the same docs dir, doc ids of the second one continue after the first
+        indexer = Index(tokenizer=StandardTokenizer())
+        fp = join(dirname(__file__), "files", "indexer", "docs")
+        index = indexer.build(fp)
+        with tempfile.TemporaryDirectory() as tmp:
+            indexer.build_to_disk(fp, tmp)
+            with DiskIndex(tmp) as disk:
+                self.assertListEqual(sorted(index), list(disk))
+                self.assertListEqual([str(p) for p in index["drink"].pst_list],
+                                     [str(p) for p in disk["drink"].pst_list])
+            indexer.build_to_disk(fp, tmp)
+            with DiskIndex(tmp) as disk:
+                self.assertEqual(2, len(disk.segments))
+                self.assertEqual(2 * index["ink"].df, disk["ink"].df)
+                self.assertListEqual([3, 4, 5, 8, 9, 10], [p.id for p in disk["ink"].pst_list])
+                self.assertNotIn("wine", disk)
+
+            # an empty last segment does not reset the doc ids
+            write_segment(dict(), tmp)
+            self.assertEqual(11, next_doc_id(tmp))
+            self.assertRaises(ValueError, write_segment, index, tmp)
+
+    def test_spimi_indexing(self):
+
+        # tiny budget >> one block per doc, merged index should equal the in-memory one
+        fp = join(dirname(__file__), "files", "indexer", "docs")
+        index = Index(tokenizer=StandardTokenizer()).build(fp)
+        with tempfile.TemporaryDirectory() as tmp:
+            stats = SPIMIIndexer(StandardTokenizer(), budget=1).build(fp, tmp)
+            self.assertEqual(5, stats["blocks"])
+            with DiskIndex(tmp) as disk:
+                self.assertListEqual(sorted(index), list(disk))
+                for term_name, term in index.items():
+                    self.assertListEqual([str(p) for p in term.pst_list], [str(p) for p in disk[term_name].pst_list])
+
+    def test_parallel_indexing(self):
+        fp = join(dirname(__file__), "files", "indexer", "docs")
+        indexer = Index(tokenizer=StandardTokenizer())
+        index = indexer.build(fp)
+        for compact in [False, True]:
+            parallel_indexer = ParallelIndex(StandardTokenizer(), workers=2)
+            parallel = parallel_indexer.build(fp, compact=compact)
+            self.assertDictEqual(indexer.stats.doc_lens, parallel_indexer.stats.doc_lens)
+            self.assertEqual(indexer.stats.avgdl, parallel_indexer.stats.avgdl)
+            self.assertListEqual(sorted(index), sorted(parallel))
+            for term_name, term in index.items():
+                self.assertListEqual([str(p) for p in term.pst_list], [str(p) for p in parallel[term_name].pst_list])
+
+    def test_dynamic_indexing(self):
+        fp = join(dirname(__file__), "files", "indexer", "docs")
+        main = Index(tokenizer=StandardTokenizer()).build(fp, compact=True)
+        index = DynamicIndex(StandardTokenizer(), main, max_delta_docs=2, background=False)
+
+        self.assertEqual(6, index.add("pink ink everywhere"))
+        self.assertListEqual([3, 4, 5, 6], [p.id for p in index["ink"].pst_list])
+        index.delete(3)
+        index.update(4, "no more drinks")
+        self.assertListEqual([5, 6], [p.id for p in index["ink"].pst_list])
+        self.assertListEqual([4], [p.id for p in index["drinks"].pst_list])
+        self.assertNotIn("thing", index)  # only appeared in deleted doc 3
+
+        # 2 docs in delta >> merged into a new main segment
+        self.assertEqual(2, index.segments)
+        self.assertNotIn(3, [p.id for p in index["he"].pst_list])
+        index.update(6, "drink pink ink")
+        self.assertRaises(KeyError, index.update, 7, "never added")
+        self.assertListEqual(["6,1: [3]"], [repr(p) for p in index["ink"].pst_list if p.id == 6])
+        self.assertListEqual(["6,1: [2]"], [repr(p) for p in index["pink"].pst_list if p.id == 6])
+
+        # a snapshot keeps seeing the index as it was
+        snapshot = index.snapshot()
+        index.add("ink again")
+        index.delete(5)
+        self.assertListEqual([6, 7], [p.id for p in index["ink"].pst_list])
+        self.assertListEqual([5, 6], [p.id for p in snapshot["ink"].pst_list])
+        self.assertNotIn("again", snapshot)
+        self.assertIn("again", index)
+        self.assertListEqual(sorted(snapshot), [term for term in snapshot])
+        self.assertEqual(len(list(index)), len(index))
+
+    def test_ngram_term_index(self):
+        fp = join(dirname(__file__), "files", "indexer", "docs")
+        ngrams = NGramTermIndex(Index(tokenizer=StandardTokenizer()).build(fp))
+        self.assertListEqual(["the", "thing"], ngrams.prefix("th"))
+        self.assertListEqual(["thing"], ngrams.prefix("thin"))
+        self.assertListEqual(["drink", "ink", "pink", "wink"], ngrams.substring("ink"))
+        self.assertListEqual(["drink", "ink", "pink", "thing", "wink"], ngrams.substring("in"))
+        self.assertListEqual([], ngrams.substring("inks"))
+        self.assertListEqual(["drink", "ink", "likes", "pink", "wink"], ngrams.substring("k"))  # shorter than k
+        self.assertEqual(11, len(ngrams.prefix("")))
+
+    def test_term_dictionary(self):
+        terms = sorted(["ink", "is", "pink", "wink", "drink", "thing", "the", "él", "éa"])
+        dictionary = TermDictionary.from_terms(terms)
+        self.assertListEqual(terms, list(dictionary))
+        self.assertEqual(terms.index("pink"), dictionary["pink"])
+        self.assertNotIn("pin", dictionary)
+        self.assertListEqual(["the", "thing"], dictionary.prefix("th"))
+        self.assertListEqual(["éa", "él"], dictionary.prefix("é"))
+        self.assertListEqual(["is", "pink"], dictionary.range("ink", "pink", include_lower=False))
+        self.assertListEqual(["drink", "ink"], dictionary.range(upper="is", include_upper=False))
+        self.assertListEqual(["drink", "pink", "wink"], dictionary.wildcard("*?ink"))
+        self.assertListEqual(["thing"], dictionary.wildcard("th?n*"))
+        self.assertListEqual([("ink", 1), ("pink", 0), ("wink", 1)], dictionary.fuzzy("pink", 1))
+        self.assertListEqual([("thing", 1)], dictionary.fuzzy("thnig", 2, prefix_length=2))
+        self.assertListEqual([("él", 1)], dictionary.fuzzy("el", 1))
+
+        # memory per term is lower than a dict of term >> ordinal
+        terms = ["term{}".format(i) for i in range(10000)]
+        as_dict = {term: t for t, term in enumerate(terms)}
+        dict_bytes = sys.getsizeof(as_dict) + sum(sys.getsizeof(term) + sys.getsizeof(t) for term, t in as_dict.items())
+        self.assertLess(TermDictionary.from_terms(terms).nbytes() * 4, dict_bytes)
+
+    def test_doc_set(self):
+        sparse = list(range(3, 200000, 97))                                           # array containers
+        dense = [i for i in range(70000) if i % 3] + list(range(131072, 140000, 2))    # bitmaps + array
+        s, d = DocSet.from_ids(sparse), DocSet.from_ids(dense)
+        self.assertListEqual(dense, list(d))
+        self.assertEqual(len(dense), len(d))
+        self.assertIn(131074, d)
+        self.assertNotIn(131075, d)
+        self.assertNotIn(300000, d)
+        self.assertListEqual(sorted(set(sparse) & set(dense)), list(s & d))
+        self.assertListEqual(sorted(set(sparse) | set(dense)), list(s | d))
+        self.assertListEqual(sorted(set(dense) - set(sparse)), list(d - s))
+        self.assertListEqual(sorted(set(sparse) - set(dense)), list(s - d))
+        # a bitmap and emptied to few ids >> back to an array container
+        few = d & DocSet.from_ids([1, 2, 4, 65000])
+        self.assertListEqual([1, 2, 4, 65000], list(few))
+        self.assertLess(few.nbytes(), 100)
+        self.assertEqual(0, len(s & DocSet.from_ids([])))
@@ -0,0 +1,95 @@
+import unittest
+from math import log, sqrt
+from os.path import join, dirname
+
+from benchmarking.corpus import synthetic_docs
+from indexer.dynamic import DynamicIndex
+from indexer.index import Index
+from indexer.stats import DocStats
+from preprocessing.tokenize.stand import StandardTokenizer
+from search.model.ranked import RankedSearch, WANDSearch, BM25, TFIDF
+from search.query.query import RankedQuery
+
+
+class TestRankedSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._indexer = Index(tokenizer=StandardTokenizer())
+        cls._index = cls._indexer.build(join(dirname(__file__), "files", "indexer", "docs"))
+
+    def test_doc_stats(self):
+        stats = self._indexer.stats
+        self.assertEqual(5, stats.n)
+        self.assertDictEqual({1: 8, 2: 8, 3: 8, 4: 8, 5: 8}, stats.doc_lens)
+        self.assertAlmostEqual(8, stats.avgdl)
+
+    def test_bm25_top_k(self):
+        # "drink" appears 3 times in doc 2, once in all others (same length) >> ties broken by doc id
+        model = RankedSearch(self._index, BM25(), self._indexer.stats)
+        result = model.search(RankedQuery(["drink"], k=2))
+        self.assertListEqual([2, 1], [doc_id for doc_id, _ in result])
+        idf = log(1 + (5 - 5 + 0.5) / (5 + 0.5))
+        self.assertAlmostEqual(idf * 3 * 2.2 / (3 + 1.2), result[0][1])
+        self.assertAlmostEqual(idf * 2.2 / (1 + 1.2), result[1][1])
+
+    def test_tfidf_scores(self):
+        model = RankedSearch(self._index, TFIDF(), self._indexer.stats)
+        result = model.search(RankedQuery(["drink", "wink"], k=10))
+        self.assertEqual(5, len(result))
+        idf_drink, idf_wink = 1 + log(5 / 6), 1 + log(5 / 3)
+        scores = dict(result)
+        self.assertAlmostEqual((sqrt(3) * idf_drink ** 2) / sqrt(8), scores[2])
+        self.assertAlmostEqual((idf_drink ** 2 + idf_wink ** 2) / sqrt(8), scores[1])
+        self.assertListEqual(sorted(scores.values(), reverse=True), [score for _, score in result])
+
+    def test_stats_from_index(self):
+        # without index time stats, doc lengths are recovered from the postings
+        result = RankedSearch(self._index).search(RankedQuery(["he", "likes", "pink"], k=3))
+        expected = RankedSearch(self._index, BM25(), self._indexer.stats).search(RankedQuery(["he", "likes", "pink"], k=3))
+        self.assertListEqual(expected, result)
+
+    def test_empty_ranked_query(self):
+        model = RankedSearch(self._index)
+        self.assertListEqual([], model.search(RankedQuery([])))
+        self.assertListEqual([], model.search(RankedQuery(["wine"])))
+
+    def test_wand_upper_bounds(self):
+        model = WANDSearch(self._index, BM25(), self._indexer.stats)
+        idf = log(1 + (5 - 5 + 0.5) / (5 + 0.5))
+        self.assertAlmostEqual(idf * 3 * 2.2 / (3 + 1.2), model.upper_bound("drink"))
+
+    def test_wand_on_dynamic_index(self):
+        main = Index(tokenizer=StandardTokenizer()).build(join(dirname(__file__), "files", "indexer", "docs"))
+        index = DynamicIndex(StandardTokenizer(), main, background=False, stats=self._indexer.stats)
+        wand = WANDSearch(index, BM25())
+        sq = RankedQuery(["thing", "ink"], 1)
+        self.assertEqual(3, wand.search(sq)[0][0])
+        # the new doc scores over the thing bound computed before it was added
+        doc_id = index.add("thing thing")
+        self.assertListEqual(RankedSearch(index, BM25()).search(sq), wand.search(sq))
+        self.assertEqual(doc_id, wand.search(sq)[0][0])
+
+        # doc stats follow adds / deletes / updates without rescanning the postings
+        index.delete(2)
+        index.update(doc_id, "thing")
+        self.assertIs(index.stats, wand.stats)
+        self.assertDictEqual(DocStats.from_index(index).doc_lens, wand.stats.doc_lens)
+        self.assertAlmostEqual(DocStats.from_index(index).avgdl, wand.stats.avgdl)
+        self.assertListEqual(RankedSearch(index, BM25()).search(sq), wand.search(sq))
+        self.assertEqual(5, len(self._indexer.stats.doc_lens))  # not modified
+
+    def test_wand_same_as_exhaustive(self):
+        indexer = Index(tokenizer=StandardTokenizer())
+        index = indexer.build_docs(enumerate(synthetic_docs(300, doc_len=30, vocab_size=200, seed=5), 1))
+        vocab = sorted(index)
+        for scorer in [BM25, TFIDF]:
+            exhaustive = RankedSearch(index, scorer(), indexer.stats)
+            wand = WANDSearch(index, scorer(), indexer.stats)
+            for i in range(60):
+                # common terms (head of the zipf vocab) mixed with rare ones
+                terms = [vocab[(i * 7 + j * 13) % len(vocab)] for j in range(1 + i % 4)] + ["w0", "w1"][:i % 3]
+                for k in [1, 5, 20]:
+                    sq = RankedQuery(terms, k)
+                    self.assertListEqual(exhaustive.search(sq), wand.search(sq))
+            self.assertLess(wand.scored, 60 * 3 * 300)
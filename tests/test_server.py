@@ -0,0 +1,122 @@
+import asyncio
+import unittest
+
+from indexer.index import Index
+from preprocessing.tokenize.stand import StandardTokenizer
+from search.model.boolean import BooleanSearch, PhraseSearch
+from search.model.ranked import RankedSearch, TFIDF
+from search.query.query import BoolQuery, PhraseQuery, PrefixQuery, FuzzyQuery, RankedQuery
+from service.client import SearchClient
+from service.dsl import parse_query
+from service.server import SearchServer
+from service.sharded import ShardedSearch
+
+
+class TestSearchServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        index = Index(tokenizer=StandardTokenizer()).build("files\\indexer\\docs", compact=True)
+        self.server = SearchServer(index, port=0, workers=2, inline_cost=3)
+        self.client = SearchClient(port=await self.server.start())
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.server.close()
+
+    def test_parse_query(self):
+        query = parse_query({"bool": {"must": ["drink", {"prefix": "pi"}], "must_not": [{"fuzzy": "thnig"}]}})
+        self.assertIsInstance(query, BoolQuery)
+        self.assertEqual("drink", query.must[0])
+        self.assertIsInstance(query.must[1], PrefixQuery)
+        self.assertIsInstance(query.must_not[0], FuzzyQuery)
+        phrase = parse_query({"phrase": {"terms": ["pink", "ink"], "slop": 2}})
+        self.assertIsInstance(phrase, PhraseQuery)
+        self.assertEqual(2, phrase.slop)
+        for invalid in [{"bool": {"must": "drink"}}, {"bool": {"may": []}}, {"term": "ink"}, 3, {"phrase": [1]}]:
+            self.assertRaises(ValueError, parse_query, invalid)
+
+    async def test_search(self):
+        res = await self.client.search({"bool": {"must": ["drink", "pink"]}})
+        self.assertListEqual([4, 5], res["hits"])
+        self.assertEqual(2, res["total"])
+        res = await self.client.search({"phrase": ["pink", "ink"]})
+        self.assertListEqual([5], res["hits"])
+        res = await self.client.search({"bool": {"should": [{"wildcard": "*ink"}], "must_not": ["pink"]}}, size=1)
+        self.assertListEqual([1], res["hits"])   # drink, ink, pink, wink not pink >> 1, 2, 3 (first one)
+        self.assertEqual(3, res["total"])
+        self.assertListEqual([1, 2, 3, 4, 5], (await self.client.search({"bool": {}}))["hits"])
+        self.assertListEqual([3], (await self.client.search("thing"))["hits"])  # inline (cost 1)
+
+        self.assertEqual(400, (await self.client.request("POST", "/search", {"query": {"term": "x"}}))[0])
+        self.assertEqual(404, (await self.client.request("GET", "/nothing"))[0])
+        self.assertEqual(405, (await self.client.request("GET", "/search"))[0])
+        self.assertEqual(200, (await self.client.request("GET", "/health"))[0])
+
+        stats = await self.client.stats()
+        self.assertEqual(7, stats["latency_ms"]["/search"]["count"])
+        self.assertIn("p99", stats["latency_ms"]["/search"])
+        self.assertEqual(1, stats["connections"])  # all requests over a kept alive connection
+        self.assertGreater(stats["offloaded"], 0)
+        self.assertGreater(stats["inline"], 0)
+
+    async def test_invalid_content_length(self):
+        for length in [b"abc", b"-5"]:
+            reader, writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+            writer.write(b"POST /search HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n")
+            await writer.drain()
+            self.assertEqual(b"HTTP/1.1 400 Bad Request", (await reader.readline()).strip())
+            writer.close()
+            await writer.wait_closed()
+
+    async def test_concurrent_clients_and_coalescing(self):
+        clients = [SearchClient(port=self.server.port) for _ in range(8)]
+        query = {"bool": {"must": ["he", "likes", "drink"]}}  # offloaded (cost > inline_cost)
+        results = await asyncio.gather(*(client.search(query) for client in clients))
+        self.assertTrue(all(res["hits"] == [1, 2, 3, 4, 5] for res in results))
+        stats = await self.client.stats()
+        self.assertEqual(8, stats["coalesced"] + stats["offloaded"])
+        self.assertGreater(stats["coalesced"], 0)
+        for client in clients:
+            await client.close()
+
+
+class TestShardedSearch(unittest.TestCase):
+
+    def test_sharded_search(self):
+        indexer = Index(tokenizer=StandardTokenizer())
+        index = indexer.build("files\\indexer\\docs")
+        queries = [BoolQuery(["he", "likes"]), BoolQuery(must=["drink"], must_not=["pink"]), BoolQuery(),
+                   BoolQuery(should=["wink", "thing"]), BoolQuery([PrefixQuery("th")]), PhraseQuery(["pink", "ink"]),
+                   PhraseQuery(["likes", "drink"], slop=2)]
+        for shards in [1, 2, 3]:
+            with ShardedSearch("files\\indexer\\docs", shards) as sharded:
+                self.assertEqual(shards, sharded.shards)
+                self.assertEqual(5, sharded.n_docs)
+                for query in queries:
+                    model = PhraseSearch(index) if isinstance(query, PhraseQuery) else BooleanSearch(index)
+                    self.assertListEqual(model.search(query), sharded.search(query))
+                # scores use collection wide statistics, so shards rank as a single index does
+                for terms, k in [(["drink", "pink"], 3), (["ink", "wink", "he"], 10), (["zzz"], 2)]:
+                    expected = RankedSearch(index, stats=indexer.stats).search(RankedQuery(terms, k))
+                    ranked = sharded.search(RankedQuery(terms, k))
+                    self.assertListEqual([doc for doc, _ in expected], [doc for doc, _ in ranked])
+                    for (_, s1), (_, s2) in zip(expected, ranked):
+                        self.assertAlmostEqual(s1, s2)
+
+        with ShardedSearch("files\\indexer\\docs", 2, scorer=TFIDF()) as sharded:
+            expected = RankedSearch(index, TFIDF(), indexer.stats).search(RankedQuery(["ink", "drink"], 3))
+            ranked = sharded.search(RankedQuery(["ink", "drink"], 3))
+            self.assertListEqual([doc for doc, _ in expected], [doc for doc, _ in ranked])
+
+    def test_sharded_server(self):
+        async def run():
+            server = SearchServer(index_path="files\\indexer\\docs", port=0, workers=2, shards=2)
+            client = SearchClient(port=await server.start())
+            try:
+                self.assertListEqual([4, 5], (await client.search({"bool": {"must": ["drink", "pink"]}}))["hits"])
+                self.assertListEqual([5], (await client.search({"phrase": ["pink", "ink"]}))["hits"])
+                self.assertIsNone((await client.stats())["cache"])
+            finally:
+                await client.close()
+                await server.close()
+        asyncio.run(run())
@@ -19,3 +19,16 @@ class TestStemmer(unittest.TestCase):
         self.assertListEqual(['caress', 'fli', 'die', 'mule', 'deni', 'die', 'agre', 'own', 'humbl', 'size',
                               'meet', 'state', 'siez', 'item', 'sensat', 'tradit', 'refer', 'colon', 'plot'],
                              singles)
+
+    def test_porter_stemmer_rules(self):
+        words = ['skies', 'dying', 'happy', 'enjoy', 'geology', 'hopping', 'falling', 'filing', 'generalization',
+                 'controll', 'Caresses', 'ab']
+        self.assertListEqual(['sky', 'die', 'happi', 'enjoy', 'geolog', 'hop', 'fall', 'file', 'gener',
+                              'control', 'caress', 'ab'], [self.stemmer.stem(w) for w in words])
+
+    def test_stem_cache_is_bounded(self):
+        stemmer = PorterStemmer(cache_size=2)
+        for word in ['meeting', 'stating', 'meeting', 'plotted']:
+            stemmer.stem(word)
+        self.assertListEqual(['meeting', 'plotted'], list(stemmer._cache))
+        self.assertEqual('meet', stemmer.stem('meeting'))
@@ -1,4 +1,5 @@
 import unittest, random, os, filecmp
+from benchmarking.tokenize import legacy_tokenize
 from preprocessing.tokenize.stand import StandardTokenizer
 from preprocessing.tokenize.keyword import KeywordTokenizer
 from preprocessing.tokenize.ngram import NGramTokenizer
@@ -43,6 +44,20 @@ class TestTokenize(unittest.TestCase):
                               ('him', 6), ('you', 7), ('bad', 8), ('boy', 9)], tokens)
         self.assertTrue(all(punct not in tokens for punct in Tokenizer.PUNCT_MARKS))
 
+    def test_compiled_tokenizer_on_file(self):
+
+        # compiled rules output == char by char algorithm output
+        tokenizers = [StandardTokenizer(), UAXEmailTokenizer()]
+        tokenizers[1]._word_divider, tokenizers[1]._meaningful_puncts = tokenizers[1]._get_dividers()
+        fp = os.path.join(os.path.dirname(__file__), "files", "tokenize", "before")
+        with open(fp, 'r') as f:
+            text = f.read()
+        for tokenizer in tokenizers:
+            for s in text.splitlines() + [text]:
+                self.assertListEqual(legacy_tokenize(tokenizer, s.lower()), tokenizer.tokenize(s))
+                stops = {"the", "of", "inc"}
+                self.assertListEqual(legacy_tokenize(tokenizer, s, stops), Tokenizer.tokenize(tokenizer, s, stops))
+
     def test_keyword_tokenizer(self):
 
         tokenizer = KeywordTokenizer()
@@ -55,7 +70,7 @@ class TestTokenize(unittest.TestCase):
         tokenizer = NGramTokenizer()
         str1 = "Quick Fox"
         tokens = tokenizer.tokenize(str1, edges=True)
-        self.assertListEqual(['Q', 'Qu'], tokens)
+        self.assertListEqual([('Q', 1), ('Qu', 2)], tokens)
 
     def test_edge_ngram_tokenizer_with_params(self):
 
@@ -63,7 +78,23 @@ class TestTokenize(unittest.TestCase):
         str1 = "Quick2Brown$Fox"
         # split on digit && symbol
         tokens = tokenizer.tokenize(str1, min_gram=3, max_gram=7, tok_chars=["letter"], edges=True)
-        self.assertListEqual(['Qui', 'Quic', 'Quick', 'Bro', 'Brow', 'Brown', 'Fox'], tokens)
+        self.assertListEqual([('Qui', 1), ('Quic', 2), ('Quick', 3), ('Bro', 4), ('Brow', 5), ('Brown', 6),
+                              ('Fox', 7)], tokens)
+
+    def test_ngram_tokenizer_default_params(self):
+
+        tokenizer = NGramTokenizer()
+        tokens = tokenizer.tokenize("Quick Fox")
+        self.assertListEqual(['Q', 'Qu', 'u', 'ui', 'i', 'ic', 'c', 'ck', 'k', 'k ', ' ', ' F', 'F', 'Fo', 'o', 'ox', 'x'],
+                             [gram for gram, _ in tokens])
+        self.assertListEqual(list(range(1, 18)), [pos for _, pos in tokens])
+
+    def test_ngram_tokenizer_with_params(self):
+
+        tokenizer = NGramTokenizer()
+        # keeps letters && digits, split on symbol
+        tokens = tokenizer.tokenize("Fox2$ab", min_gram=2, max_gram=3, tok_chars=["letter", "digit"])
+        self.assertListEqual([('Fo', 1), ('Fox', 2), ('ox', 3), ('ox2', 4), ('x2', 5), ('ab', 6)], tokens)
 
     def test_edge_ngram_tokenizer_invalid(self):
 